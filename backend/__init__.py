@@ -1,9 +1,55 @@
 """
 EduGenie Backend Package
-Contains AI engine, content processor, and database modules
+Contains AI engine, model backends, generation profiles, context packer, content processor, database, document library, extraction cache, model router, generation pipeline, question bank, quiz parser, resilience, response cache, retrieval, text normalizer, and topic index modules
 """
-from .ai_engine import AIEngine
+from .ai_engine import AIEngine, get_shared_engine
+from .context_packer import estimate_tokens, pack_context
 from .content_processor import ContentProcessor
 from .database import Database
+from .document_library import DocumentLibrary, get_document_library
+from .extraction_cache import ExtractionCache, get_extraction_cache
+from .generation_profiles import get_generation_config, list_profiles
+from .model_backends import FakeBackend, GeminiBackend, ModelBackend, create_backend
+from .model_router import ModelRouter
+from .pipeline import generate_study_materials
+from .question_bank import sample_quiz
+from .quiz_parser import QuizStreamParser, parse_quiz_questions
+from .resilience import GenerationError
+from .response_cache import ResponseCache, get_response_cache
+from .retrieval import BM25Index, select_chunks
+from .text_normalizer import normalization_report, normalize_blocks, normalize_pages
+from .topic_index import TopicIndex, get_topic_index
 
-__all__ = ['AIEngine', 'ContentProcessor', 'Database']
\ No newline at end of file
+__all__ = [
+    'AIEngine',
+    'get_shared_engine',
+    'estimate_tokens',
+    'pack_context',
+    'ContentProcessor',
+    'Database',
+    'DocumentLibrary',
+    'get_document_library',
+    'ExtractionCache',
+    'get_extraction_cache',
+    'get_generation_config',
+    'list_profiles',
+    'ModelBackend',
+    'GeminiBackend',
+    'FakeBackend',
+    'create_backend',
+    'ModelRouter',
+    'generate_study_materials',
+    'sample_quiz',
+    'QuizStreamParser',
+    'parse_quiz_questions',
+    'GenerationError',
+    'ResponseCache',
+    'get_response_cache',
+    'BM25Index',
+    'select_chunks',
+    'normalize_pages',
+    'normalize_blocks',
+    'normalization_report',
+    'TopicIndex',
+    'get_topic_index',
+]
\ No newline at end of file
@@ -3,88 +3,975 @@ AI Engine Module
 Handles all AI operations using Google Gemini API
 Generates explanations, summaries, and quizzes
 """
-import google.generativeai as genai
-from typing import Dict, List
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
 import json
+import logging
 import re
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from contextlib import contextmanager
 from config import Config
+from .content_processor import ContentProcessor
+from .context_packer import estimate_tokens, get_context_budget, pack_context
+from .generation_profiles import FINISH_MAX_TOKENS, get_generation_config
+from .metrics import HedgeStats, LatencyTracker, OutcomeTracker, RouteMetrics
+from .model_backends import ModelBackend, create_backend
+from .model_router import DEFAULT_ROUTE, ModelRouter
+from .resilience import (
+    GenerationError,
+    backoff_delay,
+    get_circuit_breaker,
+    get_token_bucket,
+    is_model_unavailable_error,
+    is_transient_error,
+)
+from .quiz_parser import QuizStreamParser, parse_quiz_questions, recover_string_field
+from .response_cache import ResponseCache, get_response_cache
+
+logger = logging.getLogger(__name__)
+
+# Process-wide registry of shared engines, keyed by (backend, api_key, model_name)
+_ENGINE_REGISTRY: Dict[Tuple[str, str, str], "AIEngine"] = {}
+_REGISTRY_LOCK = threading.Lock()
+
+# Threads running hedged requests (primary and duplicate calls), created
+# on the first hedged call so processes without hedging never have one
+_HEDGE_EXECUTOR: Optional[ThreadPoolExecutor] = None
+_HEDGE_EXECUTOR_LOCK = threading.Lock()
+
+
+def _hedge_executor() -> ThreadPoolExecutor:
+    """Return the process-wide thread pool for hedged requests, creating it on first use"""
+    global _HEDGE_EXECUTOR
+    with _HEDGE_EXECUTOR_LOCK:
+        if _HEDGE_EXECUTOR is None:
+            _HEDGE_EXECUTOR = ThreadPoolExecutor(
+                max_workers=Config.HEDGE_MAX_WORKERS, thread_name_prefix="edugenie-hedge"
+            )
+        return _HEDGE_EXECUTOR
+
+
+def get_shared_engine(
+    api_key: str = None,
+    model_name: str = None,
+    backend_name: str = None
+) -> "AIEngine":
+    """
+    Return the process-wide AIEngine for a backend, API key and model
+    
+    Every Streamlit session shares the same engine, so the working model is
+    resolved once per process instead of once per visitor.
+    
+    Args:
+        api_key: Google Gemini API key
+        model_name: Preferred model (defaults to Config.GEMINI_MODEL)
+        backend_name: Model backend (defaults to Config.MODEL_BACKEND)
+        
+    Returns:
+        Shared AIEngine instance
+    """
+    api_key = api_key or Config.GEMINI_API_KEY
+    model_name = model_name or Config.GEMINI_MODEL
+    backend_name = backend_name or Config.MODEL_BACKEND
+    key = (backend_name, api_key, model_name)
+    
+    with _REGISTRY_LOCK:
+        engine = _ENGINE_REGISTRY.get(key)
+        if engine is None:
+            engine = AIEngine(
+                api_key,
+                model_name=model_name,
+                backend=create_backend(backend_name, api_key)
+            )
+            _ENGINE_REGISTRY[key] = engine
+    return engine
+
 
 class AIEngine:
-    """AI Engine using Google Gemini for content generation"""
+    """AI Engine generating content through a model backend (Google Gemini by default)"""
+    
+    # Explanation style per learning level
+    LEVEL_PROMPTS = {
+        "Beginner": "Explain this topic in very simple terms, as if teaching a complete beginner. Use everyday examples and avoid jargon.",
+        "Intermediate": "Explain this topic with moderate detail, assuming some foundational knowledge. Include relevant examples and concepts.",
+        "Advanced": "Provide an in-depth, technical explanation. Include advanced concepts, nuances, and technical terminology."
+    }
     
-    def __init__(self, api_key: str = None):
+    def __init__(
+        self,
+        api_key: str = None,
+        model_name: str = None,
+        response_cache: ResponseCache = None,
+        hedging: bool = None,
+        backend: ModelBackend = None,
+        routing: bool = None
+    ):
         """
         Initialize AI Engine with Gemini API
         
+        No request is sent here: the working model is resolved lazily on the
+        first call and re-resolved whenever a call fails. Calls are rate
+        limited per API key, retried with backoff on transient errors and
+        skip models whose circuit breaker is open.
+        
         Args:
             api_key: Google Gemini API key
+            model_name: Preferred model (defaults to Config.GEMINI_MODEL)
+            response_cache: Cache for model responses (defaults to the shared
+                cache when Config.RESPONSE_CACHE_ENABLED is set)
+            hedging: Send a duplicate request to the next model when a call
+                is slow (defaults to Config.HEDGING_ENABLED)
+            backend: Model backend (defaults to the Config.MODEL_BACKEND backend)
+            routing: Pick models per method and learning level with
+                Config.MODEL_ROUTES (defaults to Config.MODEL_ROUTING_ENABLED)
         """
         self.api_key = api_key or Config.GEMINI_API_KEY
-        genai.configure(api_key=self.api_key)
-        
-        # Try to initialize with configured model, with fallbacks
-        model_names = [
-            Config.GEMINI_MODEL,
-            "learnlm-2.0-flash-experimental",  # Best for education
-            "gemini-2.5-flash",  # Latest stable
-            "gemini-flash-latest",  # Always newest
-            "gemini-2.0-flash",  # Fallback
-        ]
+        self.backend = backend or create_backend(api_key=self.api_key)
+        
+        # Preferred model first, then the configured fallbacks (no duplicates)
+        self.model_names = list(dict.fromkeys(
+            [model_name or Config.GEMINI_MODEL] + Config.GEMINI_FALLBACK_MODELS
+        ))
+        
+        self._lock = threading.Lock()
+        self._resolved_model: Optional[str] = None
+        self._resolved_at = 0.0
+        self._local = threading.local()
+        self._rate_limiter = get_token_bucket(self.api_key)
+        
+        self.hedging = Config.HEDGING_ENABLED if hedging is None else hedging
+        self.latency_tracker = LatencyTracker()
+        self.outcome_tracker = OutcomeTracker()
+        self.hedge_stats = HedgeStats()
+        self.route_metrics = RouteMetrics()
+        
+        routing = Config.MODEL_ROUTING_ENABLED if routing is None else routing
+        self.router = ModelRouter(self.latency_tracker, self.outcome_tracker) if routing else None
+        
+        if response_cache is None and Config.RESPONSE_CACHE_ENABLED:
+            response_cache = get_response_cache()
+        self.response_cache = response_cache
+    
+    @property
+    def model_name(self) -> Optional[str]:
+        """Name of the currently resolved model, if any"""
+        return self._resolved_model
+    
+    def _candidate_models(self) -> List[str]:
+        """
+        Order the models to try for the next call
+        
+        A resolved model is tried first while its TTL is fresh, followed by
+        the rest of the fallback list. Circuit breakers are checked when a
+        model is about to be called, not here.
+        """
+        now = time.monotonic()
+        with self._lock:
+            resolved = self._resolved_model
+            if resolved and now - self._resolved_at > Config.MODEL_RESOLUTION_TTL_SECONDS:
+                resolved = None
+                self._resolved_model = None
         
-        self.model = None
+        ordered = ([resolved] if resolved else []) + self.model_names
+        return list(dict.fromkeys(ordered))
+    
+    def _route(self, method: str, learning_level: str = None) -> Tuple[str, List[str]]:
+        """
+        Pick the route and the models to try for a request
+        
+        Models chosen by the router come first, followed by the regular
+        candidate order as fallback.
+        
+        Returns:
+            Tuple of (route name, models in try order)
+        """
+        candidates = self._candidate_models()
+        if self.router is None:
+            return DEFAULT_ROUTE, candidates
+        route, preferred = self.router.route(method, learning_level)
+        return route, list(dict.fromkeys(preferred + candidates))
+    
+    def _mark_resolved(self, model_name: str):
+        """Remember a model that just answered successfully"""
+        with self._lock:
+            if self._resolved_model != model_name:
+                logger.info("Using %s model: %s", self.backend.name, model_name)
+                self._resolved_model = model_name
+                self._resolved_at = time.monotonic()
+    
+    def _mark_failed(self, model_name: str):
+        """Drop a failing model if it was the resolved one"""
+        with self._lock:
+            if self._resolved_model == model_name:
+                self._resolved_model = None
+    
+    def _call_with_retries(
+        self,
+        model_name: str,
+        call: Callable[[], object],
+        record_latency: bool = True
+    ):
+        """
+        Run one model call under the rate limiter, retrying transient errors
+        
+        Rate-limit and server errors are retried with exponential backoff;
+        anything else is raised immediately. The latency of the successful
+        attempt is recorded for the model unless record_latency is False:
+        opening a stream returns at the first chunk, and that time is not
+        comparable to a full response's latency, which routing and the
+        hedge delay rely on.
+        """
+        for attempt in range(Config.MODEL_MAX_RETRIES + 1):
+            self._rate_limiter.acquire()
+            start = time.perf_counter()
+            try:
+                result = call()
+            except Exception as e:
+                if not is_transient_error(e) or attempt == Config.MODEL_MAX_RETRIES:
+                    raise
+                time.sleep(backoff_delay(attempt, e))
+                continue
+            if record_latency:
+                self.latency_tracker.record(model_name, time.perf_counter() - start)
+            return result
+    
+    def _try_model(
+        self,
+        model_name: str,
+        call_model: Callable[[str], object],
+        resolve: bool = True,
+        record_latency: bool = True
+    ):
+        """
+        Call one model with retries and update its circuit breaker
+        
+        The caller must have checked the breaker with allow() first. Routed
+        requests pass resolve=False, so a model picked for one kind of
+        request doesn't become the default for all others. record_latency
+        is passed on to _call_with_retries.
+        
+        Raises:
+            Exception: The model's last error if the call failed
+        """
+        breaker = get_circuit_breaker(self.api_key, model_name)
+        try:
+            result = self._call_with_retries(model_name, lambda: call_model(model_name), record_latency)
+        except Exception as e:
+            if is_model_unavailable_error(e):
+                breaker.trip()
+            else:
+                breaker.record_failure()
+            self.outcome_tracker.record(model_name, False)
+            self._mark_failed(model_name)
+            raise
+        
+        breaker.record_success()
+        self.outcome_tracker.record(model_name, True)
+        if resolve:
+            self._mark_resolved(model_name)
+        return result
+    
+    def _call_with_failover(
+        self,
+        call_model: Callable[[str], object],
+        candidates: List[str] = None,
+        resolve: bool = True,
+        record_latency: bool = True
+    ) -> Tuple[str, object]:
+        """
+        Run a model call down the fallback list until one model succeeds
+        
+        Args:
+            call_model: Function making the call for a given model name
+            candidates: Models in try order (defaults to _candidate_models())
+            resolve: Remember the answering model as the working default
+            record_latency: Record the successful call's latency for the
+                model (False for stream opens, see _call_with_retries)
+            
+        Returns:
+            Tuple of (model name that answered, call result)
+            
+        Raises:
+            GenerationError: If every model failed or is circuit-broken
+        """
         last_error = None
         
-        for model_name in model_names:
+        for model_name in candidates or self._candidate_models():
+            if not get_circuit_breaker(self.api_key, model_name).allow():
+                continue
+            
             try:
-                self.model = genai.GenerativeModel(model_name)
-                # Quick test to ensure it works
-                test_response = self.model.generate_content("test")
-                print(f"✅ Successfully initialized with model: {model_name}")
-                break
+                return model_name, self._try_model(model_name, call_model, resolve, record_latency)
             except Exception as e:
                 last_error = e
                 continue
         
-        if not self.model:
-            raise ValueError(f"Could not initialize any Gemini model. Last error: {last_error}")
+        if last_error is None:
+            raise GenerationError("All Gemini models are temporarily unavailable. Please try again shortly.")
+        raise GenerationError(f"Could not generate with any Gemini model. Last error: {last_error}")
     
-    def generate_explanation(self, topic: str, learning_level: str, context: str = "") -> str:
+    def _hedge_delay(self, model_name: str) -> float:
         """
-        Generate a personalized explanation for a topic
+        Seconds to wait for a model before sending a hedged duplicate
+        
+        Uses the model's Config.HEDGE_PERCENTILE latency once enough samples
+        exist, never less than Config.HEDGE_MIN_DELAY_SECONDS.
+        """
+        if self.latency_tracker.count(model_name) < Config.HEDGE_MIN_SAMPLES:
+            return Config.HEDGE_DEFAULT_DELAY_SECONDS
+        observed = self.latency_tracker.percentile(model_name, Config.HEDGE_PERCENTILE)
+        return max(Config.HEDGE_MIN_DELAY_SECONDS, observed)
+    
+    def _call_hedged(
+        self,
+        call_model: Callable[[str], object],
+        candidates: List[str] = None,
+        resolve: bool = True
+    ) -> Tuple[str, object]:
+        """
+        Run a model call with a hedged duplicate for slow responses
+        
+        The normal failover call starts first, over every candidate except
+        the second one, which is held back as the hedge model so the two
+        calls never run against the same model. If the primary hasn't
+        answered within the hedge delay, the same call is sent to the hedge
+        model and whichever succeeds first wins. The loser is cancelled if
+        it hasn't started; a call already in flight can't be aborted, so its
+        result is simply discarded. When no hedge was sent and the primary
+        failed, the hedge model is tried last.
+        
+        Args:
+            call_model: Function making the call for a given model name
+            candidates: Models in try order (defaults to _candidate_models())
+            resolve: Remember the answering model as the working default
+                (a winning hedge never becomes the default: it only answered
+                because the primary was slow)
+            
+        Returns:
+            Tuple of (model name that answered, call result)
+            
+        Raises:
+            GenerationError: If both calls failed
+        """
+        candidates = candidates or self._candidate_models()
+        hedge_model = candidates[1] if len(candidates) > 1 else None
+        executor = _hedge_executor()
+        primary = executor.submit(
+            self._call_with_failover, call_model, candidates[:1] + candidates[2:], resolve
+        )
+        
+        done, _ = wait([primary], timeout=self._hedge_delay(candidates[0]))
+        if done or hedge_model is None or not get_circuit_breaker(self.api_key, hedge_model).allow():
+            self.hedge_stats.record(fired=False)
+            try:
+                return primary.result()
+            except GenerationError:
+                if hedge_model is None or not get_circuit_breaker(self.api_key, hedge_model).allow():
+                    raise
+            try:
+                return hedge_model, self._try_model(hedge_model, call_model, resolve)
+            except Exception as e:
+                raise GenerationError(f"Could not generate with any Gemini model. Last error: {e}")
+        
+        hedge = executor.submit(
+            lambda: (hedge_model, self._try_model(hedge_model, call_model, resolve=False))
+        )
+        roles = {primary: "primary", hedge: "hedge"}
+        pending = set(roles)
+        last_error = None
+        
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                try:
+                    result = future.result()
+                except Exception as e:
+                    last_error = e
+                    continue
+                for other in pending:
+                    other.cancel()
+                self.hedge_stats.record(fired=True, winner=roles[future])
+                return result
+        
+        self.hedge_stats.record(fired=True, winner=None)
+        if isinstance(last_error, GenerationError):
+            raise last_error
+        raise GenerationError(f"Could not generate with any Gemini model. Last error: {last_error}")
+    
+    @contextmanager
+    def track_usage(self, usage: Dict = None):
+        """
+        Record model calls made by the current thread into a usage dict
+        
+        Args:
+            usage: Dictionary to accumulate into (a new one is created if None).
+                The same dict may be shared by several threads.
+                
+        Yields:
+            Usage dictionary with 'calls', 'cache_hits', 'prompt_chars',
+            'response_chars', 'prompt_tokens' (estimated),
+            'context_tokens_saved', 'json_parse_failures',
+            'truncated_responses' (responses cut off by max_output_tokens)
+            and 'context_tokens_reused' (conversation context referred to
+            instead of re-sent)
+        """
+        if usage is None:
+            usage = {}
+        for field in (
+            'calls', 'cache_hits', 'prompt_chars', 'response_chars',
+            'prompt_tokens', 'context_tokens_saved', 'json_parse_failures',
+            'truncated_responses', 'context_tokens_reused'
+        ):
+            usage.setdefault(field, 0)
+        
+        previous = getattr(self._local, 'usage', None)
+        self._local.usage = usage
+        try:
+            yield usage
+        finally:
+            self._local.usage = previous
+    
+    def _record_usage(
+        self,
+        prompt: str,
+        response_text: str,
+        truncated: bool = False,
+        context_chars: int = 0,
+        context_tokens: int = 0
+    ):
+        """Add one successful call (and any conversation history it re-sent) to the current thread's usage dict"""
+        usage = getattr(self._local, 'usage', None)
+        if usage is None:
+            return
+        with self._lock:
+            usage['calls'] += 1
+            usage['prompt_chars'] += len(prompt) + context_chars
+            usage['response_chars'] += len(response_text)
+            usage['prompt_tokens'] += estimate_tokens(prompt) + context_tokens
+            if truncated:
+                usage['truncated_responses'] += 1
+    
+    def _record_cache_hit(self):
+        """Count a cache hit in the current thread's usage dict"""
+        usage = getattr(self._local, 'usage', None)
+        if usage is None:
+            return
+        with self._lock:
+            usage['cache_hits'] += 1
+    
+    def _record_context_saving(self, saved_tokens: int):
+        """Add tokens cut by context packing to the current thread's usage dict"""
+        usage = getattr(self._local, 'usage', None)
+        if usage is None:
+            return
+        with self._lock:
+            usage['context_tokens_saved'] += saved_tokens
+    
+    def _record_context_reuse(self, reused_tokens: int):
+        """Add conversation context referred to instead of re-sent to the current thread's usage dict"""
+        usage = getattr(self._local, 'usage', None)
+        if usage is None:
+            return
+        with self._lock:
+            usage['context_tokens_reused'] += reused_tokens
+    
+    def _record_parse_failure(self):
+        """Count a JSON response that failed to parse in the current thread's usage dict"""
+        usage = getattr(self._local, 'usage', None)
+        if usage is None:
+            return
+        with self._lock:
+            usage['json_parse_failures'] += 1
+    
+    def _cache_lookup(
+        self,
+        method: str,
+        candidates: List[str],
+        prompt: str,
+        generation_config: Dict = None
+    ) -> Optional[str]:
+        """Return a cached response for the prompt and settings from any candidate model, if any"""
+        if self.response_cache is None:
+            return None
+        # Routing may pick a different model than last time; any model's
+        # answer to the same prompt is good enough. One lookup (one query,
+        # one hit or miss) covers all candidates
+        cached = self.response_cache.get_any(method, candidates, prompt, generation_config)
+        if cached is not None:
+            self._record_cache_hit()
+        return cached
+    
+    def _record_route(
+        self,
+        route: str,
+        model_name: str,
+        started: float,
+        prompt: str,
+        text: str,
+        context_tokens: int = 0
+    ):
+        """Add a successful request to the per-route metrics, with its estimated cost"""
+        prompt_tokens = estimate_tokens(prompt) + context_tokens
+        response_tokens = estimate_tokens(text)
+        pricing = Config.MODEL_PRICING.get(model_name, {})
+        cost = (
+            prompt_tokens * pricing.get("input", 0.0) + response_tokens * pricing.get("output", 0.0)
+        ) / 1_000_000
+        self.route_metrics.record(
+            route, model_name, time.perf_counter() - started, True,
+            prompt_tokens, response_tokens, cost
+        )
+    
+    def get_route_stats(self) -> Dict[str, Dict]:
+        """
+        Get latency, error and cost statistics per routing rule
+        
+        Returns:
+            Route name -> statistics (see RouteMetrics.get_stats)
+        """
+        return self.route_metrics.get_stats()
+    
+    def get_hedge_stats(self) -> Dict:
+        """
+        Get how often hedged duplicates were sent and won
+        
+        Returns:
+            Hedging counters and rates (see HedgeStats.get_stats)
+        """
+        return self.hedge_stats.get_stats()
+    
+    def _cache_store(
+        self,
+        method: str,
+        model_name: str,
+        prompt: str,
+        text: str,
+        cache_if: Callable[[str], bool] = None,
+        generation_config: Dict = None,
+        truncated: bool = False
+    ):
+        """Store a response unless it was truncated or the cache_if check rejects it"""
+        if self.response_cache is None or truncated:
+            return
+        if cache_if is not None and not cache_if(text):
+            return
+        self.response_cache.put(method, model_name, prompt, text, generation_config)
+    
+    def _generate(
+        self,
+        prompt: str,
+        method: str = "default",
+        cache_if: Callable[[str], bool] = None,
+        learning_level: str = None,
+        generation_config: Dict = None,
+        routing: Tuple[str, List[str]] = None
+    ) -> str:
+        """
+        Send a prompt to the routed or resolved model, falling back down the model list
+        
+        A response cut off by max_output_tokens is returned as is, counted in
+        the usage dict's 'truncated_responses' and not cached.
+        
+        Args:
+            prompt: Prompt text
+            method: Generation method name, used for routing and response caching
+            cache_if: Optional check a response must pass to be cached
+            learning_level: Learning level, used for routing
+            generation_config: Output token cap, temperature and stop sequences
+            routing: (route, candidates) from _route, when the prompt was
+                built for the route's lead model (see _pack)
+            
+        Returns:
+            Response text
+            
+        Raises:
+            GenerationError: If no model could produce a response
+        """
+        route, candidates = routing or self._route(method, learning_level)
+        cached = self._cache_lookup(method, candidates, prompt, generation_config)
+        if cached is not None:
+            return cached
+        
+        def call_model(model_name: str) -> Dict:
+            return self.backend.generate(model_name, prompt, generation_config)
+        
+        resolve = route == DEFAULT_ROUTE
+        started = time.perf_counter()
+        try:
+            if self.hedging:
+                model_name, response = self._call_hedged(call_model, candidates, resolve)
+            else:
+                model_name, response = self._call_with_failover(call_model, candidates, resolve)
+        except GenerationError:
+            self.route_metrics.record(route, None, time.perf_counter() - started, False)
+            raise
+        text = response['text']
+        truncated = response.get('finish_reason') == FINISH_MAX_TOKENS
+        self._record_route(route, model_name, started, prompt, text)
+        self._record_usage(prompt, text, truncated)
+        self._cache_store(method, model_name, prompt, text, cache_if, generation_config, truncated)
+        return text
+    
+    def _generate_stream(
+        self,
+        prompt: str,
+        method: str = "default",
+        cache_if: Callable[[str], bool] = None,
+        learning_level: str = None,
+        generation_config: Dict = None,
+        routing: Tuple[str, List[str]] = None
+    ) -> Iterator[str]:
+        """
+        Stream a prompt's response text chunk by chunk
+        
+        Falling back to the next model is only possible until the first chunk
+        has been yielded; later errors are raised to the caller. A cached
+        response is yielded as a single chunk. Streams are never hedged.
+        
+        Args:
+            prompt: Prompt text
+            method: Generation method name, used for routing and response caching
+            cache_if: Optional check the full response must pass to be cached
+            learning_level: Learning level, used for routing
+            generation_config: Output token cap, temperature and stop sequences
+            routing: (route, candidates) from _route (see _generate)
+            
+        Yields:
+            Response text chunks
+            
+        Raises:
+            GenerationError: If no model could produce a response
+        """
+        route, candidates = routing or self._route(method, learning_level)
+        cached = self._cache_lookup(method, candidates, prompt, generation_config)
+        if cached is not None:
+            yield cached
+            return
+        
+        def open_stream(model_name: str):
+            # Failover and retries are only possible until the first chunk
+            stream = iter(self.backend.generate_stream(model_name, prompt, generation_config))
+            for chunk in stream:
+                if chunk['text'] or chunk.get('finish_reason'):
+                    return chunk, stream
+            return {'text': ""}, stream
+        
+        started = time.perf_counter()
+        try:
+            model_name, (first_chunk, stream) = self._call_with_failover(
+                open_stream, candidates, resolve=route == DEFAULT_ROUTE, record_latency=False
+            )
+        except GenerationError:
+            self.route_metrics.record(route, None, time.perf_counter() - started, False)
+            raise
+        chunks = [first_chunk['text']]
+        finish_reason = first_chunk.get('finish_reason')
+        if first_chunk['text']:
+            yield first_chunk['text']
+        
+        try:
+            for chunk in stream:
+                finish_reason = chunk.get('finish_reason') or finish_reason
+                if chunk['text']:
+                    chunks.append(chunk['text'])
+                    yield chunk['text']
+        except Exception as e:
+            get_circuit_breaker(self.api_key, model_name).record_failure()
+            self.outcome_tracker.record(model_name, False)
+            self.route_metrics.record(route, None, time.perf_counter() - started, False)
+            raise GenerationError(f"Generation was interrupted: {e}") from e
+        
+        text = "".join(chunks)
+        truncated = finish_reason == FINISH_MAX_TOKENS
+        self._record_route(route, model_name, started, prompt, text)
+        self._record_usage(prompt, text, truncated)
+        self._cache_store(method, model_name, prompt, text, cache_if, generation_config, truncated)
+    
+    def start_conversation(
+        self,
+        topic: str,
+        learning_level: str,
+        context: str = "",
+        profile: str = None
+    ) -> Dict:
+        """
+        Generate the explanation as the first turn of a conversation
+        
+        The source material and the explanation stay in the conversation, so
+        generate_summary and generate_quiz given the conversation only send
+        their own instructions. On a backend that keeps conversation context
+        the explanation is then never re-sent; the tokens referred to instead
+        are counted in the usage dict's 'context_tokens_reused'. Close the
+        conversation with end_conversation.
         
         Args:
             topic: The topic to explain
             learning_level: User's learning level (Beginner/Intermediate/Advanced)
             context: Additional context from uploaded files
+            profile: Generation profile (defaults to Config.DEFAULT_GENERATION_PROFILE)
             
         Returns:
-            Detailed explanation as string
+            Conversation dictionary with 'id', 'model', 'explanation',
+            'context_tokens' and 'context_chars' (size of the shared turns)
+            
+        Raises:
+            GenerationError: If no model could generate the explanation
         """
-        # Build prompt based on learning level
-        level_prompts = {
-            "Beginner": "Explain this topic in very simple terms, as if teaching a complete beginner. Use everyday examples and avoid jargon.",
-            "Intermediate": "Explain this topic with moderate detail, assuming some foundational knowledge. Include relevant examples and concepts.",
-            "Advanced": "Provide an in-depth, technical explanation. Include advanced concepts, nuances, and technical terminology."
+        route, candidates = self._route("explanation", learning_level)
+        prompt = self._explanation_prompt(topic, learning_level, context, candidates[0])
+        generation_config = get_generation_config(profile, "explanation", learning_level)
+        
+        text = self._cache_lookup("explanation", candidates, prompt, generation_config)
+        if text is not None:
+            # Seed the conversation with the cached turn instead of a model call
+            model_name = next(
+                (m for m in candidates if get_circuit_breaker(self.api_key, m).allow()), candidates[0]
+            )
+            conversation_id = self.backend.start_conversation(model_name, [
+                {'role': 'user', 'text': prompt},
+                {'role': 'model', 'text': text},
+            ])
+        else:
+            def call_model(model_name: str) -> Tuple[str, Dict]:
+                conversation_id = self.backend.start_conversation(model_name)
+                try:
+                    return conversation_id, self.backend.send_message(conversation_id, prompt, generation_config)
+                except Exception:
+                    self.backend.end_conversation(conversation_id)
+                    raise
+            
+            started = time.perf_counter()
+            try:
+                model_name, (conversation_id, response) = self._call_with_failover(
+                    call_model, candidates, resolve=route == DEFAULT_ROUTE
+                )
+            except GenerationError:
+                self.route_metrics.record(route, None, time.perf_counter() - started, False)
+                raise
+            text = response['text']
+            truncated = response.get('finish_reason') == FINISH_MAX_TOKENS
+            self._record_route(route, model_name, started, prompt, text)
+            self._record_usage(prompt, text, truncated)
+            self._cache_store("explanation", model_name, prompt, text, None, generation_config, truncated)
+        
+        return {
+            'id': conversation_id,
+            'model': model_name,
+            'explanation': text,
+            'context_tokens': estimate_tokens(prompt) + estimate_tokens(text),
+            'context_chars': len(prompt) + len(text),
         }
+    
+    def end_conversation(self, conversation: Dict):
+        """Close a conversation opened by start_conversation"""
+        self.backend.end_conversation(conversation['id'])
+    
+    def _send_in_conversation(
+        self,
+        conversation: Dict,
+        prompt: str,
+        method: str,
+        learning_level: str,
+        generation_config: Dict = None
+    ) -> str:
+        """
+        Send one follow-up message that branches off the conversation's shared turns
         
-        prompt = f"""
-{level_prompts.get(learning_level, level_prompts["Beginner"])}
+        The message stays on the conversation's model (its context lives
+        there), is not added to the history, so concurrent follow-ups don't
+        see each other, and is not cached, since the answer depends on the
+        history as well as the prompt.
+        
+        Raises:
+            GenerationError: If the model is unavailable or the call failed
+        """
+        model_name = conversation['model']
+        route = self._route(method, learning_level)[0]
+        if not get_circuit_breaker(self.api_key, model_name).allow():
+            raise GenerationError(f"The conversation's model {model_name} is temporarily unavailable")
+        
+        def call_model(name: str) -> Dict:
+            return self.backend.send_message(conversation['id'], prompt, generation_config, remember=False)
+        
+        started = time.perf_counter()
+        try:
+            response = self._try_model(model_name, call_model, resolve=False)
+        except Exception as e:
+            self.route_metrics.record(route, None, time.perf_counter() - started, False)
+            raise GenerationError(f"Conversation message failed: {e}") from e
+        
+        text = response['text']
+        truncated = response.get('finish_reason') == FINISH_MAX_TOKENS
+        if self.backend.keeps_conversation_context:
+            resent_chars, resent_tokens = 0, 0
+            self._record_context_reuse(conversation['context_tokens'])
+        else:
+            resent_chars, resent_tokens = conversation['context_chars'], conversation['context_tokens']
+        self._record_route(route, model_name, started, prompt, text, resent_tokens)
+        self._record_usage(prompt, text, truncated, resent_chars, resent_tokens)
+        return text
+    
+    @staticmethod
+    def _parse_json_response(response_text: str):
+        """
+        Parse a JSON response that may be wrapped in markdown code blocks
+        
+        Raises:
+            json.JSONDecodeError: If the text is not valid JSON
+        """
+        # Extract JSON from response (sometimes wrapped in markdown code blocks)
+        json_match = re.search(r'```json\s*(.*?)\s*```', response_text, re.DOTALL)
+        if json_match:
+            response_text = json_match.group(1)
+        
+        # Remove any markdown code block markers
+        response_text = response_text.replace('```json', '').replace('```', '').strip()
+        
+        return json.loads(response_text)
+    
+    @staticmethod
+    def _is_valid_quiz(quiz_data) -> bool:
+        """Check that quiz data has at least one well-formed question"""
+        if not isinstance(quiz_data, dict):
+            return False
+        questions = quiz_data.get("questions")
+        if not isinstance(questions, list) or not questions:
+            return False
+        
+        for q in questions:
+            if not isinstance(q, dict):
+                return False
+            if not isinstance(q.get("question"), str) or not q["question"].strip():
+                return False
+            options = q.get("options")
+            if not isinstance(options, list) or len(options) < 2:
+                return False
+            if not all(isinstance(option, str) for option in options):
+                return False
+            if q.get("correct_answer") not in [chr(ord("A") + i) for i in range(len(options))]:
+                return False
+            if not isinstance(q.get("explanation"), str):
+                return False
+        return True
+    
+    def _is_valid_quiz_response(self, response_text: str) -> bool:
+        """Check that a raw quiz response parses into a well-formed quiz"""
+        try:
+            return self._is_valid_quiz(self._parse_json_response(response_text))
+        except json.JSONDecodeError:
+            return False
+    
+    def _is_json_object_response(self, response_text: str) -> bool:
+        """Check that a raw response parses into a JSON object"""
+        try:
+            return isinstance(self._parse_json_response(response_text), dict)
+        except json.JSONDecodeError:
+            return False
+    
+    def _pack(self, text: str, method: str, learning_level: str, topic: str, model_name: str) -> str:
+        """
+        Fit source text into the method's token budget
+        
+        The budget depends on the method, the learning level and the model
+        the call will go to: the lead model of the route the request was
+        given, so the prompt (and its cache key) matches the call that
+        sends it. Long sources (uploads) first go through the
+        BM25 retrieval stage; then the passages most relevant to the topic
+        are packed. The tokens cut are recorded in the usage dict.
+        """
+        if not text:
+            return text
+        budget = get_context_budget(method, learning_level, model_name)
+        retrieved_saving = 0
+        if Config.RETRIEVAL_ENABLED and len(text) > Config.RETRIEVAL_MIN_CHARS:
+            retrieved = ContentProcessor.select_relevant_chunks(text, topic, budget)
+            retrieved_saving = retrieved['original_tokens'] - retrieved['tokens']
+            text = retrieved['text']
+        packed = pack_context(text, budget, query=topic)
+        self._record_context_saving(retrieved_saving + packed['saved_tokens'])
+        return packed['text']
+    
+    def _explanation_prompt(self, topic: str, learning_level: str, context: str = "", model_name: str = None) -> str:
+        """Build the explanation prompt for a topic and learning level, packed for model_name"""
+        context = self._pack(context, "explanation", learning_level, topic, model_name)
+        return f"""
+{self.LEVEL_PROMPTS.get(learning_level, self.LEVEL_PROMPTS["Beginner"])}
 
 Topic: {topic}
 
-{f"Additional Context: {context[:2000]}" if context else ""}
+{f"Additional Context: {context}" if context else ""}
 
 Provide a clear, well-structured explanation that is appropriate for a {learning_level} level learner.
 Use paragraphs, examples, and make it engaging and easy to understand.
 """
+    
+    def generate_explanation(
+        self,
+        topic: str,
+        learning_level: str,
+        context: str = "",
+        profile: str = None
+    ) -> str:
+        """
+        Generate a personalized explanation for a topic
         
-        try:
-            response = self.model.generate_content(prompt)
-            return response.text
-        except Exception as e:
-            return f"Error generating explanation: {str(e)}"
+        Args:
+            topic: The topic to explain
+            learning_level: User's learning level (Beginner/Intermediate/Advanced)
+            context: Additional context from uploaded files
+            profile: Generation profile (defaults to Config.DEFAULT_GENERATION_PROFILE)
+            
+        Returns:
+            Detailed explanation as string
+            
+        Raises:
+            GenerationError: If no model could generate the explanation
+        """
+        routing = self._route("explanation", learning_level)
+        prompt = self._explanation_prompt(topic, learning_level, context, routing[1][0])
+        
+        return self._generate(
+            prompt, "explanation", learning_level=learning_level,
+            generation_config=get_generation_config(profile, "explanation", learning_level),
+            routing=routing
+        )
+    
+    def stream_explanation(
+        self,
+        topic: str,
+        learning_level: str,
+        context: str = "",
+        profile: str = None
+    ) -> Iterator[str]:
+        """
+        Stream a personalized explanation for a topic as it is generated
+        
+        Args:
+            topic: The topic to explain
+            learning_level: User's learning level (Beginner/Intermediate/Advanced)
+            context: Additional context from uploaded files
+            profile: Generation profile (defaults to Config.DEFAULT_GENERATION_PROFILE)
+            
+        Yields:
+            Explanation text chunks
+        """
+        routing = self._route("explanation", learning_level)
+        prompt = self._explanation_prompt(topic, learning_level, context, routing[1][0])
+        yield from self._generate_stream(
+            prompt, "explanation", learning_level=learning_level,
+            generation_config=get_generation_config(profile, "explanation", learning_level),
+            routing=routing
+        )
     
-    def generate_summary(self, topic: str, explanation: str, learning_level: str) -> str:
+    def generate_summary(
+        self,
+        topic: str,
+        explanation: str,
+        learning_level: str,
+        profile: str = None,
+        conversation: Dict = None
+    ) -> str:
         """
         Generate a concise summary of the topic
         
@@ -92,16 +979,56 @@ Use paragraphs, examples, and make it engaging and easy to understand.
             topic: The topic
             explanation: The full explanation
             learning_level: User's learning level
+            profile: Generation profile (defaults to Config.DEFAULT_GENERATION_PROFILE)
+            conversation: Conversation from start_conversation; the summary
+                is asked for there without re-sending the explanation, with
+                the regular call as fallback
             
         Returns:
             Concise summary as string
+            
+        Raises:
+            GenerationError: If no model could generate the summary
         """
-        prompt = f"""
-Based on this explanation of {topic}, create a concise summary that captures the key points.
+        generation_config = get_generation_config(profile, "summary", learning_level)
+        if conversation is not None:
+            try:
+                return self._send_in_conversation(
+                    conversation, self._summary_prompt(topic, learning_level), "summary",
+                    learning_level, generation_config
+                )
+            except GenerationError:
+                pass
+        
+        routing = self._route("summary", learning_level)
+        prompt = self._summary_prompt(topic, learning_level, explanation, routing[1][0])
+        return self._generate(
+            prompt, "summary", learning_level=learning_level, generation_config=generation_config,
+            routing=routing
+        )
+    
+    def _summary_prompt(
+        self,
+        topic: str,
+        learning_level: str,
+        explanation: str = None,
+        model_name: str = None
+    ) -> str:
+        """
+        Build the summary prompt, packing the explanation for model_name;
+        without an explanation it refers to the one earlier in the conversation
+        """
+        if explanation is None:
+            source = f"Based on your explanation of {topic}, create a concise summary that captures the key points.\n"
+        else:
+            explanation = self._pack(explanation, "summary", learning_level, topic, model_name)
+            source = f"""Based on this explanation of {topic}, create a concise summary that captures the key points.
 
 Explanation:
-{explanation[:3000]}
-
+{explanation}
+"""
+        return f"""
+{source}
 Create a summary appropriate for a {learning_level} level learner. 
 The summary should:
 - Be 3-5 bullet points
@@ -110,114 +1037,428 @@ The summary should:
 
 Format as bullet points using markdown.
 """
+    
+    def _quiz_prompt(
+        self,
+        topic: str,
+        explanation: str,
+        learning_level: str,
+        num_questions: int,
+        existing: List[Dict] = None,
+        model_name: str = None
+    ) -> str:
+        """
+        Build the quiz prompt; existing questions are listed so they aren't repeated
+        
+        The explanation is packed for model_name. Without an explanation
+        (None) the prompt refers to the one earlier in the conversation.
+        """
+        if explanation is None:
+            source = f"Based on your explanation of {topic}, create a {num_questions}-question multiple choice quiz.\n"
+        else:
+            explanation = self._pack(explanation, "quiz", learning_level, topic, model_name)
+            source = f"""Based on this explanation of {topic}, create a {num_questions}-question multiple choice quiz.
+
+Explanation:
+{explanation}
+"""
+        avoid = ""
+        if existing:
+            avoid = "\nDo not repeat any of these questions, which the learner already has:\n" + "\n".join(
+                f"- {q['question']}" for q in existing
+            ) + "\n"
+        return f"""
+{source}
+Create questions appropriate for a {learning_level} level learner.
+{avoid}
+Return the quiz in this EXACT JSON format:
+{{
+  "questions": [
+    {{
+      "question": "Question text here?",
+      "options": ["A) Option 1", "B) Option 2", "C) Option 3", "D) Option 4"],
+      "correct_answer": "A",
+      "explanation": "Brief explanation of why this is correct"
+    }}
+  ]
+}}
+
+Make sure:
+- Questions test understanding, not just memorization
+- All options are plausible
+- Explanations are helpful for learning
+- Return valid JSON only, no additional text
+"""
+    
+    def _request_quiz(
+        self,
+        topic: str,
+        explanation: str,
+        learning_level: str,
+        num_questions: int,
+        existing: List[Dict] = None,
+        profile: str = None,
+        conversation: Dict = None
+    ) -> str:
+        """
+        Send one quiz request, within the conversation when one is given
+        
+        A failed conversation message falls back to the regular call, which
+        re-sends the explanation.
+        
+        Returns:
+            Raw response text
+            
+        Raises:
+            GenerationError: If no model could generate the quiz
+        """
+        generation_config = get_generation_config(profile, "quiz", learning_level, num_questions)
+        if conversation is not None:
+            try:
+                return self._send_in_conversation(
+                    conversation, self._quiz_prompt(topic, None, learning_level, num_questions, existing),
+                    "quiz", learning_level, generation_config
+                )
+            except GenerationError:
+                pass
+        
+        routing = self._route("quiz", learning_level)
+        prompt = self._quiz_prompt(topic, explanation, learning_level, num_questions, existing, routing[1][0])
+        return self._generate(
+            prompt, "quiz", cache_if=self._is_valid_quiz_response, learning_level=learning_level,
+            generation_config=generation_config, routing=routing
+        )
+    
+    def _missing_questions(
+        self,
+        topic: str,
+        explanation: str,
+        learning_level: str,
+        questions: List[Dict],
+        num_questions: int,
+        profile: str = None,
+        conversation: Dict = None
+    ) -> List[Dict]:
+        """
+        Ask for only the questions a partial quiz is missing (one follow-up call)
+        
+        Returns:
+            The new questions, at most num_questions - len(questions)
+            
+        Raises:
+            GenerationError: If the follow-up call failed
+        """
+        missing = num_questions - len(questions)
+        if missing <= 0:
+            return []
+        response_text = self._request_quiz(
+            topic, explanation, learning_level, missing, questions, profile, conversation
+        )
+        if not self._is_valid_quiz_response(response_text):
+            self._record_parse_failure()
         
+        asked = {q['question'].lower() for q in questions}
+        new_questions = [
+            q for q in parse_quiz_questions(response_text) if q['question'].lower() not in asked
+        ]
+        return new_questions[:missing]
+    
+    def _complete_quiz(
+        self,
+        topic: str,
+        explanation: str,
+        learning_level: str,
+        questions: List[Dict],
+        num_questions: int,
+        profile: str = None,
+        conversation: Dict = None
+    ) -> Dict:
+        """
+        Top up recovered questions to num_questions and build the quiz dict
+        
+        A failed follow-up still returns the questions already recovered.
+        
+        Raises:
+            GenerationError: If no question could be obtained at all
+        """
+        questions = questions[:num_questions]
         try:
-            response = self.model.generate_content(prompt)
-            return response.text
-        except Exception as e:
-            return f"Error generating summary: {str(e)}"
+            questions = questions + self._missing_questions(
+                topic, explanation, learning_level, questions, num_questions, profile, conversation
+            )
+        except GenerationError:
+            if not questions:
+                raise
+        if not questions:
+            raise GenerationError("The model did not return any readable quiz questions")
+        return {"questions": questions}
     
     def generate_quiz(
         self, 
         topic: str, 
         explanation: str, 
         learning_level: str,
-        num_questions: int = 5
+        num_questions: int = 5,
+        profile: str = None,
+        conversation: Dict = None
     ) -> Dict:
         """
         Generate a practice quiz with multiple choice questions
         
+        The response is parsed tolerantly: every well-formed question is kept
+        even if the JSON around it is truncated or malformed, and only the
+        missing questions are requested in a follow-up call.
+        
         Args:
             topic: The topic
             explanation: The full explanation
             learning_level: User's learning level
             num_questions: Number of questions to generate
+            profile: Generation profile (defaults to Config.DEFAULT_GENERATION_PROFILE)
+            conversation: Conversation from start_conversation; the quiz is
+                asked for there without re-sending the explanation, with the
+                regular call as fallback
             
         Returns:
             Dictionary containing quiz questions and answers
+            
+        Raises:
+            GenerationError: If no model could generate the quiz
+        """
+        quiz_text = self._request_quiz(
+            topic, explanation, learning_level, num_questions, profile=profile, conversation=conversation
+        )
+        if not self._is_valid_quiz_response(quiz_text):
+            self._record_parse_failure()
+        
+        questions = parse_quiz_questions(quiz_text)
+        return self._complete_quiz(
+            topic, explanation, learning_level, questions, num_questions, profile, conversation
+        )
+    
+    def generate_question_bank(
+        self,
+        topic: str,
+        explanation: str,
+        learning_level: str,
+        size: int = None,
+        profile: str = None,
+        conversation: Dict = None
+    ) -> List[Dict]:
+        """
+        Generate a pool of quiz questions to sample quizzes and retakes from
+        
+        Args:
+            topic: The topic
+            explanation: The full explanation
+            learning_level: User's learning level
+            size: Number of questions (defaults to Config.QUESTION_BANK_SIZE)
+            profile: Generation profile (defaults to Config.DEFAULT_GENERATION_PROFILE)
+            conversation: Conversation from start_conversation (see generate_quiz)
+            
+        Returns:
+            List of question dicts
+            
+        Raises:
+            GenerationError: If no model could generate the questions
         """
+        size = size or Config.QUESTION_BANK_SIZE
+        return self.generate_quiz(topic, explanation, learning_level, size, profile, conversation)['questions']
+    
+    def stream_quiz(
+        self,
+        topic: str,
+        explanation: str,
+        learning_level: str,
+        num_questions: int = 5,
+        profile: str = None
+    ) -> Iterator[Dict]:
+        """
+        Stream quiz questions as soon as each one is complete
+        
+        Args:
+            topic: The topic
+            explanation: The full explanation
+            learning_level: User's learning level
+            num_questions: Number of questions to generate
+            profile: Generation profile (defaults to Config.DEFAULT_GENERATION_PROFILE)
+            
+        Yields:
+            Question dicts ('question', 'options', 'correct_answer',
+            'explanation'), including any requested in a follow-up call
+            
+        Raises:
+            GenerationError: If no model could generate the quiz
+        """
+        routing = self._route("quiz", learning_level)
+        prompt = self._quiz_prompt(topic, explanation, learning_level, num_questions, model_name=routing[1][0])
+        parser = QuizStreamParser()
+        chunks = []
+        yielded = 0
+        stream = self._generate_stream(
+            prompt, "quiz", cache_if=self._is_valid_quiz_response, learning_level=learning_level,
+            generation_config=get_generation_config(profile, "quiz", learning_level, num_questions),
+            routing=routing
+        )
+        for chunk in stream:
+            chunks.append(chunk)
+            for question in parser.feed(chunk):
+                if yielded < num_questions:
+                    yielded += 1
+                    yield question
+        if not self._is_valid_quiz_response("".join(chunks)):
+            self._record_parse_failure()
+        
+        questions = parser.questions[:num_questions]
+        try:
+            yield from self._missing_questions(
+                topic, explanation, learning_level, questions, num_questions, profile
+            )
+        except GenerationError:
+            if not questions:
+                raise
+    
+    def generate_study_pack(
+        self,
+        topic: str,
+        learning_level: str,
+        context: str = "",
+        num_questions: int = 5,
+        profile: str = None
+    ) -> Dict:
+        """
+        Generate explanation, summary and quiz in a single model call
+        
+        The response is validated section by section. Sections of a truncated
+        or malformed response are salvaged where complete; only the sections
+        still missing are regenerated with the separate generate_* methods,
+        and a partial quiz is topped up with just the missing questions.
+        
+        Args:
+            topic: The topic to explain
+            learning_level: User's learning level (Beginner/Intermediate/Advanced)
+            context: Additional context from uploaded files
+            num_questions: Number of quiz questions to generate
+            profile: Generation profile (defaults to Config.DEFAULT_GENERATION_PROFILE)
+            
+        Returns:
+            Dictionary with 'explanation', 'summary', 'quiz_data',
+            'fallback_sections' (names of sections that were regenerated or
+            topped up) and
+            'errors' (section -> message for fallbacks that failed; the
+            section is then None)
+            
+        Raises:
+            GenerationError: If the study pack call or the explanation
+                fallback failed
+        """
+        routing = self._route("study_pack", learning_level)
+        packed_context = self._pack(context, "study_pack", learning_level, topic, routing[1][0])
         prompt = f"""
-Based on this explanation of {topic}, create a {num_questions}-question multiple choice quiz.
+{self.LEVEL_PROMPTS.get(learning_level, self.LEVEL_PROMPTS["Beginner"])}
 
-Explanation:
-{explanation[:3000]}
+Topic: {topic}
 
-Create questions appropriate for a {learning_level} level learner.
+{f"Additional Context: {packed_context}" if packed_context else ""}
 
-Return the quiz in this EXACT JSON format:
+Create a complete study pack for a {learning_level} level learner with:
+1. A clear, well-structured explanation using paragraphs and examples
+2. A summary of 3-5 markdown bullet points highlighting the most important concepts
+3. A {num_questions}-question multiple choice quiz that tests understanding, not just memorization
+
+Return the study pack in this EXACT JSON format:
 {{
-  "questions": [
-    {{
-      "question": "Question text here?",
-      "options": ["A) Option 1", "B) Option 2", "C) Option 3", "D) Option 4"],
-      "correct_answer": "A",
-      "explanation": "Brief explanation of why this is correct"
-    }}
-  ]
+  "explanation": "Markdown explanation here",
+  "summary": "- Key point 1\\n- Key point 2\\n- Key point 3",
+  "quiz": {{
+    "questions": [
+      {{
+        "question": "Question text here?",
+        "options": ["A) Option 1", "B) Option 2", "C) Option 3", "D) Option 4"],
+        "correct_answer": "A",
+        "explanation": "Brief explanation of why this is correct"
+      }}
+    ]
+  }}
 }}
 
 Make sure:
-- Questions test understanding, not just memorization
 - All options are plausible
-- Explanations are helpful for learning
+- Strings are properly escaped JSON strings
 - Return valid JSON only, no additional text
 """
         
+        pack_text = self._generate(
+            prompt, "study_pack", cache_if=self._is_json_object_response, learning_level=learning_level,
+            generation_config=get_generation_config(profile, "study_pack", learning_level, num_questions),
+            routing=routing
+        )
+        
         try:
-            response = self.model.generate_content(prompt)
-            quiz_text = response.text
-            
-            # Extract JSON from response (sometimes wrapped in markdown code blocks)
-            json_match = re.search(r'```json\s*(.*?)\s*```', quiz_text, re.DOTALL)
-            if json_match:
-                quiz_text = json_match.group(1)
-            
-            # Remove any markdown code block markers
-            quiz_text = quiz_text.replace('```json', '').replace('```', '').strip()
-            
-            # Parse JSON
-            quiz_data = json.loads(quiz_text)
-            
-            # Validate structure
-            if "questions" not in quiz_data:
-                raise ValueError("Invalid quiz format: missing 'questions' key")
-            
-            return quiz_data
-            
-        except json.JSONDecodeError as e:
-            # Fallback: create a simple quiz structure
-            return {
-                "questions": [
-                    {
-                        "question": f"What is the main concept of {topic}?",
-                        "options": [
-                            "A) See explanation for details",
-                            "B) Review the material above",
-                            "C) Check the summary",
-                            "D) All of the above"
-                        ],
-                        "correct_answer": "D",
-                        "explanation": "Please review the explanation and summary above."
-                    }
-                ],
-                "error": f"Quiz generation encountered an error: {str(e)}"
-            }
-        except Exception as e:
-            return {
-                "questions": [],
-                "error": f"Error generating quiz: {str(e)}"
+            pack = self._parse_json_response(pack_text)
+            if not isinstance(pack, dict):
+                pack = {}
+        except json.JSONDecodeError:
+            self._record_parse_failure()
+            pack = {
+                "explanation": recover_string_field(pack_text, "explanation"),
+                "summary": recover_string_field(pack_text, "summary"),
             }
+        
+        fallback_sections = []
+        errors = {}
+        
+        explanation = pack.get("explanation")
+        if not isinstance(explanation, str) or not explanation.strip():
+            fallback_sections.append("explanation")
+            explanation = self.generate_explanation(topic, learning_level, context, profile)
+        
+        summary = pack.get("summary")
+        if isinstance(summary, list) and all(isinstance(point, str) for point in summary):
+            summary = "\n".join(f"- {point.lstrip('-* ').strip()}" for point in summary)
+        if not isinstance(summary, str) or not summary.strip():
+            fallback_sections.append("summary")
+            try:
+                summary = self.generate_summary(topic, explanation, learning_level, profile)
+            except GenerationError as e:
+                summary = None
+                errors["summary"] = str(e)
+        
+        questions = parse_quiz_questions(pack_text)
+        if len(questions) >= num_questions:
+            quiz_data = {"questions": questions[:num_questions]}
+        else:
+            fallback_sections.append("quiz")
+            try:
+                quiz_data = self._complete_quiz(
+                    topic, explanation, learning_level, questions, num_questions, profile
+                )
+            except GenerationError as e:
+                quiz_data = None
+                errors["quiz"] = str(e)
+        
+        return {
+            "explanation": explanation,
+            "summary": summary,
+            "quiz_data": quiz_data,
+            "fallback_sections": fallback_sections,
+            "errors": errors
+        }
     
-    def improve_from_feedback(self, topic: str, feedback: str) -> str:
+    def improve_from_feedback(self, topic: str, feedback: str, profile: str = None) -> str:
         """
         Generate improved content based on user feedback
         
         Args:
             topic: The topic
             feedback: User feedback
+            profile: Generation profile (defaults to Config.DEFAULT_GENERATION_PROFILE)
             
         Returns:
             Suggestions for improvement
+            
+        Raises:
+            GenerationError: If no model could generate suggestions
         """
         prompt = f"""
 A user studied the topic: {topic}
@@ -227,8 +1468,6 @@ Suggest how the explanation or learning materials could be improved based on thi
 Be specific and constructive.
 """
         
-        try:
-            response = self.model.generate_content(prompt)
-            return response.text
-        except Exception as e:
-            return f"Error processing feedback: {str(e)}"
\ No newline at end of file
+        return self._generate(
+            prompt, "feedback", generation_config=get_generation_config(profile, "feedback", None)
+        )
\ No newline at end of file
@@ -1,108 +1,524 @@
 """
 Content Processor Module
 Handles file uploads and text extraction from PDF, TXT, and DOCX files
+Text is extracted lazily, page by page, so a character or token budget
+stops parsing as soon as enough text has been read. Full extraction of
+large PDFs can run across a process pool. Uploads are spooled to a
+temporary file with the size limit enforced while reading, and extractors
+read from file objects instead of copies of the bytes. Extracted text is
+normalized inline (headers, footers, page numbers, boilerplate, hyphenation
+and whitespace; see backend/text_normalizer.py). Long texts can be narrowed
+down to the chunks most relevant to a topic (see backend/retrieval.py).
 """
+import codecs
+import hashlib
 import io
-from typing import Optional
+import multiprocessing
+import os
+import shutil
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from typing import BinaryIO, Dict, Iterator, List, Optional, Tuple, Union
 import PyPDF2
+from config import Config
+from .context_packer import estimate_tokens, truncate_tokens
+from .docx_reader import iter_docx_text
+from .retrieval import select_chunks
+from .text_normalizer import normalize_blocks, normalize_pages
+
+# Bytes decoded per block when reading TXT files
+TXT_BLOCK_BYTES = 64 * 1024
+
+# Bytes copied per read when spooling an upload
+UPLOAD_BLOCK_BYTES = 256 * 1024
+
+# File content accepted by the extractors
+BinarySource = Union[bytes, BinaryIO]
+
+# PDF opened once per pool worker process (set by _init_pdf_worker)
+_WORKER_PDF: Optional[PyPDF2.PdfReader] = None
+
+
+def _open_binary(source: BinarySource) -> BinaryIO:
+    """A readable binary stream over bytes (not copied) or a file object, rewound"""
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return io.BytesIO(source)
+    source.seek(0)
+    return source
+
+
+def _file_path(source: BinarySource) -> Tuple[str, bool]:
+    """
+    A path other processes can open to read the content
+
+    An open file on disk is used where it is; bytes and in-memory, spooled
+    or unnamed files are copied to a temporary file in blocks.
+
+    Returns:
+        (path, whether it is a temporary copy the caller must delete)
+    """
+    if isinstance(source, io.BufferedReader) and isinstance(source.name, str) and os.path.isfile(source.name):
+        return source.name, False
+    with tempfile.NamedTemporaryFile(suffix=".pdf", delete=False) as copy:
+        if isinstance(source, (bytes, bytearray, memoryview)):
+            copy.write(source)
+        else:
+            shutil.copyfileobj(_open_binary(source), copy, UPLOAD_BLOCK_BYTES)
+    return copy.name, True
+
+
+def _init_pdf_worker(path: str):
+    """Pool initializer: open and parse the PDF once per worker instead of once per task"""
+    global _WORKER_PDF
+    # The file stays open for the worker's lifetime; pages are read lazily
+    _WORKER_PDF = PyPDF2.PdfReader(open(path, "rb"))
+
+
+def _extract_pages(reader: PyPDF2.PdfReader, start: int, stop: int) -> List[Tuple[int, str, Optional[str]]]:
+    """
+    Extract a page range, isolating failures to the page they happen on
+    
+    Returns:
+        (page index, text, error message or None) per page
+    """
+    results = []
+    for index in range(start, stop):
+        try:
+            results.append((index, reader.pages[index].extract_text(), None))
+        except Exception as e:
+            results.append((index, "", f"{type(e).__name__}: {e}"))
+    return results
+
+
+def _extract_worker_pages(start: int, stop: int) -> List[Tuple[int, str, Optional[str]]]:
+    """Pool task: extract a page range of the worker's PDF"""
+    return _extract_pages(_WORKER_PDF, start, stop)
+
 
 class ContentProcessor:
     """Process different file formats and extract text"""
     
+    # Bump when extraction output changes, so cached extractions are redone
+    EXTRACTOR_VERSION = 4
+    
     @staticmethod
-    def extract_text_from_pdf(file_content: bytes) -> str:
+    def spool_upload(
+        source: BinaryIO,
+        max_bytes: Optional[int] = None,
+        memory_bytes: Optional[int] = None
+    ) -> Dict:
         """
-        Extract text from PDF file
+        Copy an upload into a spooled temporary file, enforcing a size limit
+        
+        The upload is read in blocks: up to memory_bytes stay in memory,
+        larger uploads go to a temporary file on disk, and reading stops as
+        soon as the limit is exceeded. The SHA-256 of the content is computed
+        on the way (e.g. for the extraction cache).
         
         Args:
-            file_content: PDF file content as bytes
+            source: Binary file object of the upload (e.g. Streamlit's UploadedFile)
+            max_bytes: Size limit (defaults to Config.MAX_FILE_SIZE_MB)
+            memory_bytes: Bytes kept in memory before spooling to disk
+                (defaults to Config.UPLOAD_SPOOL_MEMORY_BYTES)
             
         Returns:
-            Extracted text as string
+            Dictionary with 'file' (the spooled file, rewound; close it when
+            done), 'size' and 'sha256'
+            
+        Raises:
+            ValueError: If the upload is larger than max_bytes
         """
+        max_bytes = Config.MAX_FILE_SIZE_MB * 1024 * 1024 if max_bytes is None else max_bytes
+        memory_bytes = Config.UPLOAD_SPOOL_MEMORY_BYTES if memory_bytes is None else memory_bytes
+        if source.seekable():
+            source.seek(0)
+        
+        spooled = tempfile.SpooledTemporaryFile(max_size=memory_bytes)
+        digest = hashlib.sha256()
+        size = 0
         try:
-            pdf_file = io.BytesIO(file_content)
-            pdf_reader = PyPDF2.PdfReader(pdf_file)
+            while True:
+                block = source.read(UPLOAD_BLOCK_BYTES)
+                if not block:
+                    break
+                size += len(block)
+                if size > max_bytes:
+                    raise ValueError(f"File is larger than the {max_bytes / (1024 * 1024):g} MB limit")
+                digest.update(block)
+                spooled.write(block)
+        except BaseException:
+            spooled.close()
+            raise
+        
+        spooled.seek(0)
+        return {'file': spooled, 'size': size, 'sha256': digest.hexdigest()}
+    
+    @staticmethod
+    def iter_pdf_pages(file_content: BinarySource) -> Iterator[str]:
+        """
+        Yield the text of a PDF page by page
+        
+        Pages are only parsed when the next one is requested.
+        
+        Args:
+            file_content: PDF file content (bytes or a binary file object)
             
-            text = ""
+        Yields:
+            Text of each page, followed by a newline
+        """
+        try:
+            pdf_reader = PyPDF2.PdfReader(_open_binary(file_content))
             for page in pdf_reader.pages:
-                text += page.extract_text() + "\n"
-            
-            return text.strip()
+                yield page.extract_text() + "\n"
         except Exception as e:
             raise Exception(f"Error extracting PDF text: {str(e)}")
     
     @staticmethod
-    def extract_text_from_txt(file_content: bytes) -> str:
+    def extract_pdf_pages(
+        file_content: BinarySource,
+        workers: Optional[int] = None,
+        pages_per_task: Optional[int] = None
+    ) -> Dict:
         """
-        Extract text from TXT file
+        Extract every page of a PDF, in parallel for large documents
+        
+        The pages are split into ranges extracted by a process pool; each
+        worker opens and parses the PDF once from a file path, so the content
+        is never read into memory or sent to the workers (bytes and
+        in-memory or spooled files are copied to a temporary file for
+        them). Results are put back in page order. A page
+        that fails to extract is left empty and reported instead of failing
+        the document; a range whose worker died is redone in this process.
+        PDFs under Config.PDF_PARALLEL_MIN_PAGES pages, or a single worker,
+        are extracted here without a pool.
         
         Args:
-            file_content: TXT file content as bytes
+            file_content: PDF file content (bytes or a binary file object)
+            workers: Worker processes (defaults to Config.PDF_EXTRACTION_WORKERS,
+                or the CPU count)
+            pages_per_task: Pages per task (defaults to Config.PDF_PAGES_PER_TASK)
             
         Returns:
-            Extracted text as string
+            Dictionary with 'pages' (text per page, in order), 'errors'
+            (page index -> error message) and 'workers' (processes used)
         """
         try:
-            text = file_content.decode('utf-8')
-            return text.strip()
-        except UnicodeDecodeError:
-            # Try with different encoding
+            reader = PyPDF2.PdfReader(_open_binary(file_content))
+            page_count = len(reader.pages)
+        except Exception as e:
+            raise Exception(f"Error extracting PDF text: {str(e)}")
+        
+        workers = workers or Config.PDF_EXTRACTION_WORKERS or os.cpu_count() or 1
+        pages_per_task = pages_per_task or Config.PDF_PAGES_PER_TASK
+        ranges = [
+            (start, min(start + pages_per_task, page_count))
+            for start in range(0, page_count, pages_per_task)
+        ]
+        workers = min(workers, len(ranges))
+        
+        results = []
+        if workers <= 1 or page_count < Config.PDF_PARALLEL_MIN_PAGES:
+            workers = 1
+            for start, stop in ranges:
+                results.extend(_extract_pages(reader, start, stop))
+        else:
+            context = multiprocessing.get_context(Config.PDF_POOL_START_METHOD)
+            path, is_copy = _file_path(file_content)
             try:
-                text = file_content.decode('latin-1')
-                return text.strip()
-            except Exception as e:
-                raise Exception(f"Error decoding text file: {str(e)}")
+                with ProcessPoolExecutor(
+                    max_workers=workers,
+                    mp_context=context,
+                    initializer=_init_pdf_worker,
+                    initargs=(path,)
+                ) as pool:
+                    futures = [(start, stop, pool.submit(_extract_worker_pages, start, stop)) for start, stop in ranges]
+                    for start, stop, future in futures:
+                        try:
+                            results.extend(future.result())
+                        except Exception:
+                            # The worker crashed (or the pool broke): redo the range here
+                            results.extend(_extract_pages(reader, start, stop))
+            finally:
+                if is_copy:
+                    os.remove(path)
+        
+        results.sort(key=lambda result: result[0])
+        return {
+            'pages': [text for _, text, _ in results],
+            'errors': {index: error for index, _, error in results if error is not None},
+            'workers': workers,
+        }
     
     @staticmethod
-    def extract_text_from_docx(file_content: bytes) -> str:
+    def iter_txt_blocks(file_content: BinarySource, block_bytes: int = TXT_BLOCK_BYTES) -> Iterator[str]:
         """
-        Extract text from DOCX file
+        Yield the text of a TXT file block by block
+        
+        Decoded as UTF-8; from the first invalid block on, the rest of the
+        file is decoded as Latin-1.
         
         Args:
-            file_content: DOCX file content as bytes
+            file_content: TXT file content (bytes or a binary file object)
+            block_bytes: Bytes decoded per block
             
-        Returns:
-            Extracted text as string
+        Yields:
+            Decoded text blocks
         """
-        try:
-            from docx import Document
-            docx_file = io.BytesIO(file_content)
-            doc = Document(docx_file)
+        stream = _open_binary(file_content)
+        decoder = codecs.getincrementaldecoder("utf-8")()
+        block = stream.read(block_bytes)
+        while block:
+            next_block = stream.read(block_bytes)
+            try:
+                yield decoder.decode(block, final=not next_block)
+            except UnicodeDecodeError:
+                # Bytes of a character split across blocks are still buffered
+                yield (decoder.getstate()[0] + block).decode('latin-1')
+                while next_block:
+                    yield next_block.decode('latin-1')
+                    next_block = stream.read(block_bytes)
+                return
+            block = next_block
+    
+    @staticmethod
+    def iter_docx_blocks(file_content: BinarySource) -> Iterator[str]:
+        """
+        Yield the text of a DOCX file block by block, in reading order
+        
+        Streams word/document.xml (see backend/docx_reader.py): paragraphs,
+        tables (a line per row, cells separated by " | ") and cited
+        footnotes, without loading the whole document. Page header lines
+        come first and footer lines last.
+        
+        Args:
+            file_content: DOCX file content (bytes or a binary file object)
             
-            text = ""
-            for paragraph in doc.paragraphs:
-                text += paragraph.text + "\n"
+        Yields:
+            Text of each paragraph or table, followed by a newline
+        """
+        try:
+            yield from iter_docx_text(_open_binary(file_content))
+        except Exception as e:
+            raise Exception(f"Error extracting DOCX text: {str(e)}")
+    
+    @staticmethod
+    def iter_docx_paragraphs(file_content: BinarySource) -> Iterator[str]:
+        """
+        Yield the text of a DOCX file paragraph by paragraph, with python-docx
+        
+        Body paragraphs only (no tables or footnotes); kept as the reference
+        path for benchmarks/docx_extraction_bench.py.
+        
+        Args:
+            file_content: DOCX file content (bytes or a binary file object)
             
-            return text.strip()
+        Yields:
+            Text of each paragraph, followed by a newline
+        """
+        try:
+            from docx import Document
         except ImportError:
             raise Exception("python-docx not installed. Install it with: pip install python-docx")
+        try:
+            doc = Document(_open_binary(file_content))
+            for paragraph in doc.paragraphs:
+                yield paragraph.text + "\n"
         except Exception as e:
             raise Exception(f"Error extracting DOCX text: {str(e)}")
     
     @staticmethod
-    def process_file(file_content: bytes, file_name: str) -> str:
+    def iter_text(file_content: BinarySource, file_name: str) -> Iterator[str]:
         """
-        Process uploaded file and extract text based on file extension
+        Yield a file's text lazily, in pages, blocks or paragraphs by format
         
         Args:
-            file_content: File content as bytes
+            file_content: File content (bytes or a binary file object)
             file_name: Name of the file with extension
             
-        Returns:
-            Extracted text content
+        Yields:
+            Pieces of text; joined without separators they form the full text
+            
+        Raises:
+            ValueError: If the file format is not supported
         """
         file_extension = file_name.lower().split('.')[-1]
         
         if file_extension == 'pdf':
-            return ContentProcessor.extract_text_from_pdf(file_content)
+            return ContentProcessor.iter_pdf_pages(file_content)
         elif file_extension == 'txt':
-            return ContentProcessor.extract_text_from_txt(file_content)
+            return ContentProcessor.iter_txt_blocks(file_content)
         elif file_extension == 'docx':
-            return ContentProcessor.extract_text_from_docx(file_content)
+            return ContentProcessor.iter_docx_blocks(file_content)
         else:
             raise ValueError(f"Unsupported file format: {file_extension}")
     
+    @staticmethod
+    def collect_text(
+        pieces: Iterator[str],
+        max_chars: Optional[int] = None,
+        max_tokens: Optional[int] = None
+    ) -> str:
+        """
+        Join text pieces until a character or token budget is met
+        
+        Stops pulling pieces (and so stops parsing) once the budget is
+        reached; the last piece is cut to fit.
+        
+        Args:
+            pieces: Text pieces, e.g. from iter_text
+            max_chars: Maximum characters to keep
+            max_tokens: Maximum estimated tokens to keep
+            
+        Returns:
+            Joined text, stripped
+        """
+        parts = []
+        chars = tokens = 0
+        for piece in pieces:
+            if max_chars is not None and chars + len(piece) >= max_chars:
+                parts.append(piece[:max_chars - chars])
+                break
+            if max_tokens is not None:
+                piece_tokens = estimate_tokens(piece)
+                if tokens + piece_tokens >= max_tokens:
+                    parts.append(truncate_tokens(piece, max_tokens - tokens))
+                    break
+                tokens += piece_tokens
+            parts.append(piece)
+            chars += len(piece)
+        return "".join(parts).strip()
+    
+    @staticmethod
+    def extract_text_from_pdf(
+        file_content: BinarySource,
+        max_chars: Optional[int] = None,
+        max_tokens: Optional[int] = None,
+        parallel: bool = False
+    ) -> str:
+        """
+        Extract text from PDF file
+        
+        Args:
+            file_content: PDF file content (bytes or a binary file object)
+            max_chars: Stop after this many characters
+            max_tokens: Stop after this many estimated tokens
+            parallel: Extract all pages across a process pool (see
+                extract_pdf_pages) before applying the budget; meant for
+                full extraction without a budget
+            
+        Returns:
+            Extracted text as string
+        """
+        if parallel:
+            pages = ContentProcessor.extract_pdf_pages(file_content)['pages']
+            return ContentProcessor.collect_text((page + "\n" for page in pages), max_chars, max_tokens)
+        return ContentProcessor.collect_text(
+            ContentProcessor.iter_pdf_pages(file_content), max_chars, max_tokens
+        )
+    
+    @staticmethod
+    def extract_text_from_txt(
+        file_content: BinarySource,
+        max_chars: Optional[int] = None,
+        max_tokens: Optional[int] = None
+    ) -> str:
+        """
+        Extract text from TXT file
+        
+        Args:
+            file_content: TXT file content (bytes or a binary file object)
+            max_chars: Stop after this many characters
+            max_tokens: Stop after this many estimated tokens
+            
+        Returns:
+            Extracted text as string
+        """
+        return ContentProcessor.collect_text(
+            ContentProcessor.iter_txt_blocks(file_content), max_chars, max_tokens
+        )
+    
+    @staticmethod
+    def extract_text_from_docx(
+        file_content: BinarySource,
+        max_chars: Optional[int] = None,
+        max_tokens: Optional[int] = None
+    ) -> str:
+        """
+        Extract text from DOCX file
+        
+        Args:
+            file_content: DOCX file content (bytes or a binary file object)
+            max_chars: Stop after this many characters
+            max_tokens: Stop after this many estimated tokens
+            
+        Returns:
+            Extracted text as string
+        """
+        return ContentProcessor.collect_text(
+            ContentProcessor.iter_docx_blocks(file_content), max_chars, max_tokens
+        )
+    
+    @staticmethod
+    def process_file(
+        file_content: BinarySource,
+        file_name: str,
+        max_chars: Optional[int] = None,
+        max_tokens: Optional[int] = None,
+        parallel: bool = False,
+        normalize: Optional[bool] = None,
+        stats: Optional[Dict] = None
+    ) -> str:
+        """
+        Process uploaded file and extract text based on file extension
+        
+        The budget applies to the normalized text, so a budgeted extraction
+        reads further into the document when normalization removes text.
+        
+        Args:
+            file_content: File content (bytes or a binary file object)
+            file_name: Name of the file with extension
+            max_chars: Stop extracting after this many characters
+            max_tokens: Stop extracting after this many estimated tokens
+            parallel: Extract PDFs across a process pool (full extraction)
+            normalize: Normalize the text (defaults to Config.NORMALIZE_EXTRACTED_TEXT)
+            stats: Optional dict filled with the normalization stats
+                (see text_normalizer.normalization_report)
+            
+        Returns:
+            Extracted text content
+        """
+        is_pdf = file_name.lower().endswith('.pdf')
+        if parallel and is_pdf:
+            pages = ContentProcessor.extract_pdf_pages(file_content)['pages']
+            pieces = (page + "\n" for page in pages)
+        else:
+            pieces = ContentProcessor.iter_text(file_content, file_name)
+        
+        if Config.NORMALIZE_EXTRACTED_TEXT if normalize is None else normalize:
+            pieces = normalize_pages(pieces, stats) if is_pdf else normalize_blocks(pieces, stats)
+        return ContentProcessor.collect_text(pieces, max_chars, max_tokens)
+    
+    @staticmethod
+    def select_relevant_chunks(text: str, topic: str, budget: int) -> Dict:
+        """
+        Retrieval stage: keep the chunks of a long text most relevant to a topic
+        
+        The text is split into overlapping chunks
+        (Config.RETRIEVAL_CHUNK_TOKENS, Config.RETRIEVAL_CHUNK_OVERLAP_TOKENS),
+        ranked with BM25 against the topic, and the best chunks that fit the
+        token budget are kept in document order.
+        
+        Args:
+            text: Extracted text
+            topic: Topic the material is used for
+            budget: Maximum estimated tokens to keep
+            
+        Returns:
+            Dictionary with 'text', 'tokens', 'original_tokens' and 'chunks'
+            (indexes of the selected chunks)
+        """
+        return select_chunks(text, topic, budget)
+    
     @staticmethod
     def truncate_text(text: str, max_length: int = 5000) -> str:
         """
@@ -0,0 +1,173 @@
+"""
+Context Packer Module
+Fits source material into a per-call token budget
+Counts tokens with a fast local estimator and keeps the passages most
+relevant to the topic instead of cutting text at a fixed character offset
+"""
+import re
+from typing import Dict, List
+from config import Config
+
+# Roughly one token per short word, per 4-character piece of a longer word
+# and per punctuation mark; close to Gemini's tokenizer on English prose
+_TOKEN_PIECES = re.compile(r"\w{1,4}|[^\w\s]")
+_PARAGRAPH_BREAK = re.compile(r"\n\s*\n")
+_SENTENCE_BREAK = re.compile(r"(?<=[.!?])\s+(?=\S)")
+_WORD = re.compile(r"\w+")
+_DEFINITION_CUE = re.compile(r"\b(?:is|are|means|refers to|defined as|called)\b", re.IGNORECASE)
+
+_STOPWORDS = frozenset(
+    "the a an and or of to in on for with by from what how why is are was were does do "
+    "about into this that these those it its as at be".split()
+)
+
+# Paragraphs longer than this are packed sentence by sentence
+_MAX_SEGMENT_TOKENS = 80
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Estimate how many tokens a text uses, without calling the model API
+
+    Args:
+        text: Text to measure
+
+    Returns:
+        Estimated token count
+    """
+    return len(_TOKEN_PIECES.findall(text)) if text else 0
+
+
+def truncate_tokens(text: str, max_tokens: int) -> str:
+    """
+    Cut a text after its first max_tokens estimated tokens
+
+    Args:
+        text: Text to cut
+        max_tokens: Estimated tokens to keep
+
+    Returns:
+        The text up to and including the last kept token
+    """
+    if max_tokens <= 0:
+        return ""
+    for count, piece in enumerate(_TOKEN_PIECES.finditer(text), 1):
+        if count == max_tokens:
+            return text[:piece.end()]
+    return text
+
+
+def get_context_budget(method: str, learning_level: str, model_name: str = None) -> int:
+    """
+    Token budget for the source material sent with one model call
+
+    Args:
+        method: Generation method ("explanation", "summary", "quiz", "study_pack")
+        learning_level: User's learning level
+        model_name: Model the call goes to (scales the budget)
+
+    Returns:
+        Token budget
+    """
+    budgets = Config.CONTEXT_TOKEN_BUDGETS.get(method, Config.CONTEXT_TOKEN_BUDGETS["explanation"])
+    budget = budgets.get(learning_level, budgets["Beginner"])
+    return int(budget * Config.MODEL_CONTEXT_BUDGET_SCALE.get(model_name, 1.0))
+
+
+def _query_terms(query: str) -> set:
+    return {word for word in _WORD.findall(query.lower()) if len(word) > 2 and word not in _STOPWORDS}
+
+
+def _segments(text: str) -> List[Dict]:
+    """Split text into paragraphs, and long paragraphs into sentences"""
+    segments = []
+    for paragraph_index, paragraph in enumerate(_PARAGRAPH_BREAK.split(text)):
+        paragraph = paragraph.strip()
+        if not paragraph:
+            continue
+        tokens = estimate_tokens(paragraph)
+        parts = [paragraph] if tokens <= _MAX_SEGMENT_TOKENS else _SENTENCE_BREAK.split(paragraph)
+        for sentence_index, part in enumerate(parts):
+            segments.append({
+                "paragraph": paragraph_index,
+                "sentence": sentence_index,
+                "text": part,
+                "tokens": tokens if len(parts) == 1 else estimate_tokens(part),
+            })
+    return segments
+
+
+def _score(segment: Dict, terms: set) -> float:
+    """Relevance of a segment: topic terms, headings, lead sentences and position"""
+    text = segment["text"]
+    score = 1.0 / (1.0 + segment["paragraph"] / 10.0)
+    if terms:
+        words = set(_WORD.findall(text.lower()))
+        score += 3.0 * len(terms & words) / len(terms)
+    if text.startswith("#"):
+        score += 1.5
+    if segment["sentence"] == 0:
+        score += 0.5
+    if _DEFINITION_CUE.search(text):
+        score += 0.3
+    return score
+
+
+def pack_context(text: str, budget: int, query: str = "") -> Dict:
+    """
+    Pack the most valuable passages of a text into a token budget
+
+    Text that already fits is returned unchanged. Otherwise paragraphs (or
+    sentences of long paragraphs) are ranked by relevance to the query per
+    token spent, the best ones that fit are kept, and they are put back in
+    their original order.
+
+    Args:
+        text: Source text
+        budget: Maximum estimated tokens to keep
+        query: Topic the passages should be relevant to
+
+    Returns:
+        Dictionary with 'text' (packed text), 'tokens', 'original_tokens'
+        and 'saved_tokens'
+    """
+    original_tokens = estimate_tokens(text)
+    if original_tokens <= budget:
+        return {"text": text, "tokens": original_tokens, "original_tokens": original_tokens, "saved_tokens": 0}
+
+    terms = _query_terms(query)
+    segments = _segments(text)
+    ranked = sorted(
+        segments,
+        key=lambda segment: _score(segment, terms) / max(1, segment["tokens"]) ** 0.5,
+        reverse=True
+    )
+
+    selected, used, seen = [], 0, set()
+    for segment in ranked:
+        key = segment["text"].lower()
+        if key in seen or used + segment["tokens"] > budget:
+            continue
+        seen.add(key)
+        selected.append(segment)
+        used += segment["tokens"]
+
+    if not selected:
+        # No passage fits on its own (e.g. text without sentence breaks):
+        # keep the start of the best one, cut at the budget
+        packed = truncate_tokens(ranked[0]["text"], budget)
+    else:
+        selected.sort(key=lambda segment: (segment["paragraph"], segment["sentence"]))
+        parts = [selected[0]["text"]]
+        for previous, segment in zip(selected, selected[1:]):
+            same_paragraph = segment["paragraph"] == previous["paragraph"]
+            parts.append((" " if same_paragraph else "\n\n") + segment["text"])
+        packed = "".join(parts)
+
+    tokens = estimate_tokens(packed)
+    return {
+        "text": packed,
+        "tokens": tokens,
+        "original_tokens": original_tokens,
+        "saved_tokens": original_tokens - tokens,
+    }
@@ -52,6 +52,58 @@ class Database:
                 FOREIGN KEY (user_id) REFERENCES users (id)
             )
         """)
+        # Where the session's source material came from ('none', 'upload' or
+        # 'library'; NULL for sessions saved before this was recorded) and
+        # whether it may be reused by other users
+        for column in ("context_source TEXT", "is_public INTEGER NOT NULL DEFAULT 0"):
+            try:
+                cursor.execute(f"ALTER TABLE study_sessions ADD COLUMN {column}")
+            except sqlite3.OperationalError:
+                pass  # column exists already
+        
+        # Question banks: quizzes and retakes are sampled from these locally
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS question_banks (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                topic TEXT NOT NULL,
+                learning_level TEXT NOT NULL,
+                questions TEXT NOT NULL,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                UNIQUE (topic, learning_level)
+            )
+        """)
+        
+        # Document library: each user's uploaded documents, split into chunks
+        # with their term counts (JSON) so the search index loads without
+        # re-reading the text
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS documents (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                user_id INTEGER NOT NULL,
+                file_name TEXT NOT NULL,
+                content_hash TEXT NOT NULL,
+                chars INTEGER NOT NULL,
+                chunk_count INTEGER NOT NULL,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                UNIQUE (user_id, content_hash),
+                FOREIGN KEY (user_id) REFERENCES users (id)
+            )
+        """)
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS document_chunks (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                document_id INTEGER NOT NULL,
+                user_id INTEGER NOT NULL,
+                chunk_index INTEGER NOT NULL,
+                text TEXT NOT NULL,
+                terms TEXT NOT NULL,
+                FOREIGN KEY (document_id) REFERENCES documents (id)
+            )
+        """)
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_document_chunks_user
+            ON document_chunks (user_id, id)
+        """)
         
         # User feedback table
         cursor.execute("""
@@ -95,23 +147,35 @@ class Database:
         learning_level: str,
         explanation: str,
         summary: str,
-        quiz_data: Dict
+        quiz_data: Dict,
+        context_source: Optional[str] = None,
+        is_public: bool = False
     ) -> int:
-        """Save a study session to database"""
+        """
+        Save a study session to database
+        
+        context_source records what the materials were generated from:
+        'none' (the topic alone), 'upload' or 'library'. Only 'none'
+        sessions are offered for reuse (see get_topic_catalog); None means
+        unknown and is never reused. is_public sessions may be reused by
+        every user, the others only by their owner.
+        """
         conn = self.get_connection()
         cursor = conn.cursor()
         
         cursor.execute("""
             INSERT INTO study_sessions 
-            (user_id, topic, learning_level, explanation, summary, quiz_data)
-            VALUES (?, ?, ?, ?, ?, ?)
+            (user_id, topic, learning_level, explanation, summary, quiz_data, context_source, is_public)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
         """, (
             user_id,
             topic,
             learning_level,
             explanation,
             summary,
-            json.dumps(quiz_data)
+            json.dumps(quiz_data),
+            context_source,
+            int(is_public)
         ))
         
         conn.commit()
@@ -119,6 +183,43 @@ class Database:
         conn.close()
         return session_id
     
+    def save_sessions(self, sessions: List[Dict]) -> int:
+        """
+        Save many study sessions in a single transaction
+        
+        Args:
+            sessions: Dictionaries with 'user_id', 'topic', 'learning_level',
+                'explanation', 'summary' and 'quiz_data', and optionally
+                'context_source' and 'is_public' (see save_session)
+                
+        Returns:
+            Number of sessions saved
+        """
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        cursor.executemany("""
+            INSERT INTO study_sessions 
+            (user_id, topic, learning_level, explanation, summary, quiz_data, context_source, is_public)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        """, [
+            (
+                session['user_id'],
+                session['topic'],
+                session['learning_level'],
+                session['explanation'],
+                session['summary'],
+                json.dumps(session['quiz_data']),
+                session.get('context_source'),
+                int(session.get('is_public', False))
+            )
+            for session in sessions
+        ])
+        
+        conn.commit()
+        conn.close()
+        return len(sessions)
+    
     def get_user_history(self, user_id: int, limit: int = 10) -> List[Dict]:
         """Get user's study history"""
         conn = self.get_connection()
@@ -155,6 +256,167 @@ class Database:
             return session
         return None
     
+    def get_topic_catalog(self) -> List[Dict]:
+        """
+        Get the study sessions that may be reused, oldest first
+        
+        Only sessions generated from the topic alone (context_source 'none')
+        that have an owner or are public are listed; materials generated
+        from an upload or the document library are never reused.
+        
+        Returns:
+            Dictionaries with 'id', 'topic', 'learning_level', 'user_id'
+            and 'is_public'
+        """
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        cursor.execute("""
+            SELECT id, topic, learning_level, user_id, is_public
+            FROM study_sessions
+            WHERE context_source = 'none' AND (user_id IS NOT NULL OR is_public = 1)
+            ORDER BY id
+        """)
+        
+        rows = cursor.fetchall()
+        conn.close()
+        
+        return [dict(row) for row in rows]
+    
+    def save_question_bank(self, topic: str, learning_level: str, questions: List[Dict]) -> int:
+        """
+        Save (or replace) the question bank for a topic and learning level
+        
+        Banks are shared by everyone studying the topic at that level, so
+        only banks generated from the topic alone (no upload or library
+        context) belong here.
+        """
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        cursor.execute("""
+            INSERT OR REPLACE INTO question_banks (topic, learning_level, questions)
+            VALUES (?, ?, ?)
+        """, (topic, learning_level, json.dumps(questions)))
+        
+        conn.commit()
+        bank_id = cursor.lastrowid
+        conn.close()
+        return bank_id
+    
+    def get_question_bank(self, topic: str, learning_level: str) -> Optional[List[Dict]]:
+        """Get the question bank for a topic and learning level, if one exists"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        cursor.execute("""
+            SELECT questions FROM question_banks
+            WHERE topic = ? AND learning_level = ?
+        """, (topic, learning_level))
+        
+        row = cursor.fetchone()
+        conn.close()
+        
+        return json.loads(row['questions']) if row else None
+    
+    def save_document(
+        self,
+        user_id: int,
+        file_name: str,
+        content_hash: str,
+        chars: int,
+        chunks: List[Dict]
+    ) -> Optional[Dict]:
+        """
+        Save a document and its chunks to a user's library
+        
+        Args:
+            user_id: Owner of the document
+            file_name: Uploaded file name
+            content_hash: Hash of the extracted text (one copy per user)
+            chars: Length of the extracted text
+            chunks: Dictionaries with 'text' and 'terms' (term -> count)
+            
+        Returns:
+            Dictionary with 'document_id' and 'chunk_ids' (in chunk order),
+            or None if the user already has this document
+        """
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        cursor.execute("""
+            INSERT OR IGNORE INTO documents (user_id, file_name, content_hash, chars, chunk_count)
+            VALUES (?, ?, ?, ?, ?)
+        """, (user_id, file_name, content_hash, chars, len(chunks)))
+        if cursor.rowcount == 0:
+            conn.close()
+            return None
+        
+        document_id = cursor.lastrowid
+        chunk_ids = []
+        for chunk_index, chunk in enumerate(chunks):
+            cursor.execute("""
+                INSERT INTO document_chunks (document_id, user_id, chunk_index, text, terms)
+                VALUES (?, ?, ?, ?, ?)
+            """, (document_id, user_id, chunk_index, chunk['text'], json.dumps(chunk['terms'])))
+            chunk_ids.append(cursor.lastrowid)
+        
+        conn.commit()
+        conn.close()
+        return {'document_id': document_id, 'chunk_ids': chunk_ids}
+    
+    def get_user_documents(self, user_id: int) -> List[Dict]:
+        """Get the documents in a user's library, newest first"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        cursor.execute("""
+            SELECT id, file_name, content_hash, chars, chunk_count, created_at
+            FROM documents
+            WHERE user_id = ?
+            ORDER BY created_at DESC, id DESC
+        """, (user_id,))
+        
+        rows = cursor.fetchall()
+        conn.close()
+        
+        return [dict(row) for row in rows]
+    
+    def get_chunk_terms(self, user_id: int) -> List[Dict]:
+        """Get the id and term counts of every chunk in a user's library, in insertion order"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        cursor.execute("""
+            SELECT id, terms FROM document_chunks
+            WHERE user_id = ?
+            ORDER BY id
+        """, (user_id,))
+        
+        rows = cursor.fetchall()
+        conn.close()
+        
+        return [{'id': row['id'], 'terms': json.loads(row['terms'])} for row in rows]
+    
+    def get_chunks(self, chunk_ids: List[int]) -> Dict[int, Dict]:
+        """Get chunks with their document's file name, keyed by chunk id"""
+        if not chunk_ids:
+            return {}
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        placeholders = ", ".join("?" for _ in chunk_ids)
+        cursor.execute(f"""
+            SELECT c.id, c.document_id, c.chunk_index, c.text, d.file_name
+            FROM document_chunks c JOIN documents d ON d.id = c.document_id
+            WHERE c.id IN ({placeholders})
+        """, list(chunk_ids))
+        
+        rows = cursor.fetchall()
+        conn.close()
+        
+        return {row['id']: dict(row) for row in rows}
+    
     def save_feedback(self, session_id: int, rating: int, comment: str = "") -> int:
         """Save user feedback for a session"""
         conn = self.get_connection()
@@ -0,0 +1,219 @@
+"""
+Document Library Module
+Keeps each user's uploaded documents searchable across sessions
+Chunks and their term counts are stored in the database. Each user gets an
+in-memory sparse TF-IDF matrix (SciPy CSR) that grows as documents are
+added, and a query scores every chunk of the library with one sparse
+matrix-vector product
+"""
+import hashlib
+import math
+import threading
+from array import array
+from collections import Counter
+from typing import Dict, List
+import numpy as np
+from scipy import sparse
+from config import Config
+from .context_packer import estimate_tokens
+from .retrieval import chunk_text, tokenize
+
+# Process-wide shared libraries, keyed by database path
+_SHARED_LIBRARIES: Dict[str, "DocumentLibrary"] = {}
+_SHARED_LIBRARIES_LOCK = threading.Lock()
+
+
+def get_document_library(db) -> "DocumentLibrary":
+    """
+    Return the process-wide document library for a database
+
+    Args:
+        db: Database holding the documents
+
+    Returns:
+        Shared DocumentLibrary instance
+    """
+    with _SHARED_LIBRARIES_LOCK:
+        library = _SHARED_LIBRARIES.get(db.db_path)
+        if library is None:
+            library = DocumentLibrary(db)
+            _SHARED_LIBRARIES[db.db_path] = library
+        return library
+
+
+class _UserIndex:
+    """Sparse term matrix over one user's chunks, appended to row by row"""
+
+    def __init__(self):
+        self.vocabulary: Dict[str, int] = {}
+        self.document_frequency = array("l")
+        self.chunk_ids = array("q")
+        # CSR arrays of the sublinear term frequencies (1 + log tf)
+        self.indptr = array("q", [0])
+        self.indices = array("l")
+        self.data = array("f")
+        self.content_hashes = set()
+        self._matrix = None
+
+    def add(self, chunk_id: int, terms: Dict[str, int]):
+        """Append a chunk's row"""
+        for term, count in terms.items():
+            column = self.vocabulary.get(term)
+            if column is None:
+                column = self.vocabulary[term] = len(self.vocabulary)
+                self.document_frequency.append(0)
+            self.document_frequency[column] += 1
+            self.indices.append(column)
+            self.data.append(1.0 + math.log(count))
+        self.indptr.append(len(self.indices))
+        self.chunk_ids.append(chunk_id)
+        self._matrix = None
+
+    def matrix(self):
+        """CSR term matrix, IDF weights and row norms (rebuilt after additions)"""
+        if self._matrix is None:
+            rows, columns = len(self.chunk_ids), len(self.vocabulary)
+            term_frequency = sparse.csr_matrix(
+                (
+                    np.array(self.data, dtype=np.float32),
+                    np.array(self.indices, dtype=np.int64),
+                    np.array(self.indptr, dtype=np.int64),
+                ),
+                shape=(rows, columns)
+            )
+            document_frequency = np.array(self.document_frequency, dtype=np.float64)
+            idf = np.log((1 + rows) / (1 + document_frequency)) + 1
+            norms = np.sqrt(term_frequency.multiply(term_frequency) @ (idf ** 2))
+            norms[norms == 0] = 1.0
+            self._matrix = (term_frequency, idf, norms)
+        return self._matrix
+
+
+class DocumentLibrary:
+    """Per-user persistent document library with TF-IDF chunk search"""
+
+    def __init__(self, db):
+        """
+        Args:
+            db: Database holding the documents and chunks
+        """
+        self.db = db
+        self._users: Dict[int, _UserIndex] = {}
+        self._lock = threading.Lock()
+
+    def _index(self, user_id: int) -> _UserIndex:
+        """A user's index, loaded from the stored term counts on first use (call with the lock held)"""
+        index = self._users.get(user_id)
+        if index is None:
+            index = _UserIndex()
+            for chunk in self.db.get_chunk_terms(user_id):
+                index.add(chunk['id'], chunk['terms'])
+            index.content_hashes.update(
+                document['content_hash'] for document in self.db.get_user_documents(user_id)
+            )
+            self._users[user_id] = index
+        return index
+
+    def add_document(self, user_id: int, file_name: str, text: str) -> Dict:
+        """
+        Add a document's text to a user's library
+
+        The text is chunked, its term counts are stored with the chunks, and
+        the user's index gets the new rows; existing documents aren't read
+        again. A document the user already has is not added twice.
+
+        Args:
+            user_id: Owner of the document
+            file_name: Uploaded file name
+            text: Extracted text
+
+        Returns:
+            Dictionary with 'document_id' (None when not added), 'chunks'
+            and 'added'
+        """
+        content_hash = hashlib.sha256(text.encode("utf-8")).hexdigest()
+        with self._lock:
+            if content_hash in self._index(user_id).content_hashes:
+                return {'document_id': None, 'chunks': 0, 'added': False}
+
+        chunks = [
+            {'text': chunk['text'], 'terms': dict(Counter(tokenize(chunk['text'])))}
+            for chunk in chunk_text(text)
+        ]
+        saved = self.db.save_document(user_id, file_name, content_hash, len(text), chunks)
+
+        with self._lock:
+            index = self._index(user_id)
+            index.content_hashes.add(content_hash)
+            if saved is None:
+                return {'document_id': None, 'chunks': 0, 'added': False}
+            for chunk_id, chunk in zip(saved['chunk_ids'], chunks):
+                index.add(chunk_id, chunk['terms'])
+        return {'document_id': saved['document_id'], 'chunks': len(chunks), 'added': True}
+
+    def documents(self, user_id: int) -> List[Dict]:
+        """Documents in a user's library, newest first"""
+        return self.db.get_user_documents(user_id)
+
+    def search(self, user_id: int, query: str, top_k: int = None) -> List[Dict]:
+        """
+        Find the chunks of a user's library that best match a query
+
+        Args:
+            user_id: Library owner
+            query: Query text (e.g. the topic)
+            top_k: Maximum chunks returned (defaults to Config.LIBRARY_SEARCH_TOP_K)
+
+        Returns:
+            Chunk dicts ('id', 'document_id', 'file_name', 'chunk_index',
+            'text', 'score'), best first; chunks without a matching term
+            are left out
+        """
+        top_k = top_k or Config.LIBRARY_SEARCH_TOP_K
+        with self._lock:
+            index = self._index(user_id)
+            query_terms = Counter(term for term in tokenize(query) if term in index.vocabulary)
+            if not query_terms or not index.chunk_ids:
+                return []
+            term_frequency, idf, norms = index.matrix()
+            columns = np.array([index.vocabulary[term] for term in query_terms], dtype=np.int64)
+            chunk_ids = np.array(index.chunk_ids, dtype=np.int64)
+
+        weights = np.array([1.0 + math.log(count) for count in query_terms.values()]) * idf[columns]
+        query_vector = np.zeros(term_frequency.shape[1])
+        query_vector[columns] = weights * idf[columns]
+        scores = (term_frequency @ query_vector) / (norms * np.linalg.norm(weights))
+
+        top_k = min(top_k, len(scores))
+        best = np.argpartition(-scores, top_k - 1)[:top_k]
+        best = best[np.argsort(-scores[best])]
+        best = best[scores[best] > 0]
+
+        chunks = self.db.get_chunks([int(chunk_ids[i]) for i in best])
+        return [
+            {**chunks[int(chunk_ids[i])], 'score': float(scores[i])}
+            for i in best if int(chunk_ids[i]) in chunks
+        ]
+
+    def context_for(self, user_id: int, topic: str, budget: int = None) -> str:
+        """
+        Best-matching library passages for a topic, within a token budget
+
+        Args:
+            user_id: Library owner
+            topic: Topic to study
+            budget: Maximum estimated tokens (defaults to
+                Config.LIBRARY_CONTEXT_TOKENS)
+
+        Returns:
+            Passages joined by blank lines, best first ("" when nothing matches)
+        """
+        budget = budget or Config.LIBRARY_CONTEXT_TOKENS
+        passages, used = [], 0
+        for chunk in self.search(user_id, topic):
+            tokens = estimate_tokens(chunk['text'])
+            if used + tokens > budget:
+                continue
+            passages.append(chunk['text'])
+            used += tokens
+        return "\n\n".join(passages)
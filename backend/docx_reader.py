@@ -0,0 +1,175 @@
+"""
+DOCX Reader Module
+Streams the text of a DOCX file straight from word/document.xml with
+iterparse, without building python-docx's object model
+Tables become one line per row ("cell | cell"), headings get Markdown "#"
+prefixes, list items "- ", and footnotes follow the block that cites them.
+Page headers come first and page footers last, each distinct line once
+"""
+import re
+import xml.etree.ElementTree as ET
+import zipfile
+from typing import BinaryIO, Dict, Iterator, List
+
+_W = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+_P, _R, _T, _TAB, _BR, _CR = (_W + tag for tag in ("p", "r", "t", "tab", "br", "cr"))
+_TBL, _TR, _TC = (_W + tag for tag in ("tbl", "tr", "tc"))
+_BODY, _PSTYLE, _NUMPR = (_W + tag for tag in ("body", "pStyle", "numPr"))
+_FOOTNOTE_REF, _ENDNOTE_REF = _W + "footnoteReference", _W + "endnoteReference"
+_VAL, _ID, _TYPE = _W + "val", _W + "id", _W + "type"
+
+# Heading levels by paragraph style ("Heading1".."Heading9", "Title")
+_HEADING_STYLE = re.compile(r"^(?:heading\s*(\d)|title)$", re.IGNORECASE)
+# Header and footer parts: word/header1.xml, word/footer2.xml, ...
+_HEADER_FOOTER_PART = re.compile(r"^word/(header|footer)(\d*)\.xml$")
+
+
+def _read_notes(archive: zipfile.ZipFile, part: str, tag: str) -> Dict[str, str]:
+    """Footnote or endnote texts by id (separator notes are skipped)"""
+    try:
+        with archive.open(part) as f:
+            root = ET.parse(f).getroot()
+    except KeyError:
+        return {}
+    notes = {}
+    for note in root.iter(_W + tag):
+        if note.get(_TYPE) in ("separator", "continuationSeparator", "continuationNotice"):
+            continue
+        paragraphs = ["".join(t.text or "" for t in p.iter(_T)) for p in note.iter(_P)]
+        notes[note.get(_ID)] = " ".join(p.strip() for p in paragraphs if p.strip())
+    return notes
+
+
+def _read_headers_footers(archive: zipfile.ZipFile, kind: str) -> List[str]:
+    """
+    Distinct lines of the document's header or footer parts
+
+    A section can have separate first-page, even-page and default headers,
+    and every section can have its own, so the same line often appears in
+    several parts; each is kept once, in part order. Lines that are only a
+    number (the rendered PAGE field) are dropped.
+    """
+    parts = []
+    for name in archive.namelist():
+        match = _HEADER_FOOTER_PART.match(name)
+        if match and match.group(1) == kind:
+            parts.append((int(match.group(2) or 0), name))
+
+    lines: Dict[str, None] = {}
+    for _, name in sorted(parts):
+        with archive.open(name) as f:
+            root = ET.parse(f).getroot()
+        for paragraph in root.iter(_P):
+            text = "".join(t.text or "" for t in paragraph.iter(_T)).strip()
+            if text and not text.isdigit():
+                lines[text] = None
+    return list(lines)
+
+
+def iter_docx_text(stream: BinaryIO) -> Iterator[str]:
+    """
+    Yield the text of a DOCX file block by block, in reading order
+
+    word/document.xml is decompressed and parsed incrementally, and each
+    finished paragraph or table is released, so stopping early stops the
+    parsing and memory stays flat on large documents.
+
+    Args:
+        stream: Binary file object of the DOCX file
+
+    Yields:
+        A paragraph or a whole table per piece, followed by a newline;
+        footnotes cited in a block follow it as "[n] text" lines. Header
+        lines come before the body, endnotes and footer lines after it
+    """
+    with zipfile.ZipFile(stream) as archive:
+        footnotes = _read_notes(archive, "word/footnotes.xml", "footnote")
+        endnotes = _read_notes(archive, "word/endnotes.xml", "endnote")
+        cited_endnotes: List[str] = []
+
+        for line in _read_headers_footers(archive, "header"):
+            yield line + "\n"
+
+        with archive.open("word/document.xml") as document:
+            # Open paragraphs, tables, rows and cells: [tag, parts, prefix]
+            stack: List[list] = []
+            pending_notes: List[str] = []
+            body = None
+            in_run = 0
+
+            for event, element in ET.iterparse(document, events=("start", "end")):
+                tag = element.tag
+                if event == "start":
+                    if tag in (_P, _TBL, _TR, _TC):
+                        stack.append([tag, [], ""])
+                    elif tag == _R:
+                        in_run += 1
+                    elif tag == _BODY:
+                        body = element
+                    continue
+
+                if tag == _R:
+                    in_run -= 1
+                elif tag == _T and in_run:
+                    stack[-1][1].append(element.text or "")
+                elif tag == _TAB and in_run:
+                    stack[-1][1].append("\t")
+                elif tag in (_BR, _CR) and in_run:
+                    stack[-1][1].append("\n")
+                elif tag == _PSTYLE and stack and stack[-1][0] == _P:
+                    style = element.get(_VAL, "")
+                    match = _HEADING_STYLE.match(style)
+                    if match:
+                        stack[-1][2] = "#" * int(match.group(1) or 1) + " "
+                    elif style.lower().startswith("list"):
+                        stack[-1][2] = "- "
+                elif tag == _NUMPR and stack and stack[-1][0] == _P and not stack[-1][2]:
+                    stack[-1][2] = "- "
+                elif tag == _FOOTNOTE_REF and stack:
+                    note_id = element.get(_ID)
+                    stack[-1][1].append(f"[{note_id}]")
+                    if footnotes.get(note_id):
+                        pending_notes.append(f"[{note_id}] {footnotes[note_id]}")
+                elif tag == _ENDNOTE_REF and stack:
+                    note_id = element.get(_ID)
+                    stack[-1][1].append(f"[e{note_id}]")
+                    if endnotes.get(note_id):
+                        cited_endnotes.append(f"[e{note_id}] {endnotes[note_id]}")
+                elif tag in (_P, _TC, _TR, _TBL):
+                    _, parts, prefix = stack.pop()
+                    if tag == _P:
+                        text = "".join(parts).strip()
+                        text = prefix + text if text else ""
+                    elif tag == _TC:
+                        text = " ".join(part for part in parts if part)
+                    elif tag == _TR:
+                        text = " | ".join(parts)
+                    else:
+                        text = "\n".join(row for row in parts if row.strip(" |"))
+
+                    if stack:
+                        parent = stack[-1]
+                        if parent[0] == _P:
+                            # Text box content inside a paragraph
+                            parent[1].append(" " + text if text else "")
+                        elif parent[0] == _TC and tag == _TBL:
+                            # Nested table: flatten into the cell
+                            parent[1].append("; ".join(row.strip(" |") for row in text.split("\n")))
+                        elif tag != _TC or parent[0] == _TR:
+                            parent[1].append(text)
+                        continue
+
+                    # A top-level block is done: emit it and release its elements
+                    if text:
+                        yield text + "\n"
+                    for note in pending_notes:
+                        yield note + "\n"
+                    pending_notes.clear()
+                    element.clear()
+                    if body is not None:
+                        body.clear()
+
+        for note in cited_endnotes:
+            yield note + "\n"
+        for line in _read_headers_footers(archive, "footer"):
+            yield line + "\n"
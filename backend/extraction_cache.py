@@ -0,0 +1,327 @@
+"""
+Extraction Cache Module
+Caches text extracted from uploaded files so that an identical upload
+(a Streamlit rerun, a re-upload, or the same file from another user) skips
+parsing. Entries are keyed by the SHA-256 of the file bytes, the file type,
+the extraction budget, the normalization setting and
+ContentProcessor.EXTRACTOR_VERSION; the normalization stats are kept with
+the text. Recent entries are kept in an in-memory LRU, backed by a
+size-limited SQLite table.
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+from config import Config
+from .content_processor import BinarySource, ContentProcessor
+
+# Bytes hashed per read when keying a file object
+_HASH_BLOCK_BYTES = 1024 * 1024
+
+# Process-wide shared cache instance
+_SHARED_CACHE = None
+_SHARED_CACHE_LOCK = threading.Lock()
+
+
+def get_extraction_cache() -> "ExtractionCache":
+    """Return the process-wide extraction cache"""
+    global _SHARED_CACHE
+    with _SHARED_CACHE_LOCK:
+        if _SHARED_CACHE is None:
+            _SHARED_CACHE = ExtractionCache()
+        return _SHARED_CACHE
+
+
+class ExtractionCache:
+    """Two-tier (memory LRU + SQLite) cache of extracted upload text"""
+
+    def __init__(
+        self,
+        db_path: str = Config.EXTRACTION_CACHE_PATH,
+        memory_max_entries: int = Config.EXTRACTION_CACHE_MEMORY_ENTRIES,
+        memory_max_chars: int = Config.EXTRACTION_CACHE_MEMORY_CHARS,
+        max_chars: int = Config.EXTRACTION_CACHE_MAX_CHARS
+    ):
+        """
+        Initialize the cache and create its table if it doesn't exist
+
+        Args:
+            db_path: SQLite file holding the persistent tier (None keeps the
+                cache in memory only)
+            memory_max_entries: Entries kept in the memory tier
+            memory_max_chars: Total characters kept in the memory tier
+            max_chars: Total characters kept in the SQLite tier (least
+                recently used entries are evicted first)
+        """
+        self.db_path = db_path
+        self.memory_max_entries = memory_max_entries
+        self.memory_max_chars = memory_max_chars
+        self.max_chars = max_chars
+        self._memory: "OrderedDict[str, Tuple[str, Dict]]" = OrderedDict()
+        self._memory_chars = 0
+        self._lock = threading.Lock()
+        self._stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0}
+        if self.db_path:
+            self.init_cache()
+
+    def get_connection(self):
+        """Get cache database connection"""
+        return sqlite3.connect(self.db_path, timeout=30)
+
+    def init_cache(self):
+        """Create the cache table if it doesn't exist"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS extraction_cache (
+                key TEXT PRIMARY KEY,
+                file_name TEXT NOT NULL,
+                text TEXT NOT NULL,
+                chars INTEGER NOT NULL,
+                stats TEXT,
+                created_at REAL NOT NULL,
+                last_accessed REAL NOT NULL
+            )
+        """)
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_extraction_cache_last_accessed
+            ON extraction_cache (last_accessed)
+        """)
+
+        conn.commit()
+        conn.close()
+
+    @staticmethod
+    def content_hash(file_content: BinarySource) -> str:
+        """SHA-256 of file content given as bytes or a binary file object"""
+        if isinstance(file_content, (bytes, bytearray, memoryview)):
+            return hashlib.sha256(file_content).hexdigest()
+        digest = hashlib.sha256()
+        file_content.seek(0)
+        for block in iter(lambda: file_content.read(_HASH_BLOCK_BYTES), b""):
+            digest.update(block)
+        file_content.seek(0)
+        return digest.hexdigest()
+
+    @staticmethod
+    def make_key(
+        file_content: BinarySource,
+        file_name: str,
+        settings: Dict = None,
+        content_hash: str = None
+    ) -> str:
+        """
+        Hash file content, file type, extraction settings and extractor version
+
+        Only the extension of file_name counts, so the same file uploaded
+        under another name shares the entry. A content_hash computed
+        earlier (e.g. by ContentProcessor.spool_upload) saves hashing the
+        content again.
+        """
+        digest = hashlib.sha256((content_hash or ExtractionCache.content_hash(file_content)).encode("utf-8"))
+        digest.update(b"\0")
+        digest.update(os.path.splitext(file_name)[1].lower().encode("utf-8"))
+        digest.update(b"\0")
+        digest.update(str(ContentProcessor.EXTRACTOR_VERSION).encode("utf-8"))
+        if settings:
+            digest.update(b"\0")
+            digest.update(json.dumps(settings, sort_keys=True).encode("utf-8"))
+        return digest.hexdigest()
+
+    def _remember(self, key: str, text: str, stats: Dict):
+        """Put an entry in the memory tier, evicting least recently used ones"""
+        if len(text) > self.memory_max_chars:
+            return
+        with self._lock:
+            previous = self._memory.pop(key, None)
+            if previous is not None:
+                self._memory_chars -= len(previous[0])
+            self._memory[key] = (text, stats)
+            self._memory_chars += len(text)
+            while self._memory and (
+                len(self._memory) > self.memory_max_entries
+                or self._memory_chars > self.memory_max_chars
+            ):
+                _, (evicted, _) = self._memory.popitem(last=False)
+                self._memory_chars -= len(evicted)
+
+    def _count(self, outcome: str):
+        with self._lock:
+            self._stats[outcome] += 1
+
+    def get(self, key: str, stats: Optional[Dict] = None) -> Optional[str]:
+        """
+        Look up extracted text, promoting disk hits into memory
+
+        Args:
+            key: Key from make_key
+            stats: Optional dict filled with the normalization stats stored
+                with the text
+
+        Returns:
+            Cached text, or None on a miss
+        """
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                self._memory.move_to_end(key)
+        if entry is not None:
+            self._count("memory_hits")
+            if stats is not None:
+                stats.update(entry[1])
+            return entry[0]
+
+        text, stored_stats = None, {}
+        if self.db_path:
+            conn = self.get_connection()
+            cursor = conn.cursor()
+            cursor.execute("SELECT text, stats FROM extraction_cache WHERE key = ?", (key,))
+            row = cursor.fetchone()
+            if row:
+                text = row[0]
+                stored_stats = json.loads(row[1]) if row[1] else {}
+                cursor.execute(
+                    "UPDATE extraction_cache SET last_accessed = ? WHERE key = ?", (time.time(), key)
+                )
+                conn.commit()
+            conn.close()
+
+        if text is None:
+            self._count("misses")
+            return None
+        self._count("disk_hits")
+        self._remember(key, text, stored_stats)
+        if stats is not None:
+            stats.update(stored_stats)
+        return text
+
+    def put(self, key: str, file_name: str, text: str, stats: Optional[Dict] = None):
+        """
+        Store extracted text in both tiers, evicting least recently used
+        entries beyond the size limits
+
+        Args:
+            key: Key from make_key
+            file_name: Name of the uploaded file (informational)
+            text: Extracted text
+            stats: Normalization stats of the extraction
+        """
+        stats = dict(stats or {})
+        self._remember(key, text, stats)
+        if not self.db_path or len(text) > self.max_chars:
+            return
+
+        now = time.time()
+        conn = self.get_connection()
+        cursor = conn.cursor()
+
+        cursor.execute("""
+            INSERT OR REPLACE INTO extraction_cache
+            (key, file_name, text, chars, stats, created_at, last_accessed)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        """, (key, file_name, text, len(text), json.dumps(stats), now, now))
+
+        # Evict the oldest entries until the total fits the limit
+        cursor.execute("SELECT COALESCE(SUM(chars), 0) FROM extraction_cache")
+        excess = cursor.fetchone()[0] - self.max_chars
+        if excess > 0:
+            cursor.execute(
+                "SELECT key, chars FROM extraction_cache ORDER BY last_accessed ASC"
+            )
+            evicted = []
+            for old_key, chars in cursor.fetchall():
+                if excess <= 0:
+                    break
+                if old_key == key:
+                    continue
+                evicted.append((old_key,))
+                excess -= chars
+            cursor.executemany("DELETE FROM extraction_cache WHERE key = ?", evicted)
+
+        conn.commit()
+        conn.close()
+
+    def process_file(
+        self,
+        file_content: BinarySource,
+        file_name: str,
+        max_chars: Optional[int] = None,
+        max_tokens: Optional[int] = None,
+        content_hash: str = None,
+        normalize: Optional[bool] = None,
+        stats: Optional[Dict] = None
+    ) -> str:
+        """
+        ContentProcessor.process_file, served from the cache when the same
+        file was extracted with the same budget and normalization before
+
+        Args:
+            file_content: File content (bytes or a binary file object)
+            file_name: Name of the file with extension
+            max_chars: Stop extracting after this many characters
+            max_tokens: Stop extracting after this many estimated tokens
+            content_hash: SHA-256 of the content, if already known
+            normalize: Normalize the text (defaults to Config.NORMALIZE_EXTRACTED_TEXT)
+            stats: Optional dict filled with the normalization stats, also
+                on a cache hit
+
+        Returns:
+            Extracted text content
+        """
+        if normalize is None:
+            normalize = Config.NORMALIZE_EXTRACTED_TEXT
+        key = self.make_key(
+            file_content,
+            file_name,
+            {"max_chars": max_chars, "max_tokens": max_tokens, "normalize": normalize},
+            content_hash
+        )
+        text = self.get(key, stats)
+        if text is None:
+            extraction_stats = {}
+            text = ContentProcessor.process_file(
+                file_content, file_name, max_chars, max_tokens, normalize=normalize, stats=extraction_stats
+            )
+            self.put(key, file_name, text, extraction_stats)
+            if stats is not None:
+                stats.update(extraction_stats)
+        return text
+
+    def clear(self):
+        """Remove every cached extraction"""
+        with self._lock:
+            self._memory.clear()
+            self._memory_chars = 0
+        if self.db_path:
+            conn = self.get_connection()
+            conn.execute("DELETE FROM extraction_cache")
+            conn.commit()
+            conn.close()
+
+    def get_stats(self) -> Dict:
+        """
+        Get hit/miss counters and the size of both tiers
+
+        Returns:
+            Dictionary with 'memory_hits', 'disk_hits', 'misses',
+            'memory_entries', 'memory_chars', 'disk_entries' and 'disk_chars'
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            stats["memory_entries"] = len(self._memory)
+            stats["memory_chars"] = self._memory_chars
+
+        stats["disk_entries"], stats["disk_chars"] = 0, 0
+        if self.db_path:
+            conn = self.get_connection()
+            stats["disk_entries"], stats["disk_chars"] = conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(chars), 0) FROM extraction_cache"
+            ).fetchone()
+            conn.close()
+        return stats
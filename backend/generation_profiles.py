@@ -0,0 +1,61 @@
+"""
+Generation Profiles Module
+Resolves named generation profiles (fast/balanced/thorough) into the
+generation config sent with a model call: output token cap, temperature
+and stop sequences for a method and learning level
+"""
+from typing import Dict, List
+from config import Config
+
+# Finish reason reported when the output hit max_output_tokens
+FINISH_MAX_TOKENS = "MAX_TOKENS"
+
+
+def list_profiles() -> List[str]:
+    """Names of the configured generation profiles"""
+    return list(Config.GENERATION_PROFILES)
+
+
+def get_generation_config(
+    profile: str,
+    method: str,
+    learning_level: str,
+    num_questions: int = None
+) -> Dict:
+    """
+    Generation config for one model call
+
+    Args:
+        profile: Profile name (defaults to Config.DEFAULT_GENERATION_PROFILE)
+        method: Generation method ("explanation", "summary", "quiz", "study_pack", ...)
+        learning_level: User's learning level
+        num_questions: Questions requested (quiz and study pack caps grow
+            with it; defaults to Config.DEFAULT_QUIZ_QUESTIONS)
+
+    Returns:
+        Dictionary with 'max_output_tokens', 'temperature' and, when set,
+        'stop_sequences'
+
+    Raises:
+        ValueError: If the profile doesn't exist
+    """
+    profile = profile or Config.DEFAULT_GENERATION_PROFILE
+    if profile not in Config.GENERATION_PROFILES:
+        raise ValueError(f"Unknown generation profile: {profile}")
+    methods = Config.GENERATION_PROFILES[profile]
+    settings = methods.get(method, methods["explanation"])
+
+    caps = settings["max_output_tokens"]
+    max_output_tokens = caps.get(learning_level, caps["Beginner"])
+    per_question = settings.get("tokens_per_question")
+    if per_question:
+        questions = num_questions or Config.DEFAULT_QUIZ_QUESTIONS
+        max_output_tokens += questions * per_question.get(learning_level, per_question["Beginner"])
+
+    config = {
+        "max_output_tokens": max_output_tokens,
+        "temperature": settings["temperature"],
+    }
+    if settings.get("stop_sequences"):
+        config["stop_sequences"] = list(settings["stop_sequences"])
+    return config
@@ -0,0 +1,220 @@
+"""
+Metrics Module
+Thread-safe latency, error, hedging and per-route statistics for model calls
+"""
+import threading
+from collections import deque
+from typing import Deque, Dict, Optional
+
+
+def percentile(values, pct: float) -> Optional[float]:
+    """
+    Nearest-rank percentile of a collection of numbers
+
+    Args:
+        values: Numbers to summarize
+        pct: Percentile between 0 and 100
+
+    Returns:
+        The percentile value, or None for an empty collection
+    """
+    ordered = sorted(values)
+    if not ordered:
+        return None
+    rank = max(0, min(len(ordered) - 1, int(round(pct / 100.0 * len(ordered))) - 1))
+    return ordered[rank]
+
+
+class LatencyTracker:
+    """Rolling window of successful call latencies per model"""
+
+    def __init__(self, window: int = 200):
+        """
+        Args:
+            window: Number of most recent samples kept per model
+        """
+        self.window = window
+        self._samples: Dict[str, Deque[float]] = {}
+        self._lock = threading.Lock()
+
+    def record(self, model_name: str, seconds: float):
+        """Add a latency sample for a model"""
+        with self._lock:
+            samples = self._samples.get(model_name)
+            if samples is None:
+                samples = deque(maxlen=self.window)
+                self._samples[model_name] = samples
+            samples.append(seconds)
+
+    def count(self, model_name: str) -> int:
+        """Number of samples currently held for a model"""
+        with self._lock:
+            return len(self._samples.get(model_name, ()))
+
+    def percentile(self, model_name: str, pct: float) -> Optional[float]:
+        """Latency percentile for a model, or None without samples"""
+        with self._lock:
+            samples = list(self._samples.get(model_name, ()))
+        return percentile(samples, pct)
+
+
+class OutcomeTracker:
+    """Rolling window of call outcomes (success or failure) per model"""
+
+    def __init__(self, window: int = 50):
+        """
+        Args:
+            window: Number of most recent outcomes kept per model
+        """
+        self.window = window
+        self._outcomes: Dict[str, Deque[bool]] = {}
+        self._lock = threading.Lock()
+
+    def record(self, model_name: str, success: bool):
+        """Add a call outcome for a model"""
+        with self._lock:
+            outcomes = self._outcomes.get(model_name)
+            if outcomes is None:
+                outcomes = deque(maxlen=self.window)
+                self._outcomes[model_name] = outcomes
+            outcomes.append(success)
+
+    def count(self, model_name: str) -> int:
+        """Number of outcomes currently held for a model"""
+        with self._lock:
+            return len(self._outcomes.get(model_name, ()))
+
+    def error_rate(self, model_name: str) -> float:
+        """Share of failed calls in the window (0.0 without samples)"""
+        with self._lock:
+            outcomes = self._outcomes.get(model_name)
+            if not outcomes:
+                return 0.0
+            return 1.0 - sum(outcomes) / len(outcomes)
+
+
+class RouteMetrics:
+    """Latency, error, size and cost counters per routing rule"""
+
+    def __init__(self, window: int = 200):
+        """
+        Args:
+            window: Latency samples kept per route
+        """
+        self._latency = LatencyTracker(window)
+        self._lock = threading.Lock()
+        self._routes: Dict[str, Dict] = {}
+
+    def record(
+        self,
+        route: str,
+        model_name: Optional[str],
+        seconds: float,
+        success: bool,
+        prompt_tokens: int = 0,
+        response_tokens: int = 0,
+        cost: float = 0.0
+    ):
+        """
+        Record one request served under a route
+
+        Args:
+            route: Route name
+            model_name: Model that answered (None if the request failed)
+            seconds: End-to-end latency including retries and failover
+            success: Whether a response was produced
+            prompt_tokens: Estimated input tokens
+            response_tokens: Estimated output tokens
+            cost: Estimated cost in USD
+        """
+        with self._lock:
+            stats = self._routes.get(route)
+            if stats is None:
+                stats = {
+                    "requests": 0,
+                    "errors": 0,
+                    "prompt_tokens": 0,
+                    "response_tokens": 0,
+                    "cost_usd": 0.0,
+                    "models": {},
+                }
+                self._routes[route] = stats
+            stats["requests"] += 1
+            if not success:
+                stats["errors"] += 1
+                return
+            stats["prompt_tokens"] += prompt_tokens
+            stats["response_tokens"] += response_tokens
+            stats["cost_usd"] += cost
+            stats["models"][model_name] = stats["models"].get(model_name, 0) + 1
+        self._latency.record(route, seconds)
+
+    def get_stats(self) -> Dict[str, Dict]:
+        """
+        Get per-route counters plus latency percentiles and error rate
+
+        Returns:
+            Route name -> dictionary with 'requests', 'errors', 'error_rate',
+            'p50_seconds', 'p95_seconds', token totals, 'cost_usd' and
+            'models' (model name -> requests it answered)
+        """
+        with self._lock:
+            routes = {
+                route: {**stats, "models": dict(stats["models"])}
+                for route, stats in self._routes.items()
+            }
+        for route, stats in routes.items():
+            stats["error_rate"] = stats["errors"] / max(1, stats["requests"])
+            stats["p50_seconds"] = self._latency.percentile(route, 50)
+            stats["p95_seconds"] = self._latency.percentile(route, 95)
+        return routes
+
+
+class HedgeStats:
+    """Counters describing how often hedged requests fire and win"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counts = {
+            "requests": 0,
+            "hedges_fired": 0,
+            "hedge_wins": 0,
+            "primary_wins": 0,
+            "both_failed": 0,
+        }
+
+    def record(self, fired: bool, winner: Optional[str] = None):
+        """
+        Record the outcome of one hedging-eligible request
+
+        Args:
+            fired: Whether a duplicate request was sent
+            winner: "primary", "hedge" or None if both failed
+                (only meaningful when fired)
+        """
+        with self._lock:
+            self._counts["requests"] += 1
+            if not fired:
+                return
+            self._counts["hedges_fired"] += 1
+            if winner == "hedge":
+                self._counts["hedge_wins"] += 1
+            elif winner == "primary":
+                self._counts["primary_wins"] += 1
+            else:
+                self._counts["both_failed"] += 1
+
+    def get_stats(self) -> Dict:
+        """
+        Get the counters plus derived rates
+
+        Returns:
+            Dictionary with the raw counters, 'fire_rate' (share of requests
+            that sent a hedge, i.e. extra calls paid for) and 'win_rate'
+            (share of fired hedges that answered first)
+        """
+        with self._lock:
+            stats = dict(self._counts)
+        stats["fire_rate"] = stats["hedges_fired"] / max(1, stats["requests"])
+        stats["win_rate"] = stats["hedge_wins"] / max(1, stats["hedges_fired"])
+        return stats
@@ -0,0 +1,450 @@
+"""
+Model Backends Module
+Text generation backends used by AIEngine
+GeminiBackend calls Google Gemini; FakeBackend is a deterministic local
+stand-in for offline development, load tests and benchmarks
+"""
+import hashlib
+import json
+import math
+import random
+import re
+import threading
+import time
+import uuid
+from typing import Dict, Iterator, List, Optional
+import google.ai.generativelanguage as glm
+import google.generativeai as genai
+from google.api_core import exceptions as google_exceptions
+from config import Config
+from .context_packer import estimate_tokens, truncate_tokens
+from .generation_profiles import FINISH_MAX_TOKENS
+
+
+def create_backend(name: str = None, api_key: str = None) -> "ModelBackend":
+    """
+    Create a model backend by name
+
+    Args:
+        name: "gemini" or "fake" (defaults to Config.MODEL_BACKEND)
+        api_key: Google Gemini API key (Gemini backend only)
+
+    Returns:
+        ModelBackend instance
+    """
+    name = name or Config.MODEL_BACKEND
+    if name == "gemini":
+        return GeminiBackend(api_key)
+    if name == "fake":
+        return FakeBackend(**Config.FAKE_BACKEND_SETTINGS)
+    raise ValueError(f"Unknown model backend: {name}")
+
+
+class ModelBackend:
+    """
+    Interface for text generation backends
+
+    Responses are dicts with 'text' and 'finish_reason' ("STOP",
+    "MAX_TOKENS", ... or None when the backend doesn't report one).
+
+    Conversations pin a model and a history of turns, so follow-up messages
+    can refer to earlier ones ("the explanation above") instead of repeating
+    them. Backends whose service keeps that history set
+    keeps_conversation_context; the others re-send it with every message.
+    """
+
+    name = "base"
+    keeps_conversation_context = False
+
+    def __init__(self):
+        self._conversations: Dict[str, Dict] = {}
+        self._conversation_lock = threading.Lock()
+
+    def generate(self, model_name: str, prompt: str, generation_config: Dict = None) -> Dict:
+        """
+        Generate a complete response
+
+        Args:
+            model_name: Model to use
+            prompt: Prompt text
+            generation_config: Optional 'max_output_tokens', 'temperature'
+                and 'stop_sequences'
+
+        Returns:
+            Dictionary with 'text' and 'finish_reason'
+        """
+        raise NotImplementedError
+
+    def generate_stream(self, model_name: str, prompt: str, generation_config: Dict = None) -> Iterator[Dict]:
+        """
+        Generate a response chunk by chunk
+
+        Args:
+            model_name: Model to use
+            prompt: Prompt text
+            generation_config: Optional 'max_output_tokens', 'temperature'
+                and 'stop_sequences'
+
+        Yields:
+            Dictionaries with 'text' (the chunk) and 'finish_reason' (set on
+            the last chunk)
+        """
+        raise NotImplementedError
+
+    def start_conversation(self, model_name: str, history: List[Dict] = None) -> str:
+        """
+        Open a conversation with a model
+
+        Args:
+            model_name: Model every message of the conversation goes to
+            history: Earlier turns as {'role': 'user' | 'model', 'text': ...}
+
+        Returns:
+            Conversation id
+        """
+        conversation_id = uuid.uuid4().hex
+        with self._conversation_lock:
+            self._conversations[conversation_id] = {
+                "model": model_name,
+                "history": [dict(turn) for turn in history or []],
+            }
+        return conversation_id
+
+    def _conversation(self, conversation_id: str) -> Dict:
+        """Model and a snapshot of the history of an open conversation"""
+        with self._conversation_lock:
+            conversation = self._conversations.get(conversation_id)
+            if conversation is None:
+                raise KeyError(f"Unknown or closed conversation: {conversation_id}")
+            return {"model": conversation["model"], "history": list(conversation["history"])}
+
+    def _remember(self, conversation_id: str, prompt: str, text: str):
+        """Append a message and its answer to a conversation's history"""
+        with self._conversation_lock:
+            conversation = self._conversations.get(conversation_id)
+            if conversation is not None:
+                conversation["history"].append({"role": "user", "text": prompt})
+                conversation["history"].append({"role": "model", "text": text})
+
+    def send_message(
+        self,
+        conversation_id: str,
+        prompt: str,
+        generation_config: Dict = None,
+        remember: bool = True
+    ) -> Dict:
+        """
+        Send a message within a conversation
+
+        Args:
+            conversation_id: Id from start_conversation
+            prompt: Message text
+            generation_config: Optional 'max_output_tokens', 'temperature'
+                and 'stop_sequences'
+            remember: Add the message and answer to the history; pass False
+                for independent follow-ups sharing the same earlier turns
+
+        Returns:
+            Dictionary with 'text' and 'finish_reason'
+        """
+        raise NotImplementedError
+
+    def end_conversation(self, conversation_id: str):
+        """Close a conversation and release its history"""
+        with self._conversation_lock:
+            self._conversations.pop(conversation_id, None)
+
+
+class GeminiBackend(ModelBackend):
+    """Backend using the google.generativeai SDK"""
+
+    name = "gemini"
+
+    def __init__(self, api_key: str = None):
+        """
+        Args:
+            api_key: Google Gemini API key
+        """
+        super().__init__()
+        self.api_key = api_key or Config.GEMINI_API_KEY
+        if not self.api_key:
+            raise ValueError("A Gemini API key is required to initialize the AI Engine")
+        # A client bound to this backend's key: genai.configure() is
+        # process-wide, so engines for different keys would all call with
+        # whichever key was configured last
+        self._client = glm.GenerativeServiceClient(client_options={"api_key": self.api_key})
+
+        self._lock = threading.Lock()
+        self._models: Dict[str, genai.GenerativeModel] = {}
+
+    def _get_model(self, model_name: str) -> genai.GenerativeModel:
+        """Return a cached GenerativeModel handle for a model name"""
+        with self._lock:
+            model = self._models.get(model_name)
+            if model is None:
+                model = genai.GenerativeModel(model_name)
+                # The model and its chat sessions call through _client, which
+                # otherwise defaults to the process-wide configured client
+                model._client = self._client
+                self._models[model_name] = model
+            return model
+
+    @staticmethod
+    def _finish_reason(response) -> Optional[str]:
+        """Finish reason name of the first candidate, if the response has one yet"""
+        if not response.candidates:
+            return None
+        reason = response.candidates[0].finish_reason
+        name = getattr(reason, "name", None)
+        return None if not reason or name == "FINISH_REASON_UNSPECIFIED" else name
+
+    @classmethod
+    def _text(cls, response) -> str:
+        # The closing stream chunk, or a response cut off by the token cap,
+        # may carry no text at all
+        if cls._finish_reason(response) in ("STOP", FINISH_MAX_TOKENS) and not response.parts:
+            return ""
+        return response.text
+
+    def generate(self, model_name: str, prompt: str, generation_config: Dict = None) -> Dict:
+        response = self._get_model(model_name).generate_content(
+            prompt, generation_config=generation_config
+        )
+        return {"text": self._text(response), "finish_reason": self._finish_reason(response)}
+
+    def generate_stream(self, model_name: str, prompt: str, generation_config: Dict = None) -> Iterator[Dict]:
+        stream = self._get_model(model_name).generate_content(
+            prompt, generation_config=generation_config, stream=True
+        )
+        for chunk in stream:
+            yield {"text": self._text(chunk), "finish_reason": self._finish_reason(chunk)}
+
+    def send_message(
+        self,
+        conversation_id: str,
+        prompt: str,
+        generation_config: Dict = None,
+        remember: bool = True
+    ) -> Dict:
+        # The SDK's chat sessions are client-side: the history goes out with
+        # every message, hence keeps_conversation_context stays False
+        conversation = self._conversation(conversation_id)
+        chat = self._get_model(conversation["model"]).start_chat(history=[
+            {"role": turn["role"], "parts": [turn["text"]]} for turn in conversation["history"]
+        ])
+        response = chat.send_message(prompt, generation_config=generation_config)
+        text = self._text(response)
+        if remember:
+            self._remember(conversation_id, prompt, text)
+        return {"text": text, "finish_reason": self._finish_reason(response)}
+
+
+class FakeBackend(ModelBackend):
+    """
+    Deterministic local stand-in for Gemini
+
+    Response content depends only on the model name and prompt, so runs
+    are reproducible. Latency and errors are drawn from a seeded random
+    generator. Quiz and study-pack prompts get realistic JSON payloads.
+    Stop sequences and max_output_tokens (counted with the local token
+    estimate) are applied like the real API does; temperature is ignored.
+    Conversations behave like a service-side context cache: the history is
+    stored once and not sent again with each message.
+    """
+
+    name = "fake"
+    keeps_conversation_context = True
+
+    _WORDS = (
+        "energy process system structure function example concept model cell "
+        "force reaction pattern data theory result change level form source "
+        "signal balance network element factor principle method value stage"
+    ).split()
+
+    def __init__(
+        self,
+        latency: Dict = None,
+        model_latency: Dict[str, Dict] = None,
+        error_rate: float = 0.0,
+        rate_limit_rate: float = 0.0,
+        malformed_json_rate: float = 0.0,
+        chunk_words: int = 12,
+        seconds_per_token: float = 0.0,
+        seed: int = 42
+    ):
+        """
+        Args:
+            latency: Latency distribution for every model, e.g.
+                {"distribution": "lognormal", "median": 1.5, "sigma": 0.6}.
+                Supported distributions: "constant" (seconds),
+                "lognormal" (median, sigma), "exponential" (mean).
+            model_latency: Per-model overrides of the latency distribution
+            error_rate: Probability of a 503 ServiceUnavailable per call
+            rate_limit_rate: Probability of a 429 ResourceExhausted per call
+            malformed_json_rate: Probability that a JSON response is cut off
+            chunk_words: Words per streamed chunk
+            seconds_per_token: Extra latency per output token, so capped
+                responses come back faster
+            seed: Seed for latency and error draws
+        """
+        super().__init__()
+        self.latency = latency or {"distribution": "constant", "seconds": 0.0}
+        self.model_latency = model_latency or {}
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.malformed_json_rate = malformed_json_rate
+        self.chunk_words = chunk_words
+        self.seconds_per_token = seconds_per_token
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.calls = 0
+
+    def _draw(self) -> float:
+        with self._lock:
+            return self._rng.random()
+
+    def _sample_latency(self, model_name: str) -> float:
+        spec = self.model_latency.get(model_name, self.latency)
+        distribution = spec.get("distribution", "constant")
+        with self._lock:
+            if distribution == "constant":
+                return spec.get("seconds", 0.0)
+            if distribution == "lognormal":
+                return self._rng.lognormvariate(math.log(spec["median"]), spec.get("sigma", 0.5))
+            if distribution == "exponential":
+                return self._rng.expovariate(1.0 / spec["mean"])
+        raise ValueError(f"Unknown latency distribution: {distribution}")
+
+    def _maybe_fail(self, model_name: str):
+        with self._lock:
+            self.calls += 1
+        draw = self._draw()
+        if draw < self.rate_limit_rate:
+            raise google_exceptions.ResourceExhausted(f"Fake quota exceeded for {model_name}")
+        if draw < self.rate_limit_rate + self.error_rate:
+            raise google_exceptions.ServiceUnavailable(f"Fake backend error for {model_name}")
+
+    @staticmethod
+    def _content_rng(model_name: str, prompt: str) -> random.Random:
+        digest = hashlib.sha256(f"{model_name}\0{prompt}".encode("utf-8")).digest()
+        return random.Random(int.from_bytes(digest[:8], "big"))
+
+    @staticmethod
+    def _topic(prompt: str) -> str:
+        match = re.search(r"Topic:\s*(.+)", prompt) or re.search(r"explanation of (.+?),", prompt)
+        return match.group(1).strip() if match else "the topic"
+
+    def _sentence(self, rng: random.Random, topic: str) -> str:
+        words = [rng.choice(self._WORDS) for _ in range(rng.randint(8, 16))]
+        words.insert(rng.randint(0, len(words)), topic)
+        return " ".join(words).capitalize() + "."
+
+    def _explanation(self, rng: random.Random, topic: str) -> str:
+        paragraphs = [
+            " ".join(self._sentence(rng, topic) for _ in range(rng.randint(3, 6)))
+            for _ in range(rng.randint(3, 5))
+        ]
+        return f"## {topic}\n\n" + "\n\n".join(paragraphs)
+
+    def _summary(self, rng: random.Random, topic: str) -> str:
+        return "\n".join(f"- {self._sentence(rng, topic)}" for _ in range(rng.randint(3, 5)))
+
+    def _questions(self, rng: random.Random, topic: str, count: int) -> List[Dict]:
+        questions = []
+        for i in range(count):
+            correct = rng.randrange(4)
+            questions.append({
+                "question": f"Question {i + 1} about {topic}: which {rng.choice(self._WORDS)} applies?",
+                "options": [
+                    f"{letter}) {rng.choice(self._WORDS)} {rng.choice(self._WORDS)}"
+                    for letter in "ABCD"
+                ],
+                "correct_answer": "ABCD"[correct],
+                "explanation": self._sentence(rng, topic)
+            })
+        return questions
+
+    def _respond(self, model_name: str, prompt: str, history: List[Dict] = None) -> str:
+        """Build the deterministic response text for a prompt (and earlier turns)"""
+        seed_text = "".join(turn["text"] for turn in history or []) + prompt
+        rng = self._content_rng(model_name, seed_text)
+        topic = self._topic(prompt)
+        if topic == "the topic" and history:
+            topic = self._topic(history[0]["text"])
+        count_match = re.search(r"(\d+)-question", prompt)
+        count = int(count_match.group(1)) if count_match else Config.DEFAULT_QUIZ_QUESTIONS
+
+        if '"quiz"' in prompt and '"explanation"' in prompt:
+            payload = {
+                "explanation": self._explanation(rng, topic),
+                "summary": self._summary(rng, topic),
+                "quiz": {"questions": self._questions(rng, topic, count)}
+            }
+        elif '"questions"' in prompt:
+            payload = {"questions": self._questions(rng, topic, count)}
+        elif "summary" in prompt.lower():
+            return self._summary(rng, topic)
+        else:
+            return self._explanation(rng, topic)
+
+        text = "```json\n" + json.dumps(payload, indent=2) + "\n```"
+        if rng.random() < self.malformed_json_rate:
+            # Cut the payload off mid-way, like a response hitting a limit
+            # (decided per prompt, so runs are reproducible under concurrency)
+            text = text[:rng.randint(len(text) // 3, len(text) - 10)]
+        return text
+
+    @staticmethod
+    def _apply_generation_config(text: str, generation_config: Dict = None) -> Dict:
+        """Apply stop sequences and the output token cap to a full response"""
+        config = generation_config or {}
+        for stop in config.get("stop_sequences") or []:
+            index = text.find(stop)
+            if index != -1:
+                text = text[:index]
+        max_tokens = config.get("max_output_tokens")
+        if max_tokens and estimate_tokens(text) > max_tokens:
+            return {"text": truncate_tokens(text, max_tokens), "finish_reason": FINISH_MAX_TOKENS}
+        return {"text": text, "finish_reason": "STOP"}
+
+    def _latency(self, model_name: str, text: str) -> float:
+        return self._sample_latency(model_name) + self.seconds_per_token * estimate_tokens(text)
+
+    def generate(self, model_name: str, prompt: str, generation_config: Dict = None) -> Dict:
+        self._maybe_fail(model_name)
+        response = self._apply_generation_config(self._respond(model_name, prompt), generation_config)
+        time.sleep(self._latency(model_name, response["text"]))
+        return response
+
+    def generate_stream(self, model_name: str, prompt: str, generation_config: Dict = None) -> Iterator[Dict]:
+        self._maybe_fail(model_name)
+        response = self._apply_generation_config(self._respond(model_name, prompt), generation_config)
+        words = response["text"].split(" ")
+        chunks = [
+            " ".join(words[i:i + self.chunk_words]) + ("" if i + self.chunk_words >= len(words) else " ")
+            for i in range(0, len(words), self.chunk_words)
+        ]
+        # Spread the total latency over the chunks, first chunk included
+        per_chunk = self._latency(model_name, response["text"]) / max(1, len(chunks))
+        for index, chunk in enumerate(chunks):
+            time.sleep(per_chunk)
+            last = index == len(chunks) - 1
+            yield {"text": chunk, "finish_reason": response["finish_reason"] if last else None}
+
+    def send_message(
+        self,
+        conversation_id: str,
+        prompt: str,
+        generation_config: Dict = None,
+        remember: bool = True
+    ) -> Dict:
+        conversation = self._conversation(conversation_id)
+        model_name = conversation["model"]
+        self._maybe_fail(model_name)
+        response = self._apply_generation_config(
+            self._respond(model_name, prompt, conversation["history"]), generation_config
+        )
+        time.sleep(self._latency(model_name, response["text"]))
+        if remember:
+            self._remember(conversation_id, prompt, response["text"])
+        return response
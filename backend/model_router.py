@@ -0,0 +1,111 @@
+"""
+Model Router Module
+Chooses the models to try for each generation method and learning level
+Routes come from Config.MODEL_ROUTES; live latency and error statistics
+reorder the models of a route, e.g. to send summaries to the fastest model
+"""
+import random
+import threading
+from typing import Dict, List, Optional, Tuple
+from config import Config
+from .metrics import LatencyTracker, OutcomeTracker
+
+# Route name used for requests that no rule matches
+DEFAULT_ROUTE = "default"
+
+
+class ModelRouter:
+    """
+    Rule-based model routing with latency/error-aware ordering
+
+    A rule is a dict with 'method' and 'level' (either may be "*"), 'models'
+    (preferred models) and 'strategy':
+        "ordered" - try the models in the listed order
+        "fastest" - try the model with the lowest observed median latency
+            first; each model is tried once up front, and a small share of
+            requests leads with another model to keep its latency current
+    With both strategies, models whose recent error rate is above
+    Config.ROUTER_MAX_ERROR_RATE are moved to the back.
+    """
+
+    def __init__(
+        self,
+        latency_tracker: LatencyTracker,
+        outcome_tracker: OutcomeTracker,
+        routes: List[Dict] = None,
+        seed: int = None
+    ):
+        """
+        Args:
+            latency_tracker: Per-model latency samples of successful calls
+            outcome_tracker: Per-model success/failure history
+            routes: Routing rules (defaults to Config.MODEL_ROUTES)
+            seed: Seed for exploration draws
+        """
+        self.latency_tracker = latency_tracker
+        self.outcome_tracker = outcome_tracker
+        self.routes = Config.MODEL_ROUTES if routes is None else routes
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def match(self, method: str, learning_level: str = None) -> Optional[Dict]:
+        """Return the first rule matching a method and learning level"""
+        for rule in self.routes:
+            if rule.get("method", "*") not in ("*", method):
+                continue
+            if rule.get("level", "*") not in ("*", learning_level):
+                continue
+            return rule
+        return None
+
+    @staticmethod
+    def route_name(rule: Dict) -> str:
+        """Name a rule for metrics, e.g. "summary/*" """
+        return rule.get("name") or f"{rule.get('method', '*')}/{rule.get('level', '*')}"
+
+    def _median_latency(self, model_name: str) -> float:
+        return self.latency_tracker.percentile(model_name, 50)
+
+    def _order(self, rule: Dict) -> List[str]:
+        models = list(dict.fromkeys(rule.get("models", [])))
+        if rule.get("strategy") == "fastest" and len(models) > 1:
+            # Models never tried go first so every model gets measured once;
+            # then by observed median latency; models that only ever failed last
+            untried = [m for m in models if self.outcome_tracker.count(m) == 0]
+            timed = sorted(
+                (m for m in models if m not in untried and self.latency_tracker.count(m)),
+                key=self._median_latency
+            )
+            models = untried + timed + [m for m in models if m not in untried and m not in timed]
+
+            # Occasionally lead with another model to keep its numbers current
+            with self._lock:
+                explore = not untried and self._rng.random() < Config.ROUTER_EXPLORE_RATE
+                if explore:
+                    models.insert(0, models.pop(self._rng.randrange(1, len(models))))
+
+        healthy, failing = [], []
+        for model_name in models:
+            unhealthy = (
+                self.outcome_tracker.count(model_name) >= Config.ROUTER_MIN_SAMPLES
+                and self.outcome_tracker.error_rate(model_name) > Config.ROUTER_MAX_ERROR_RATE
+            )
+            (failing if unhealthy else healthy).append(model_name)
+        return healthy + failing
+
+    def route(self, method: str, learning_level: str = None) -> Tuple[str, List[str]]:
+        """
+        Pick the models to try for a request
+
+        Args:
+            method: Generation method ("explanation", "summary", ...)
+            learning_level: User's learning level
+
+        Returns:
+            Tuple of (route name, preferred models in try order); the model
+            list is empty when no rule matches
+        """
+        rule = self.match(method, learning_level)
+        if rule is None:
+            return DEFAULT_ROUTE, []
+        return self.route_name(rule), self._order(rule)
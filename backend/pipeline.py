@@ -0,0 +1,202 @@
+"""
+Generation Pipeline Module
+Runs the explanation -> (summary, quiz) generation flow for a topic
+Summary and quiz only depend on the explanation, so they run concurrently
+"""
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List
+import threading
+import time
+from config import Config
+from .question_bank import sample_quiz
+
+
+def generation_modes(backend=None) -> List[str]:
+    """
+    Generation modes worth offering for a model backend
+
+    "conversation" only saves input tokens when the backend's service keeps
+    the conversation context; elsewhere the history is re-sent with every
+    follow-up and costs more than "separate", so it isn't offered.
+
+    Args:
+        backend: ModelBackend the requests go to (None if not known yet)
+
+    Returns:
+        Mode names, in Config.GENERATION_MODES order
+    """
+    keeps_context = backend is not None and backend.keeps_conversation_context
+    return [mode for mode in Config.GENERATION_MODES if mode != "conversation" or keeps_context]
+
+
+def generate_study_materials(
+    ai_engine,
+    topic: str,
+    learning_level: str,
+    context: str = "",
+    mode: str = None,
+    on_explanation_chunk: Callable[[str], None] = None,
+    question_bank: bool = None,
+    profile: str = None
+) -> Dict:
+    """
+    Generate explanation, summary and quiz for a topic
+
+    In "separate" mode the explanation is generated first; summary and quiz
+    are then started together. A failing stage does not discard the others:
+    its output is None and the error is reported under its stage name.
+
+    When on_explanation_chunk is given, the explanation is streamed and the
+    callback receives the text generated so far after every chunk; summary
+    and quiz start as soon as the stream finishes.
+
+    In "study_pack" mode all three sections come from a single model call,
+    with per-section fallback to the separate calls.
+
+    "conversation" mode runs like "separate", but the explanation opens a
+    conversation holding the source material and the explanation; summary
+    and quiz are follow-up messages that refer to it instead of re-sending
+    it. The explanation isn't streamed: on_explanation_chunk receives it
+    once, complete. On backends that don't keep conversation context (see
+    generation_modes) it falls back to "separate".
+
+    With question_bank, the quiz stage generates a Config.QUESTION_BANK_SIZE
+    question bank instead and the quiz is sampled from it (not in
+    "study_pack" mode; a study pack always carries its own quiz).
+
+    Args:
+        ai_engine: AIEngine used for generation
+        topic: The topic to study
+        learning_level: User's learning level
+        context: Additional context from uploaded files
+        mode: One of Config.GENERATION_MODES (defaults to
+            Config.DEFAULT_GENERATION_MODE)
+        on_explanation_chunk: Optional callback for progressive rendering
+            (not called in "study_pack" mode)
+        question_bank: Generate a question bank (defaults to
+            Config.QUESTION_BANK_ENABLED)
+        profile: Generation profile (defaults to
+            Config.DEFAULT_GENERATION_PROFILE)
+
+    Returns:
+        Dictionary with 'explanation', 'summary', 'quiz_data', 'mode' (the
+        mode used), 'timings' (seconds per stage plus 'total', and
+        'first_chunk' when streaming), 'usage' (model calls and
+        prompt/response sizes), 'truncated' (stages whose output hit the
+        profile's token cap) and 'errors' (stage name -> error message).
+        In "study_pack" mode 'fallback_sections' lists regenerated sections.
+        'question_bank' holds the generated questions when a bank was made.
+    """
+    mode = mode or Config.DEFAULT_GENERATION_MODE
+    if mode not in Config.GENERATION_MODES:
+        raise ValueError(f"Unknown generation mode: {mode}")
+    if mode not in generation_modes(ai_engine.backend):
+        mode = "separate"
+
+    result = {
+        'explanation': None,
+        'summary': None,
+        'quiz_data': None,
+        'mode': mode,
+        'timings': {},
+        'usage': {},
+        'truncated': [],
+        'errors': {}
+    }
+    pipeline_start = time.perf_counter()
+    usage_lock = threading.Lock()
+
+    def timed(stage: str, func, *args):
+        start = time.perf_counter()
+        stage_usage = {}
+        try:
+            with ai_engine.track_usage(stage_usage):
+                return func(*args)
+        finally:
+            result['timings'][stage] = time.perf_counter() - start
+            with usage_lock:
+                for field, value in stage_usage.items():
+                    result['usage'][field] = result['usage'].get(field, 0) + value
+                if stage_usage.get('truncated_responses'):
+                    result['truncated'].append(stage)
+
+    if mode == "study_pack":
+        try:
+            pack = timed(
+                'study_pack',
+                lambda: ai_engine.generate_study_pack(topic, learning_level, context, profile=profile)
+            )
+            result['explanation'] = pack['explanation']
+            result['summary'] = pack['summary']
+            result['quiz_data'] = pack['quiz_data']
+            result['fallback_sections'] = pack['fallback_sections']
+            result['errors'].update(pack['errors'])
+        except Exception as e:
+            result['errors']['explanation'] = str(e)
+        result['timings']['total'] = time.perf_counter() - pipeline_start
+        return result
+
+    def stream_explanation():
+        chunks = []
+        for chunk in ai_engine.stream_explanation(topic, learning_level, context, profile):
+            if not chunks:
+                result['timings']['first_chunk'] = time.perf_counter() - pipeline_start
+            chunks.append(chunk)
+            on_explanation_chunk("".join(chunks))
+        return "".join(chunks)
+
+    try:
+        if mode == "conversation":
+            result['conversation'] = timed(
+                'explanation', ai_engine.start_conversation, topic, learning_level, context, profile
+            )
+            result['explanation'] = result['conversation']['explanation']
+            if on_explanation_chunk is not None:
+                result['timings']['first_chunk'] = time.perf_counter() - pipeline_start
+                on_explanation_chunk(result['explanation'])
+        elif on_explanation_chunk is not None:
+            result['explanation'] = timed('explanation', stream_explanation)
+        else:
+            result['explanation'] = timed(
+                'explanation', ai_engine.generate_explanation, topic, learning_level, context, profile
+            )
+    except Exception as e:
+        result['errors']['explanation'] = str(e)
+        result['timings']['total'] = time.perf_counter() - pipeline_start
+        return result
+
+    explanation = result['explanation']
+    conversation = result.pop('conversation', None)
+    if question_bank is None:
+        question_bank = Config.QUESTION_BANK_ENABLED
+
+    def generate_quiz():
+        if not question_bank:
+            return ai_engine.generate_quiz(
+                topic, explanation, learning_level, profile=profile, conversation=conversation
+            )
+        result['question_bank'] = ai_engine.generate_question_bank(
+            topic, explanation, learning_level, profile=profile, conversation=conversation
+        )
+        return sample_quiz(result['question_bank'])
+
+    try:
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            futures = {
+                ('summary', 'summary'): executor.submit(
+                    timed, 'summary', ai_engine.generate_summary,
+                    topic, explanation, learning_level, profile, conversation
+                ),
+                ('quiz', 'quiz_data'): executor.submit(timed, 'quiz', generate_quiz),
+            }
+            for (stage, key), future in futures.items():
+                try:
+                    result[key] = future.result()
+                except Exception as e:
+                    result['errors'][stage] = str(e)
+    finally:
+        if conversation is not None:
+            ai_engine.end_conversation(conversation)
+
+    result['timings']['total'] = time.perf_counter() - pipeline_start
+    return result
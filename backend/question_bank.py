@@ -0,0 +1,53 @@
+"""
+Question Bank Module
+Samples quizzes locally from a stored pool of questions
+Each sample picks different questions, shuffles their options and remaps
+the answer letters, so retakes need no model call
+"""
+import random
+from typing import Dict, List
+from config import Config
+from .quiz_parser import option_text
+
+
+def shuffle_options(question: Dict, rng: random.Random = None) -> Dict:
+    """
+    Shuffle a question's options and remap its answer letter
+
+    Args:
+        question: Normalized question dict ("A) ..." labelled options)
+        rng: Random generator (defaults to the module-level one)
+
+    Returns:
+        New question dict with relabelled options
+    """
+    rng = rng or random
+    options = [option_text(option) for option in question['options']]
+    correct = ord(question['correct_answer']) - ord('A')
+    order = list(range(len(options)))
+    rng.shuffle(order)
+
+    return {
+        **question,
+        'options': [f"{chr(ord('A') + i)}) {options[original]}" for i, original in enumerate(order)],
+        'correct_answer': chr(ord('A') + order.index(correct)),
+    }
+
+
+def sample_quiz(questions: List[Dict], num_questions: int = None, rng: random.Random = None) -> Dict:
+    """
+    Build a quiz from a question bank without calling the model
+
+    Args:
+        questions: Question bank (normalized question dicts)
+        num_questions: Quiz size (defaults to Config.DEFAULT_QUIZ_QUESTIONS;
+            capped at the bank size)
+        rng: Random generator (defaults to the module-level one)
+
+    Returns:
+        Quiz dictionary with 'questions'
+    """
+    rng = rng or random
+    num_questions = min(num_questions or Config.DEFAULT_QUIZ_QUESTIONS, len(questions))
+    picked = rng.sample(questions, num_questions)
+    return {'questions': [shuffle_options(question, rng) for question in picked]}
@@ -0,0 +1,249 @@
+"""
+Quiz Parser Module
+Incremental, tolerant parsing of quiz JSON produced by the model
+Recovers every well-formed question from truncated or slightly malformed
+output, and can be fed streamed chunks so questions are available as soon
+as they are complete
+"""
+import json
+import re
+from typing import Dict, Iterable, List, Optional
+
+_TRAILING_COMMA = re.compile(r",\s*([}\]])")
+_OPTION_LABEL = re.compile(r"^\s*\(?([A-Za-z])\s*[).:]\s*")
+_ANSWER_LETTER = re.compile(r"^\s*\(?([A-Za-z])\s*(?:[).:]|$)")
+
+
+def normalize_question(raw) -> Optional[Dict]:
+    """
+    Validate and normalize one parsed question
+
+    Options get "A) ", "B) " ... labels when the model left them out, and the
+    correct answer is reduced to its letter (it may arrive as "b", "B) ...",
+    the full option text or a zero-based index).
+
+    Args:
+        raw: Parsed JSON value
+
+    Returns:
+        Question dict with 'question', 'options', 'correct_answer' and
+        'explanation', or None if the value isn't a usable question
+    """
+    if not isinstance(raw, dict):
+        return None
+    question = raw.get("question")
+    options = raw.get("options")
+    if not isinstance(question, str) or not question.strip():
+        return None
+    if not isinstance(options, list) or len(options) < 2 or len(options) > 26:
+        return None
+    if not all(isinstance(option, str) and option.strip() for option in options):
+        return None
+
+    letters = [chr(ord("A") + i) for i in range(len(options))]
+    labelled = []
+    for letter, option in zip(letters, options):
+        option = option.strip()
+        match = _OPTION_LABEL.match(option)
+        if match and match.group(1).upper() == letter:
+            labelled.append(f"{letter}) {option[match.end():]}")
+        else:
+            labelled.append(f"{letter}) {option}")
+
+    answer = raw.get("correct_answer", raw.get("answer"))
+    letter = None
+    if isinstance(answer, int) and not isinstance(answer, bool) and 0 <= answer < len(options):
+        letter = letters[answer]
+    elif isinstance(answer, str):
+        match = _ANSWER_LETTER.match(answer)
+        if match and match.group(1).upper() in letters:
+            letter = match.group(1).upper()
+        else:
+            stripped = [option_text(option).lower() for option in options]
+            text = option_text(answer).lower()
+            if text in stripped:
+                letter = letters[stripped.index(text)]
+    if letter is None:
+        return None
+
+    explanation = raw.get("explanation")
+    return {
+        "question": question.strip(),
+        "options": labelled,
+        "correct_answer": letter,
+        "explanation": explanation.strip() if isinstance(explanation, str) else "",
+    }
+
+
+def option_text(option: str) -> str:
+    """Option text without its "A) " style label"""
+    return _OPTION_LABEL.sub("", option, count=1).strip()
+
+
+def _loads_tolerant(text: str):
+    """json.loads that also accepts raw newlines in strings and trailing commas"""
+    try:
+        return json.loads(text, strict=False)
+    except json.JSONDecodeError:
+        return json.loads(_TRAILING_COMMA.sub(r"\1", text), strict=False)
+
+
+class QuizStreamParser:
+    """
+    Incremental parser pulling complete questions out of quiz JSON
+
+    The text is scanned once, tracking strings, escapes and nesting. Every
+    object that closes without containing another object is a question
+    candidate and is parsed on its own, so one broken question (or a cut-off
+    tail) doesn't cost the others. Works on plain quiz JSON, study-pack JSON,
+    bare arrays and markdown-fenced output alike.
+
+    Chunks are kept in a list rather than concatenated, and only the text
+    from the oldest open candidate onwards is held, so a long stream is
+    parsed in linear time.
+    """
+
+    def __init__(self):
+        # Text not yet discarded, as received, starting at offset self._offset
+        self._chunks: List[str] = []
+        self._offset = 0
+        self._position = 0
+        self._in_string = False
+        self._escaped = False
+        # Start offset and "contains an object" flag per open object
+        self._open_objects: List[List] = []
+        self._seen = set()
+        self.questions: List[Dict] = []
+        self.rejected = 0
+
+    def feed(self, chunk: str) -> List[Dict]:
+        """
+        Add a chunk of model output
+
+        Args:
+            chunk: Next piece of the response text
+
+        Returns:
+            Questions completed by this chunk
+        """
+        self._chunks.append(chunk)
+        completed = []
+
+        for index, char in enumerate(chunk, self._position):
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == "\\":
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+                continue
+
+            if char == '"':
+                self._in_string = True
+            elif char == "{":
+                if self._open_objects:
+                    self._open_objects[-1][1] = True
+                self._open_objects.append([index, False])
+            elif char == "}" and self._open_objects:
+                start, has_child = self._open_objects.pop()
+                if not has_child:
+                    question = self._parse_candidate(self._slice(start, index + 1))
+                    if question is not None:
+                        completed.append(question)
+
+        self._position += len(chunk)
+        self._discard_parsed()
+        self.questions.extend(completed)
+        return completed
+
+    def _slice(self, start: int, end: int) -> str:
+        """Held text between two absolute offsets"""
+        if len(self._chunks) > 1:
+            self._chunks = ["".join(self._chunks)]
+        return self._chunks[0][start - self._offset:end - self._offset]
+
+    def _discard_parsed(self):
+        """Drop text before the oldest open object that can still be a question"""
+        candidates = [start for start, has_child in self._open_objects if not has_child]
+        keep_from = min(candidates) if candidates else self._position
+        if keep_from > self._offset:
+            self._chunks = [self._slice(keep_from, self._position)]
+            self._offset = keep_from
+
+    def _parse_candidate(self, candidate: str) -> Optional[Dict]:
+        try:
+            question = normalize_question(_loads_tolerant(candidate))
+        except json.JSONDecodeError:
+            question = None
+        if question is None:
+            self.rejected += 1
+            return None
+        # Models sometimes repeat a question; keep the first copy
+        key = question["question"].lower()
+        if key in self._seen:
+            return None
+        self._seen.add(key)
+        return question
+
+
+def parse_quiz_questions(chunks: Iterable[str]) -> List[Dict]:
+    """
+    Recover all well-formed questions from a quiz response
+
+    Args:
+        chunks: The response text, or an iterable of streamed chunks
+
+    Returns:
+        Normalized question dicts, in response order
+    """
+    parser = QuizStreamParser()
+    for chunk in ([chunks] if isinstance(chunks, str) else chunks):
+        parser.feed(chunk)
+    return parser.questions
+
+
+def recover_string_field(text: str, key: str) -> Optional[str]:
+    """
+    Read a complete top-level string field out of possibly broken JSON
+
+    Used to salvage sections of a truncated study pack, e.g. the explanation
+    and summary that precede a cut-off quiz.
+
+    Args:
+        text: Raw response text
+        key: Field name
+
+    Returns:
+        The decoded string, or None if the field isn't complete
+    """
+    pattern = re.compile(r'"' + re.escape(key) + r'"\s*:\s*"((?:[^"\\]|\\.)*)"', re.DOTALL)
+    for match in pattern.finditer(text):
+        # Skip same-named fields of nested objects (e.g. a question's explanation)
+        if _depth_at(text, match.start()) != 1:
+            continue
+        try:
+            return json.loads(f'"{match.group(1)}"', strict=False)
+        except json.JSONDecodeError:
+            return None
+    return None
+
+
+def _depth_at(text: str, offset: int) -> int:
+    """Object nesting depth at an offset, ignoring braces inside strings"""
+    depth, in_string, escaped = 0, False, False
+    for char in text[:offset]:
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            elif char == '"':
+                in_string = False
+        elif char == '"':
+            in_string = True
+        elif char == "{":
+            depth += 1
+        elif char == "}":
+            depth -= 1
+    return depth
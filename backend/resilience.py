@@ -0,0 +1,236 @@
+"""
+Resilience Module
+Retry with backoff, per-model circuit breakers and a process-wide token bucket
+Keeps quota storms and transient model errors from reaching the app
+"""
+import random
+import re
+import threading
+import time
+from typing import Dict, Tuple
+from google.api_core import exceptions as google_exceptions
+from config import Config
+
+# Errors worth retrying on the same model
+_TRANSIENT_ERRORS = (
+    google_exceptions.TooManyRequests,
+    google_exceptions.ResourceExhausted,
+    google_exceptions.ServiceUnavailable,
+    google_exceptions.DeadlineExceeded,
+    google_exceptions.InternalServerError,
+    ConnectionError,
+    TimeoutError,
+)
+
+# Errors meaning the model itself can't be used with this key
+_MODEL_UNAVAILABLE_ERRORS = (
+    google_exceptions.NotFound,
+    google_exceptions.PermissionDenied,
+)
+
+_RETRY_DELAY_PATTERN = re.compile(r"retry(?:_delay)?[^0-9]{0,20}(\d+(?:\.\d+)?)\s*s", re.IGNORECASE)
+
+# Process-wide shared state, keyed by API key (and model for breakers)
+_TOKEN_BUCKETS: Dict[str, "TokenBucket"] = {}
+_CIRCUIT_BREAKERS: Dict[Tuple[str, str], "CircuitBreaker"] = {}
+_SHARED_LOCK = threading.Lock()
+
+
+class GenerationError(Exception):
+    """Raised when no model could produce a response"""
+
+
+def is_rate_limit_error(error: Exception) -> bool:
+    """Check whether an error is a quota / rate-limit response"""
+    return isinstance(error, (google_exceptions.TooManyRequests, google_exceptions.ResourceExhausted))
+
+
+def is_transient_error(error: Exception) -> bool:
+    """Check whether an error is worth retrying on the same model"""
+    return isinstance(error, _TRANSIENT_ERRORS)
+
+
+def is_model_unavailable_error(error: Exception) -> bool:
+    """Check whether an error means the model can't be used at all"""
+    return isinstance(error, _MODEL_UNAVAILABLE_ERRORS)
+
+
+def backoff_delay(attempt: int, error: Exception = None) -> float:
+    """
+    Compute how long to wait before the next retry
+
+    Uses exponential backoff with full jitter. For rate-limit errors that
+    carry a server-suggested retry delay, that delay is used as the minimum.
+
+    Args:
+        attempt: Zero-based retry attempt
+        error: The error that triggered the retry
+
+    Returns:
+        Delay in seconds
+    """
+    ceiling = min(
+        Config.MODEL_BACKOFF_MAX_SECONDS,
+        Config.MODEL_BACKOFF_BASE_SECONDS * (2 ** attempt)
+    )
+    delay = random.uniform(0, ceiling)
+
+    if error is not None and is_rate_limit_error(error):
+        match = _RETRY_DELAY_PATTERN.search(str(error))
+        if match:
+            delay = max(delay, min(float(match.group(1)), Config.MODEL_BACKOFF_MAX_SECONDS))
+    return delay
+
+
+def get_token_bucket(api_key: str) -> "TokenBucket":
+    """Return the process-wide request token bucket for an API key"""
+    with _SHARED_LOCK:
+        bucket = _TOKEN_BUCKETS.get(api_key)
+        if bucket is None:
+            bucket = TokenBucket(
+                rate_per_second=Config.MODEL_REQUESTS_PER_MINUTE / 60.0,
+                capacity=Config.MODEL_REQUEST_BURST
+            )
+            _TOKEN_BUCKETS[api_key] = bucket
+        return bucket
+
+
+def get_circuit_breaker(api_key: str, model_name: str) -> "CircuitBreaker":
+    """Return the process-wide circuit breaker for an API key and model"""
+    with _SHARED_LOCK:
+        breaker = _CIRCUIT_BREAKERS.get((api_key, model_name))
+        if breaker is None:
+            breaker = CircuitBreaker(
+                failure_threshold=Config.CIRCUIT_BREAKER_FAILURE_THRESHOLD,
+                reset_seconds=Config.CIRCUIT_BREAKER_RESET_SECONDS
+            )
+            _CIRCUIT_BREAKERS[(api_key, model_name)] = breaker
+        return breaker
+
+
+class TokenBucket:
+    """Thread-safe token bucket limiting the request rate"""
+
+    def __init__(self, rate_per_second: float, capacity: int):
+        """
+        Args:
+            rate_per_second: Tokens added per second
+            capacity: Maximum burst size
+        """
+        self.rate_per_second = rate_per_second
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float):
+        elapsed = now - self._updated_at
+        self._tokens = min(self.capacity, self._tokens + elapsed * self.rate_per_second)
+        self._updated_at = now
+
+    def acquire(self, timeout: float = None) -> bool:
+        """
+        Take one token, waiting for a refill if necessary
+
+        Args:
+            timeout: Maximum seconds to wait (None waits as long as needed)
+
+        Returns:
+            True if a token was taken, False on timeout
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return True
+                wait = (1 - self._tokens) / self.rate_per_second
+
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                wait = min(wait, remaining)
+            time.sleep(wait)
+
+
+class CircuitBreaker:
+    """
+    Per-model circuit breaker
+
+    Closed: calls flow normally. After failure_threshold consecutive
+    failures the breaker opens and calls are skipped. Once reset_seconds
+    have passed, one trial call is let through (half-open); its outcome
+    closes or re-opens the breaker.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int, reset_seconds: float):
+        """
+        Args:
+            failure_threshold: Consecutive failures before opening
+            reset_seconds: Seconds to stay open before a trial call
+        """
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+        self._trial_started_at = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        """Current breaker state"""
+        with self._lock:
+            if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_seconds:
+                return self.HALF_OPEN
+            return self._state
+
+    def allow(self) -> bool:
+        """Check whether a call may be made now"""
+        with self._lock:
+            if self._state == self.CLOSED:
+                return True
+            now = time.monotonic()
+            if now - self._opened_at < self.reset_seconds:
+                return False
+            # Half-open: let a single trial call through (a trial that never
+            # reported back is given up on after another reset period)
+            if self._trial_in_flight and now - self._trial_started_at < self.reset_seconds:
+                return False
+            self._state = self.HALF_OPEN
+            self._trial_in_flight = True
+            self._trial_started_at = now
+            return True
+
+    def record_success(self):
+        """Close the breaker after a successful call"""
+        with self._lock:
+            self._state = self.CLOSED
+            self._failures = 0
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        """Count a failed call, opening the breaker at the threshold"""
+        with self._lock:
+            self._failures += 1
+            self._trial_in_flight = False
+            if self._state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                self._state = self.OPEN
+                self._opened_at = time.monotonic()
+
+    def trip(self):
+        """Open the breaker immediately (e.g. the model does not exist)"""
+        with self._lock:
+            self._failures = max(self._failures, self.failure_threshold)
+            self._trial_in_flight = False
+            self._state = self.OPEN
+            self._opened_at = time.monotonic()
@@ -0,0 +1,248 @@
+"""
+Response Cache Module
+Persistent content-addressed cache for model responses using SQLite
+Entries are keyed by a hash of the model name, the final prompt and the
+generation settings
+"""
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional
+from config import Config
+
+# Process-wide shared cache instance
+_SHARED_CACHE = None
+_SHARED_CACHE_LOCK = threading.Lock()
+
+
+def get_response_cache() -> "ResponseCache":
+    """Return the process-wide response cache"""
+    global _SHARED_CACHE
+    with _SHARED_CACHE_LOCK:
+        if _SHARED_CACHE is None:
+            _SHARED_CACHE = ResponseCache()
+        return _SHARED_CACHE
+
+
+class ResponseCache:
+    """SQLite-backed LRU + TTL cache for model responses"""
+
+    def __init__(
+        self,
+        db_path: str = Config.RESPONSE_CACHE_PATH,
+        max_entries: int = Config.RESPONSE_CACHE_MAX_ENTRIES,
+        ttl_seconds: int = Config.RESPONSE_CACHE_TTL_SECONDS,
+        enabled_methods: Dict[str, bool] = None
+    ):
+        """
+        Initialize the cache and create its table if it doesn't exist
+
+        Args:
+            db_path: SQLite file holding the cache
+            max_entries: Maximum number of entries kept (least recently used
+                entries are evicted first)
+            ttl_seconds: Entries older than this are treated as misses
+            enabled_methods: Method name -> whether caching is enabled
+                (defaults to Config.RESPONSE_CACHE_METHODS)
+        """
+        self.db_path = db_path
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.enabled_methods = dict(
+            enabled_methods if enabled_methods is not None else Config.RESPONSE_CACHE_METHODS
+        )
+        self._lock = threading.Lock()
+        self._stats: Dict[str, Dict[str, int]] = {}
+        self.init_cache()
+
+    def get_connection(self):
+        """Get cache database connection"""
+        return sqlite3.connect(self.db_path, timeout=30)
+
+    def init_cache(self):
+        """Create the cache table if it doesn't exist"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+
+        # WAL lets concurrent sessions read while one of them writes
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS llm_cache (
+                key TEXT PRIMARY KEY,
+                method TEXT NOT NULL,
+                model TEXT NOT NULL,
+                response TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                last_accessed REAL NOT NULL
+            )
+        """)
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_llm_cache_last_accessed
+            ON llm_cache (last_accessed)
+        """)
+
+        conn.commit()
+        conn.close()
+
+    @staticmethod
+    def make_key(model_name: str, prompt: str, settings: Dict = None) -> str:
+        """Hash a model name, prompt and generation settings into a cache key"""
+        digest = hashlib.sha256()
+        digest.update(model_name.encode("utf-8"))
+        digest.update(b"\0")
+        digest.update(prompt.encode("utf-8"))
+        if settings:
+            digest.update(b"\0")
+            digest.update(json.dumps(settings, sort_keys=True).encode("utf-8"))
+        return digest.hexdigest()
+
+    def is_enabled(self, method: str) -> bool:
+        """Check whether caching is enabled for a generation method"""
+        return self.enabled_methods.get(method, False)
+
+    def set_enabled(self, method: str, enabled: bool):
+        """Enable or disable caching for a generation method"""
+        self.enabled_methods[method] = enabled
+
+    def _count(self, method: str, outcome: str):
+        with self._lock:
+            counters = self._stats.setdefault(method, {"hits": 0, "misses": 0})
+            counters[outcome] += 1
+
+    def get(self, method: str, model_name: str, prompt: str, settings: Dict = None) -> Optional[str]:
+        """
+        Look up a cached response
+
+        Args:
+            method: Generation method name (e.g. "explanation")
+            model_name: Model the response would come from
+            prompt: Final prompt text
+            settings: Generation settings the response was produced with
+
+        Returns:
+            Cached response text, or None on a miss
+        """
+        return self.get_any(method, [model_name], prompt, settings)
+
+    def get_any(self, method: str, model_names: List[str], prompt: str, settings: Dict = None) -> Optional[str]:
+        """
+        Look up a cached response from any of several models in one query
+
+        One request counts as one hit or miss, however many models it
+        could be answered by.
+
+        Args:
+            method: Generation method name (e.g. "explanation")
+            model_names: Models the response may come from, in order of preference
+            prompt: Final prompt text
+            settings: Generation settings the response was produced with
+
+        Returns:
+            Cached response text of the first model that has one, or None on a miss
+        """
+        if not self.is_enabled(method):
+            return None
+
+        keys = [self.make_key(model_name, prompt, settings) for model_name in dict.fromkeys(model_names)]
+        now = time.time()
+        conn = self.get_connection()
+        cursor = conn.cursor()
+
+        placeholders = ", ".join("?" for _ in keys)
+        cursor.execute(
+            f"SELECT key, response, created_at FROM llm_cache WHERE key IN ({placeholders})", keys
+        )
+        rows = {key: (response, created_at) for key, response, created_at in cursor.fetchall()}
+
+        response = None
+        for key in keys:
+            row = rows.get(key)
+            if row and now - row[1] <= self.ttl_seconds:
+                response = row[0]
+                cursor.execute(
+                    "UPDATE llm_cache SET last_accessed = ? WHERE key = ?", (now, key)
+                )
+                break
+        # Expired
+        cursor.executemany(
+            "DELETE FROM llm_cache WHERE key = ?",
+            [(key,) for key, (_, created_at) in rows.items() if now - created_at > self.ttl_seconds]
+        )
+
+        conn.commit()
+        conn.close()
+
+        self._count(method, "hits" if response is not None else "misses")
+        return response
+
+    def put(self, method: str, model_name: str, prompt: str, response: str, settings: Dict = None):
+        """
+        Store a response and evict expired and least recently used entries
+
+        Args:
+            method: Generation method name
+            model_name: Model that produced the response
+            prompt: Final prompt text
+            response: Response text
+            settings: Generation settings the response was produced with
+        """
+        if not self.is_enabled(method):
+            return
+
+        key = self.make_key(model_name, prompt, settings)
+        now = time.time()
+        conn = self.get_connection()
+        cursor = conn.cursor()
+
+        cursor.execute("""
+            INSERT OR REPLACE INTO llm_cache
+            (key, method, model, response, created_at, last_accessed)
+            VALUES (?, ?, ?, ?, ?, ?)
+        """, (key, method, model_name, response, now, now))
+
+        cursor.execute(
+            "DELETE FROM llm_cache WHERE created_at < ?", (now - self.ttl_seconds,)
+        )
+        cursor.execute("SELECT COUNT(*) FROM llm_cache")
+        excess = cursor.fetchone()[0] - self.max_entries
+        if excess > 0:
+            cursor.execute("""
+                DELETE FROM llm_cache WHERE key IN (
+                    SELECT key FROM llm_cache ORDER BY last_accessed ASC LIMIT ?
+                )
+            """, (excess,))
+
+        conn.commit()
+        conn.close()
+
+    def clear(self):
+        """Remove every cached response"""
+        conn = self.get_connection()
+        conn.execute("DELETE FROM llm_cache")
+        conn.commit()
+        conn.close()
+
+    def get_stats(self) -> Dict:
+        """
+        Get hit/miss counters per method plus the current entry count
+
+        Returns:
+            Dictionary with 'methods' (method -> hits/misses/hit_rate) and
+            'entries'
+        """
+        with self._lock:
+            methods = {
+                method: {
+                    **counters,
+                    "hit_rate": counters["hits"] / max(1, counters["hits"] + counters["misses"])
+                }
+                for method, counters in self._stats.items()
+            }
+
+        conn = self.get_connection()
+        entries = conn.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0]
+        conn.close()
+
+        return {"methods": methods, "entries": entries}
@@ -0,0 +1,230 @@
+"""
+Retrieval Module
+Splits long documents into overlapping chunks and ranks them against the
+requested topic with BM25, so the relevant part of an upload reaches the
+prompt wherever it is in the document
+"""
+import math
+import re
+from collections import defaultdict
+from functools import lru_cache
+from typing import Dict, List, Tuple
+from config import Config
+from .context_packer import estimate_tokens, truncate_tokens
+
+_TERM = re.compile(r"\w+")
+_WORD = re.compile(r"\S+")
+
+STOPWORDS = frozenset(
+    "the a an and or of to in on for with by from what how why is are was were does do "
+    "about into this that these those it its as at be been has have had not but which "
+    "their there they them than then also can may such".split()
+)
+
+# BM25 term frequency saturation and length normalization
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+
+def _fold(term: str) -> str:
+    """Fold simple plurals ("circuits" -> "circuit", "theories" -> "theory")"""
+    if len(term) > 4 and term.endswith("ies"):
+        return term[:-3] + "y"
+    if len(term) > 3 and term.endswith("s") and not term.endswith(("ss", "us", "is")):
+        return term[:-1]
+    return term
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase index terms of a text, without stopwords and single characters"""
+    return [_fold(term) for term in _TERM.findall(text.lower()) if len(term) > 1 and term not in STOPWORDS]
+
+
+def chunk_text(text: str, chunk_tokens: int = None, overlap_tokens: int = None) -> List[Dict]:
+    """
+    Split text into overlapping chunks of about chunk_tokens estimated tokens
+
+    Chunks are cut at whitespace; consecutive chunks share their last and
+    first overlap_tokens tokens so a passage cut at a boundary is whole in
+    one of them.
+
+    Args:
+        text: Text to split
+        chunk_tokens: Tokens per chunk (defaults to Config.RETRIEVAL_CHUNK_TOKENS)
+        overlap_tokens: Tokens shared by neighbouring chunks (defaults to
+            Config.RETRIEVAL_CHUNK_OVERLAP_TOKENS)
+
+    Returns:
+        List of chunk dicts with 'index', 'text', 'tokens', 'start' and 'end'
+        (character offsets) and 'words' (word index range)
+    """
+    return [dict(chunk) for chunk in _chunk(text, chunk_tokens, overlap_tokens)[0]]
+
+
+def _chunk(text: str, chunk_tokens: int = None, overlap_tokens: int = None) -> Tuple[List[Dict], List[Tuple[int, int, int]]]:
+    """Chunks plus (start, end, tokens) of every word"""
+    chunk_tokens = chunk_tokens or Config.RETRIEVAL_CHUNK_TOKENS
+    overlap_tokens = Config.RETRIEVAL_CHUNK_OVERLAP_TOKENS if overlap_tokens is None else overlap_tokens
+    words = [(match.start(), match.end(), estimate_tokens(match.group())) for match in _WORD.finditer(text)]
+
+    chunks, start = [], 0
+    while start < len(words):
+        end, tokens = start, 0
+        while end < len(words) and (end == start or tokens + words[end][2] <= chunk_tokens):
+            tokens += words[end][2]
+            end += 1
+        chunks.append({
+            "index": len(chunks),
+            "text": text[words[start][0]:words[end - 1][1]],
+            "tokens": tokens,
+            "start": words[start][0],
+            "end": words[end - 1][1],
+            "words": (start, end),
+        })
+        if end >= len(words):
+            break
+        # Step back by the overlap, always moving forward
+        next_start, shared = end, 0
+        while next_start - 1 > start and shared + words[next_start - 1][2] <= overlap_tokens:
+            next_start -= 1
+            shared += words[next_start][2]
+        start = next_start
+    return chunks, words
+
+
+class BM25Index:
+    """In-memory BM25 (Okapi) index over a list of documents"""
+
+    def __init__(self, documents: List[str], k1: float = BM25_K1, b: float = BM25_B):
+        """
+        Build the index
+
+        Args:
+            documents: Texts to index (chunks)
+            k1: Term frequency saturation
+            b: Document length normalization (0 - none, 1 - full)
+        """
+        self.k1 = k1
+        self.b = b
+        self.size = len(documents)
+        self.lengths = []
+        # term -> [(document index, term frequency)]
+        self.postings: Dict[str, List[Tuple[int, int]]] = defaultdict(list)
+        for index, document in enumerate(documents):
+            terms = tokenize(document)
+            self.lengths.append(len(terms))
+            counts = defaultdict(int)
+            for term in terms:
+                counts[term] += 1
+            for term, count in counts.items():
+                self.postings[term].append((index, count))
+        self.average_length = sum(self.lengths) / max(1, self.size) or 1.0
+
+    def idf(self, term: str) -> float:
+        """Inverse document frequency of a term (always positive)"""
+        frequency = len(self.postings.get(term, ()))
+        return math.log(1 + (self.size - frequency + 0.5) / (frequency + 0.5))
+
+    def scores(self, query: str) -> List[float]:
+        """
+        Score every document against a query
+
+        Args:
+            query: Query text (e.g. the topic)
+
+        Returns:
+            BM25 score per document, in document order
+        """
+        scores = [0.0] * self.size
+        for term in set(tokenize(query)):
+            postings = self.postings.get(term)
+            if not postings:
+                continue
+            idf = self.idf(term)
+            for index, count in postings:
+                norm = self.k1 * (1 - self.b + self.b * self.lengths[index] / self.average_length)
+                scores[index] += idf * count * (self.k1 + 1) / (count + norm)
+        return scores
+
+
+@lru_cache(maxsize=8)
+def _indexed_chunks(text: str, chunk_tokens: int, overlap_tokens: int):
+    """Chunks, word offsets and BM25 index of a text, reused across the calls of a request"""
+    chunks, words = _chunk(text, chunk_tokens, overlap_tokens)
+    return chunks, words, BM25Index([chunk["text"] for chunk in chunks])
+
+
+def select_chunks(
+    text: str,
+    query: str,
+    budget: int,
+    chunk_tokens: int = None,
+    overlap_tokens: int = None
+) -> Dict:
+    """
+    Keep the chunks of a text that best match a query, within a token budget
+
+    Chunks are taken in BM25 score order (document order among equal
+    scores, so a text without matches keeps its beginning) while they fit
+    the budget; text shared with an already selected neighbour isn't
+    counted twice. The kept text is put back in document order, with
+    non-adjacent passages separated by blank lines.
+
+    Args:
+        text: Source text
+        query: Topic the chunks should be relevant to
+        budget: Maximum estimated tokens to keep
+        chunk_tokens: Tokens per chunk (defaults to Config.RETRIEVAL_CHUNK_TOKENS)
+        overlap_tokens: Tokens shared by neighbouring chunks (defaults to
+            Config.RETRIEVAL_CHUNK_OVERLAP_TOKENS)
+
+    Returns:
+        Dictionary with 'text', 'tokens', 'original_tokens' and 'chunks'
+        (indexes of the selected chunks, in document order)
+    """
+    chunk_tokens = chunk_tokens or Config.RETRIEVAL_CHUNK_TOKENS
+    if overlap_tokens is None:
+        overlap_tokens = Config.RETRIEVAL_CHUNK_OVERLAP_TOKENS
+    chunks, words, index = _indexed_chunks(text, chunk_tokens, overlap_tokens)
+    original_tokens = sum(tokens for _, _, tokens in words)
+    if original_tokens <= budget:
+        return {"text": text, "tokens": original_tokens, "original_tokens": original_tokens,
+                "chunks": list(range(len(chunks)))}
+
+    scores = index.scores(query)
+    ranked = sorted(range(len(chunks)), key=lambda i: (-scores[i], i))
+
+    covered = bytearray(len(words))
+    selected, used = [], 0
+    for chunk_index in ranked:
+        first, last = chunks[chunk_index]["words"]
+        cost = sum(words[w][2] for w in range(first, last) if not covered[w])
+        if cost == 0 or used + cost > budget:
+            continue
+        covered[first:last] = b"\x01" * (last - first)
+        selected.append(chunk_index)
+        used += cost
+        if budget - used < chunk_tokens // 4:
+            break
+
+    if not selected:
+        # Not even one chunk fits: keep the start of the best one
+        packed = truncate_tokens(chunks[ranked[0]]["text"], budget) if chunks else ""
+        return {"text": packed, "tokens": estimate_tokens(packed), "original_tokens": original_tokens,
+                "chunks": [ranked[0]] if chunks else []}
+
+    passages, run_start = [], None
+    for w in range(len(words) + 1):
+        if w < len(words) and covered[w]:
+            if run_start is None:
+                run_start = w
+        elif run_start is not None:
+            passages.append(text[words[run_start][0]:words[w - 1][1]])
+            run_start = None
+
+    return {
+        "text": "\n\n".join(passages),
+        "tokens": used,
+        "original_tokens": original_tokens,
+        "chunks": sorted(selected),
+    }
@@ -0,0 +1,215 @@
+"""
+Text Normalizer Module
+Cleans extracted document text before it is used as prompt context:
+running headers and footers repeated across pages, page numbers,
+boilerplate lines, words hyphenated across line breaks and whitespace runs
+all cost input tokens without adding content
+Works on the extractors' page/block iterators, so it runs inline and keeps
+the early-stop budget
+"""
+import re
+from collections import Counter
+from functools import partial
+from itertools import chain
+from typing import Dict, Iterable, Iterator, List, Set
+from config import Config
+from .context_packer import estimate_tokens
+
+# Lines compared as header/footer candidates at each end of a page
+_EDGE_LINES = 3
+# Lines up to this long match across pages with their numbers ignored
+# ("Chapter 3 | Page 47"); longer lines must repeat exactly
+_SHORT_LINE = 60
+# Longest line checked for a page number ("- Page 123 of 456 -")
+_PAGE_NUMBER_LINE = 24
+
+_DIGITS = re.compile(r"\d+")
+# Checked for a preceding letter in _join_hyphenated (a lookbehind is slower)
+_HYPHENATED_BREAK = re.compile(r"[-\u00ad]\n(?=[a-z])")
+_SOFT_HYPHEN = re.compile(r"\u00ad")
+# Whitespace runs and non-space whitespace; single spaces are left alone
+_INLINE_SPACE = re.compile(r"(?:[\t\u00a0\u2000-\u200b]| (?=[ \t\u00a0\u2000-\u200b]))[ \t\u00a0\u2000-\u200b]*")
+_SPACE_AROUND_NEWLINE = re.compile(r" *\n *")
+_BLANK_LINES = re.compile(r"\n{3,}")
+
+# Page number lines ("12", "- 12 -", "Page 12", "12 of 300", "Page 12/300")
+_PAGE_NUMBER = re.compile(r"^[-–—\s]*(?:page\s*)?#(?:\s*(?:of|/)\s*#)?[-–—\s]*$", re.IGNORECASE)
+# Lines that are boilerplate wherever they appear
+_BOILERPLATE = re.compile(
+    r"^(?:"
+    r"(?:©|\(c\)|copyright\b).{0,120}"
+    r"|.{0,120}\ball rights reserved\.?"
+    r"|this page (?:is )?intentionally left blank\.?"
+    r"|(?:downloaded|retrieved) from\s+\S+.{0,80}"
+    r")$",
+    re.IGNORECASE
+)
+
+
+def _line_key(line: str) -> str:
+    """Comparison key of a line for header/footer detection"""
+    line = line.strip().lower()
+    return _DIGITS.sub("#", line) if len(line) <= _SHORT_LINE else line
+
+
+def _edge_keys(lines: List[str]) -> Set[str]:
+    """Keys of a page's first and last non-empty lines"""
+    content = [line for line in lines if line.strip()]
+    return {_line_key(line) for line in content[:_EDGE_LINES] + content[-_EDGE_LINES:]}
+
+
+def _new_stats() -> Dict:
+    return {
+        'original_chars': 0,
+        'chars': 0,
+        'original_tokens': 0,
+        'tokens': 0,
+        'header_footer_lines': 0,
+        'boilerplate_lines': 0,
+        'hyphenations': 0,
+    }
+
+
+def _join_hyphenated(stats: Dict, match: re.Match) -> str:
+    """Join a word hyphenated across a line break (the hyphen follows a letter)"""
+    start = match.start()
+    if start and match.string[start - 1].isalpha():
+        stats['hyphenations'] += 1
+        return ""
+    return match.group()
+
+
+def _clean(text: str, stats: Dict, repeated: Set[str] = frozenset(), paged: bool = False) -> str:
+    """Drop repeated edge lines and boilerplate, join hyphenated words, collapse whitespace"""
+    lines = text.split("\n")
+    content = [i for i, line in enumerate(lines) if line.strip()]
+    edges = set(content[:_EDGE_LINES] + content[-_EDGE_LINES:]) if repeated else set()
+
+    kept = []
+    for i, line in enumerate(lines):
+        stripped = line.strip()
+        if stripped:
+            if i in edges and _line_key(stripped) in repeated:
+                stats['header_footer_lines'] += 1
+                continue
+            if (
+                paged and len(stripped) <= _PAGE_NUMBER_LINE and _PAGE_NUMBER.match(_DIGITS.sub("#", stripped))
+            ) or _BOILERPLATE.match(stripped):
+                stats['boilerplate_lines'] += 1
+                continue
+        kept.append(line)
+
+    text = _INLINE_SPACE.sub(" ", "\n".join(kept))
+    text = _SPACE_AROUND_NEWLINE.sub("\n", text)
+    text = _HYPHENATED_BREAK.sub(partial(_join_hyphenated, stats), text)
+    text = _SOFT_HYPHEN.sub("", text)
+    return _BLANK_LINES.sub("\n\n", text)
+
+
+def _count(stats: Dict, original: str, cleaned: str, with_tokens: bool):
+    stats['original_chars'] += len(original)
+    stats['chars'] += len(cleaned)
+    if with_tokens:
+        stats['original_tokens'] += estimate_tokens(original)
+        stats['tokens'] += estimate_tokens(cleaned)
+
+
+def normalize_pages(pages: Iterable[str], stats: Dict = None) -> Iterator[str]:
+    """
+    Normalize the pages of a paged document (PDF) as they are extracted
+
+    Header and footer lines are learned from the first
+    Config.NORMALIZE_SAMPLE_PAGES pages: a line at the top or bottom of a
+    page that recurs there on at least Config.NORMALIZE_REPEAT_RATIO of the
+    sampled pages is removed from every page. Page numbers and boilerplate
+    lines are dropped, words hyphenated across a line (or page) break are
+    joined, and whitespace runs collapsed.
+
+    Args:
+        pages: Page texts, in order
+        stats: Optional dict filled with the reduction of the text read
+            (see normalization_report)
+
+    Yields:
+        Cleaned pages, each ending with a newline
+    """
+    with_tokens = stats is not None
+    stats = stats if stats is not None else {}
+    for field, value in _new_stats().items():
+        stats.setdefault(field, value)
+
+    pages = iter(pages)
+    sample = []
+    for page in pages:
+        sample.append(page)
+        if len(sample) >= Config.NORMALIZE_SAMPLE_PAGES:
+            break
+
+    repeated: Set[str] = set()
+    if len(sample) >= 3:
+        counts = Counter(key for page in sample for key in _edge_keys(page.split("\n")))
+        threshold = max(2, Config.NORMALIZE_REPEAT_RATIO * len(sample))
+        repeated = {key for key, count in counts.items() if count >= threshold}
+
+    pending = None
+    for page in chain(sample, pages):
+        cleaned = _clean(page, stats, repeated, paged=True).strip("\n")
+        cleaned = cleaned + "\n" if cleaned else ""
+        _count(stats, page, cleaned, with_tokens)
+        if not cleaned:
+            continue
+        if pending is not None:
+            if pending.endswith("-\n") and pending[-3:-2].isalpha() and cleaned[:1].islower():
+                # A word hyphenated across the page break
+                stats['hyphenations'] += 1
+                pending = pending[:-2]
+            else:
+                pending += "\n"
+            yield pending
+        pending = cleaned
+    if pending:
+        yield pending
+
+
+def normalize_blocks(blocks: Iterable[str], stats: Dict = None) -> Iterator[str]:
+    """
+    Normalize text that has no pages (TXT blocks, DOCX paragraphs)
+
+    Boilerplate lines are dropped, hyphenated line breaks joined and
+    whitespace runs collapsed; there is no header/footer detection.
+
+    Args:
+        blocks: Text pieces, in order
+        stats: Optional dict filled with the reduction of the text read
+
+    Yields:
+        Cleaned pieces
+    """
+    with_tokens = stats is not None
+    stats = stats if stats is not None else {}
+    for field, value in _new_stats().items():
+        stats.setdefault(field, value)
+    for block in blocks:
+        cleaned = _clean(block, stats)
+        _count(stats, block, cleaned, with_tokens)
+        if cleaned.strip():
+            yield cleaned
+
+
+def normalization_report(stats: Dict) -> Dict:
+    """
+    Summarize a normalization stats dict
+
+    Args:
+        stats: Dict filled by normalize_pages or normalize_blocks
+
+    Returns:
+        The stats plus 'chars_saved', 'tokens_saved' and their shares of
+        the original ('chars_reduction', 'tokens_reduction', 0-1)
+    """
+    report = dict(stats)
+    report['chars_saved'] = stats['original_chars'] - stats['chars']
+    report['tokens_saved'] = stats['original_tokens'] - stats['tokens']
+    report['chars_reduction'] = report['chars_saved'] / stats['original_chars'] if stats['original_chars'] else 0.0
+    report['tokens_reduction'] = report['tokens_saved'] / stats['original_tokens'] if stats['original_tokens'] else 0.0
+    return report
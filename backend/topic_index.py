@@ -0,0 +1,268 @@
+"""
+Topic Index Module
+Matches differently-worded topics to existing study sessions
+Uses topic normalization plus MinHash signatures over character n-grams,
+with LSH banding so lookups stay fast at hundreds of thousands of topics
+The LSH candidates are compared by their exact n-gram Jaccard similarity,
+since the MinHash estimate is too noisy near the threshold
+Sessions are matched only for their owner, or for everyone when public
+"""
+import functools
+import random
+import re
+import threading
+import unicodedata
+import zlib
+from array import array
+from typing import Dict, List, Optional, Tuple, Union
+from config import Config
+
+# Leading phrases that don't change what the topic is about
+_QUESTION_STEMS = re.compile(
+    r"^(?:(?:please\s+)?(?:can you\s+)?(?:explain|describe|define|teach me|tell me about|"
+    r"what\s+(?:is|are|was|were|does|do)|what's|how\s+(?:does|do|is|are)|why\s+(?:is|are|does|do)|"
+    r"introduction to|intro to|overview of|basics of|learn about)\s+)+"
+)
+_ARTICLES = re.compile(r"\b(?:the|a|an)\b")
+_NON_WORD = re.compile(r"[^\w\s]")
+_WHITESPACE = re.compile(r"\s+")
+
+# Mersenne prime used for the MinHash permutations
+_PRIME = (1 << 61) - 1
+
+# Scope of public sessions (other entries are scoped to their owner's user id)
+_PUBLIC = "public"
+
+# Process-wide shared indexes, keyed by database path
+_SHARED_INDEXES: Dict[str, "TopicIndex"] = {}
+_SHARED_INDEXES_LOCK = threading.Lock()
+
+
+def normalize_topic(topic: str) -> str:
+    """
+    Normalize a topic so trivially different wordings compare equal
+
+    "Photosynthesis?", "photosynthesis" and "What is photosynthesis"
+    all normalize to "photosynthesis".
+
+    Args:
+        topic: Topic as typed by the user
+
+    Returns:
+        Normalized topic string
+    """
+    text = unicodedata.normalize("NFKD", topic)
+    text = "".join(ch for ch in text if not unicodedata.combining(ch)).lower()
+    text = _NON_WORD.sub(" ", text)
+    text = _WHITESPACE.sub(" ", text).strip()
+    stripped = _QUESTION_STEMS.sub("", text)
+    stripped = _WHITESPACE.sub(" ", _ARTICLES.sub(" ", stripped)).strip()
+    # Never normalize a topic away entirely ("what is the" stays as typed)
+    return stripped or text
+
+
+def get_topic_index(db) -> "TopicIndex":
+    """
+    Return the process-wide topic index for a database, building it on first use
+
+    Args:
+        db: Database whose study sessions are indexed
+
+    Returns:
+        Shared TopicIndex instance
+    """
+    with _SHARED_INDEXES_LOCK:
+        index = _SHARED_INDEXES.get(db.db_path)
+        if index is None:
+            index = TopicIndex()
+            for row in db.get_topic_catalog():
+                index.add(
+                    row['id'], row['topic'], row['learning_level'],
+                    owner=row['user_id'], public=bool(row['is_public'])
+                )
+            _SHARED_INDEXES[db.db_path] = index
+        return index
+
+
+class TopicIndex:
+    """In-memory MinHash/LSH similarity index over study session topics"""
+
+    def __init__(
+        self,
+        threshold: float = Config.TOPIC_SIMILARITY_THRESHOLD,
+        num_perm: int = 64,
+        bands: int = 16,
+        ngram: int = 3
+    ):
+        """
+        Initialize an empty index
+
+        Args:
+            threshold: Minimum Jaccard similarity of the n-gram sets for a match
+            num_perm: Number of MinHash permutations per signature
+            bands: Number of LSH bands (num_perm must be divisible by bands)
+            ngram: Character n-gram size used for shingling
+        """
+        if num_perm % bands:
+            raise ValueError("num_perm must be divisible by bands")
+
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.ngram = ngram
+
+        # Fixed seed so signatures are comparable across processes
+        rng = random.Random(1337)
+        self._perms = [
+            (rng.randrange(1, _PRIME), rng.randrange(0, _PRIME)) for _ in range(num_perm)
+        ]
+
+        # Permuted hash values per shingle; the trigram vocabulary is small,
+        # so caching them makes a signature a handful of C-level min() calls
+        self._shingle_values = functools.lru_cache(maxsize=8192)(self._permute_shingle)
+
+        self._lock = threading.Lock()
+        self._session_ids = array('q')
+        self._topics: List[str] = []
+        self._normalized: List[str] = []
+        self._scopes: List[Union[int, str]] = []
+        self._exact: Dict[Tuple[str, str, Union[int, str]], int] = {}
+        self._buckets: Dict[int, List[int]] = {}
+
+    def __len__(self) -> int:
+        """Number of distinct (normalized topic, learning level, scope) entries"""
+        return len(self._session_ids)
+
+    def _shingles(self, normalized: str) -> set:
+        padded = f" {normalized} "
+        if len(padded) <= self.ngram:
+            return {padded}
+        return {padded[i:i + self.ngram] for i in range(len(padded) - self.ngram + 1)}
+
+    def _permute_shingle(self, shingle: str) -> Tuple[int, ...]:
+        h = zlib.crc32(shingle.encode("utf-8"))
+        return tuple([(a * h + b) % _PRIME for a, b in self._perms])
+
+    def _signature(self, normalized: str) -> List[int]:
+        return list(map(min, zip(*map(self._shingle_values, self._shingles(normalized)))))
+
+    def _band_keys(self, signature: List[int], learning_level: str, scope: Union[int, str]) -> List[int]:
+        return [
+            hash((scope, learning_level, band, *signature[band * self.rows:(band + 1) * self.rows]))
+            for band in range(self.bands)
+        ]
+
+    def add(
+        self,
+        session_id: int,
+        topic: str,
+        learning_level: str,
+        owner: Optional[int] = None,
+        public: bool = False
+    ):
+        """
+        Add a study session topic to the index
+
+        Only add sessions generated from the topic alone: materials built
+        from an upload or the document library must not be reused.
+
+        Args:
+            session_id: ID of the study session
+            topic: Topic as stored in the session
+            learning_level: Learning level of the session
+            owner: User id of the session's owner, who may reuse it
+            public: Whether every user may reuse it
+        """
+        if not public and owner is None:
+            return  # nobody could reuse it
+        scope = _PUBLIC if public else owner
+        normalized = normalize_topic(topic)
+
+        with self._lock:
+            # Later sessions win, so reuse always picks the newest materials
+            entry = self._exact.get((normalized, learning_level, scope))
+            if entry is not None:
+                self._session_ids[entry] = session_id
+                self._topics[entry] = topic
+                return
+
+        signature = self._signature(normalized)
+
+        with self._lock:
+            entry = len(self._session_ids)
+            self._session_ids.append(session_id)
+            self._topics.append(topic)
+            self._normalized.append(normalized)
+            self._scopes.append(scope)
+            self._exact[(normalized, learning_level, scope)] = entry
+            for key in self._band_keys(signature, learning_level, scope):
+                self._buckets.setdefault(key, []).append(entry)
+
+    def find(
+        self,
+        topic: str,
+        learning_level: str,
+        user_id: Optional[int] = None,
+        threshold: float = None
+    ) -> Optional[Dict]:
+        """
+        Find the most similar indexed topic at the same learning level
+        among the user's own sessions and the public ones
+
+        LSH buckets only propose candidates; each is scored by the exact
+        Jaccard similarity of its n-grams, so topics just below the
+        threshold ("World War I" vs "World War II") never match on a
+        lucky MinHash estimate.
+
+        Args:
+            topic: Topic as typed by the user
+            learning_level: Learning level to match
+            user_id: User asking (None - public sessions only)
+            threshold: Override for the similarity threshold
+
+        Returns:
+            Dictionary with 'session_id', 'topic' and 'similarity', or None
+        """
+        threshold = self.threshold if threshold is None else threshold
+        normalized = normalize_topic(topic)
+        scopes = [_PUBLIC] if user_id is None else [user_id, _PUBLIC]
+
+        with self._lock:
+            for scope in scopes:
+                entry = self._exact.get((normalized, learning_level, scope))
+                if entry is not None:
+                    return {
+                        'session_id': self._session_ids[entry],
+                        'topic': self._topics[entry],
+                        'similarity': 1.0
+                    }
+
+        shingles = self._shingles(normalized)
+        signature = self._signature(normalized)
+        band_keys = [key for scope in scopes for key in self._band_keys(signature, learning_level, scope)]
+
+        with self._lock:
+            candidates = set()
+            for key in band_keys:
+                candidates.update(self._buckets.get(key, ()))
+
+            best_entry, best_similarity = None, 0.0
+            for candidate in candidates:
+                if self._scopes[candidate] not in scopes:
+                    continue
+                other = self._shingles(self._normalized[candidate])
+                similarity = len(shingles & other) / len(shingles | other)
+                # Prefer newer sessions on ties
+                if similarity > best_similarity or (
+                    similarity == best_similarity and best_entry is not None and candidate > best_entry
+                ):
+                    best_entry, best_similarity = candidate, similarity
+
+            if best_entry is None or best_similarity < threshold:
+                return None
+            return {
+                'session_id': self._session_ids[best_entry],
+                'topic': self._topics[best_entry],
+                'similarity': best_similarity
+            }
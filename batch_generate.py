@@ -0,0 +1,277 @@
+"""
+EduGenie Batch Generation
+Generates study materials for a whole syllabus from the command line
+
+Usage:
+    python batch_generate.py syllabus.csv --workers 4 --user-id 7
+    python batch_generate.py syllabus.csv --public
+    python batch_generate.py syllabus.json --level Intermediate --output cache
+
+The topic list is CSV (columns: topic, learning_level) or JSON (a list of
+{"topic": ..., "learning_level": ...} objects or plain topic strings).
+Completed topics are appended to a checkpoint file, so an interrupted run
+resumes where it stopped when started again with the same arguments.
+
+Sessions saved to the database (--output db) need an owner: --user-id
+saves them for that user, --public saves them as shared materials that
+every user may be offered for the same topic. Either way they are
+generated from the topic alone, so they can be reused.
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, List, Set, Tuple
+
+from backend.ai_engine import get_shared_engine
+from backend.database import Database
+from backend.generation_profiles import list_profiles
+from backend.metrics import percentile
+from backend.pipeline import generate_study_materials, generation_modes
+from config import Config
+
+
+def load_topics(path: str, default_level: str) -> List[Tuple[str, str]]:
+    """
+    Load (topic, learning_level) pairs from a CSV or JSON file
+
+    Args:
+        path: Topic list file
+        default_level: Level used when an entry doesn't specify one
+
+    Returns:
+        List of (topic, learning_level) tuples, duplicates removed
+    """
+    if path.lower().endswith(".json"):
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        if isinstance(data, dict):
+            data = data.get("topics", [])
+        entries = [
+            {"topic": item} if isinstance(item, str) else item
+            for item in data
+        ]
+    else:
+        with open(path, newline="", encoding="utf-8") as f:
+            entries = list(csv.DictReader(f))
+
+    topics = []
+    for entry in entries:
+        topic = (entry.get("topic") or "").strip()
+        if not topic:
+            continue
+        level = (entry.get("learning_level") or entry.get("level") or default_level).strip()
+        if level not in Config.LEARNING_LEVELS:
+            raise ValueError(f"Unknown learning level '{level}' for topic '{topic}'")
+        topics.append((topic, level))
+    return list(dict.fromkeys(topics))
+
+
+def load_checkpoint(path: str) -> Set[Tuple[str, str]]:
+    """Read the (topic, learning_level) pairs already completed"""
+    done = set()
+    if not os.path.exists(path):
+        return done
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                # A line cut off by an interruption; that topic is redone
+                continue
+            done.add((record["topic"], record["learning_level"]))
+    return done
+
+
+def generate_one(ai_engine, topic: str, learning_level: str, mode: str, question_bank: bool,
+                 profile: str = None) -> Dict:
+    """Generate study materials for one topic"""
+    result = generate_study_materials(
+        ai_engine, topic, learning_level, mode=mode, question_bank=question_bank, profile=profile
+    )
+    result["topic"] = topic
+    result["learning_level"] = learning_level
+    return result
+
+
+def flush(db, pending: List[Dict], checkpoint_file, output: str, user_id: int, public: bool = False):
+    """Write finished sessions to the database, then mark them done in the checkpoint"""
+    if not pending:
+        return
+    if output == "db":
+        db.save_sessions([
+            {
+                "user_id": user_id,
+                "topic": result["topic"],
+                "learning_level": result["learning_level"],
+                "explanation": result["explanation"],
+                "summary": result["summary"],
+                "quiz_data": result["quiz_data"],
+                "context_source": "none",
+                "is_public": public,
+            }
+            for result in pending
+        ])
+    # In "cache" mode the responses were already stored by the response cache
+
+    # Question banks are kept in both modes; later quizzes are sampled from them
+    for result in pending:
+        if result.get("question_bank"):
+            db.save_question_bank(result["topic"], result["learning_level"], result["question_bank"])
+
+    for result in pending:
+        checkpoint_file.write(json.dumps({
+            "topic": result["topic"],
+            "learning_level": result["learning_level"],
+            "timings": result["timings"],
+            "truncated": result["truncated"],
+        }) + "\n")
+    checkpoint_file.flush()
+    pending.clear()
+
+
+def print_report(completed: List[Dict], failures: List[Dict], skipped: int, elapsed: float,
+                 route_stats: Dict = None, hedge_stats: Dict = None):
+    """Print throughput, failures, per-stage latency, per-route model usage and hedging"""
+    print("\n" + "=" * 60)
+    print(f"Completed: {len(completed)}  Failed: {len(failures)}  Skipped (checkpoint): {skipped}")
+    print(f"Elapsed: {elapsed:.1f}s  Throughput: {len(completed) / max(elapsed, 1e-9) * 60:.1f} topics/min")
+
+    prompt_tokens = sum(result["usage"].get("prompt_tokens", 0) for result in completed)
+    saved_tokens = sum(result["usage"].get("context_tokens_saved", 0) for result in completed)
+    print(f"Prompt tokens (estimated): {prompt_tokens:,}  Context tokens saved by packing: {saved_tokens:,}")
+    truncated = [result for result in completed if result.get("truncated")]
+    print(f"Topics with output cut off by the profile's token cap: {len(truncated)}")
+
+    stages = sorted({stage for result in completed for stage in result["timings"]})
+    if stages:
+        print("\nPer-stage latency (seconds):")
+        print(f"  {'stage':<12} {'p50':>8} {'p95':>8} {'max':>8}")
+        for stage in stages:
+            values = [r["timings"][stage] for r in completed if stage in r["timings"]]
+            print(
+                f"  {stage:<12} {percentile(values, 50):>8.2f} "
+                f"{percentile(values, 95):>8.2f} {max(values):>8.2f}"
+            )
+
+    if route_stats:
+        print("\nModel routes:")
+        print(f"  {'route':<24} {'requests':>8} {'errors':>6} {'p50':>8} {'cost $':>9}  models")
+        for route, stats in sorted(route_stats.items()):
+            models = ", ".join(f"{name} x{count}" for name, count in stats["models"].items())
+            p50 = f"{stats['p50_seconds']:.2f}" if stats["p50_seconds"] is not None else "-"
+            print(
+                f"  {route:<24} {stats['requests']:>8} {stats['errors']:>6} "
+                f"{p50:>8} {stats['cost_usd']:>9.4f}  {models}"
+            )
+
+    if hedge_stats and hedge_stats["requests"]:
+        print(
+            f"\nHedging: {hedge_stats['hedges_fired']}/{hedge_stats['requests']} requests hedged "
+            f"({hedge_stats['fire_rate']:.1%}), hedge won {hedge_stats['hedge_wins']} "
+            f"({hedge_stats['win_rate']:.1%}), both failed {hedge_stats['both_failed']}"
+        )
+
+    if failures:
+        print("\nFailures:")
+        for failure in failures:
+            print(f"  ❌ {failure['topic']} ({failure['learning_level']}): {failure['error']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate EduGenie study materials for a topic list")
+    parser.add_argument("input", help="CSV or JSON topic list")
+    parser.add_argument("--level", default="Beginner", choices=Config.LEARNING_LEVELS,
+                        help="Learning level for entries that don't specify one")
+    parser.add_argument("--workers", type=int, default=4, help="Concurrent topics in flight")
+    parser.add_argument("--mode", default=Config.DEFAULT_GENERATION_MODE, choices=Config.GENERATION_MODES)
+    parser.add_argument("--profile", default=Config.DEFAULT_GENERATION_PROFILE,
+                        choices=list_profiles(),
+                        help="Generation profile (output token caps, temperature, stop sequences)")
+    parser.add_argument("--question-bank", action="store_true", default=Config.QUESTION_BANK_ENABLED,
+                        help=f"Store a {Config.QUESTION_BANK_SIZE}-question bank per topic for local quiz sampling")
+    parser.add_argument("--output", default="db", choices=["db", "cache"],
+                        help="Save sessions to study_sessions, or only fill the response cache")
+    parser.add_argument("--user-id", type=int, default=None, help="Owner of saved sessions")
+    parser.add_argument("--public", action="store_true",
+                        help="Save sessions as shared materials offered to every user")
+    parser.add_argument("--db-path", default=Config.DATABASE_PATH)
+    parser.add_argument("--checkpoint", default=None,
+                        help="Checkpoint file (default: <input>.checkpoint.jsonl)")
+    parser.add_argument("--batch-size", type=int, default=25, help="Sessions per database write")
+    parser.add_argument("--api-key", default=None, help="Gemini API key (default: GEMINI_API_KEY)")
+    parser.add_argument("--backend", default=Config.MODEL_BACKEND, choices=["gemini", "fake"],
+                        help="Model backend ('fake' runs offline with simulated responses)")
+    args = parser.parse_args()
+
+    if args.output == "cache" and not Config.RESPONSE_CACHE_ENABLED:
+        parser.error("--output cache requires Config.RESPONSE_CACHE_ENABLED")
+    if args.output == "db" and args.user_id is None and not args.public:
+        parser.error("--output db requires --user-id or --public (sessions need an owner)")
+
+    topics = load_topics(args.input, args.level)
+    checkpoint_path = args.checkpoint or f"{args.input}.checkpoint.jsonl"
+    already_done = load_checkpoint(checkpoint_path)
+    todo = [item for item in topics if item not in already_done]
+    skipped = len(topics) - len(todo)
+    print(f"📚 {len(topics)} topics, {skipped} already done, {len(todo)} to generate "
+          f"with {args.workers} workers")
+
+    ai_engine = get_shared_engine(args.api_key, backend_name=args.backend)
+    if args.mode not in generation_modes(ai_engine.backend):
+        print(f"⚠️ The {args.backend} backend doesn't keep conversation context; using 'separate' mode")
+        args.mode = "separate"
+    db = Database(args.db_path)
+    completed, failures, pending = [], [], []
+    start = time.perf_counter()
+
+    with open(checkpoint_path, "a", encoding="utf-8") as checkpoint_file, \
+            ThreadPoolExecutor(max_workers=args.workers) as executor:
+        futures = {
+            executor.submit(
+                generate_one, ai_engine, topic, level, args.mode, args.question_bank, args.profile
+            ): (topic, level)
+            for topic, level in todo
+        }
+        try:
+            for future in as_completed(futures):
+                topic, level = futures[future]
+                try:
+                    result = future.result()
+                except Exception as e:
+                    result = {"topic": topic, "learning_level": level, "errors": {"pipeline": str(e)}}
+
+                if result["errors"]:
+                    error = "; ".join(f"{stage}: {msg}" for stage, msg in result["errors"].items())
+                    failures.append({"topic": topic, "learning_level": level, "error": error})
+                    print(f"❌ {topic} ({level})")
+                    continue
+
+                completed.append(result)
+                pending.append(result)
+                print(f"✅ {topic} ({level}) in {result['timings']['total']:.1f}s "
+                      f"[{len(completed) + len(failures)}/{len(todo)}]")
+                if len(pending) >= args.batch_size:
+                    flush(db, pending, checkpoint_file, args.output, args.user_id, args.public)
+        except KeyboardInterrupt:
+            print("\n⏸️ Interrupted, saving finished topics. Re-run to resume.")
+            for future in futures:
+                future.cancel()
+        finally:
+            flush(db, pending, checkpoint_file, args.output, args.user_id, args.public)
+
+    print_report(
+        completed, failures, skipped, time.perf_counter() - start,
+        ai_engine.get_route_stats(), ai_engine.get_hedge_stats()
+    )
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
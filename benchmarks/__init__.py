@@ -0,0 +1,4 @@
+"""
+EduGenie Benchmarks
+Performance benchmarks run as modules, e.g. python -m benchmarks.ai_engine_bench
+"""
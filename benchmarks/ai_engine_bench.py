@@ -0,0 +1,399 @@
+"""
+AIEngine Benchmark
+Measures latency, throughput, prompt/response sizes and JSON parse failures
+for the generation methods and the full study-materials flow
+
+Usage:
+    python -m benchmarks.ai_engine_bench
+    python -m benchmarks.ai_engine_bench --concurrency 1 8 32 --requests 64
+    python -m benchmarks.ai_engine_bench --save-baseline
+    python -m benchmarks.ai_engine_bench --compare
+    python -m benchmarks.ai_engine_bench --profile fast --seconds-per-token 0.0002
+    python -m benchmarks.ai_engine_bench --hedging --hedge-min-delay 0.1 --latency-sigma 1.0
+
+Every scenario runs against the simulated FakeBackend on a fresh engine, with
+the response cache off and the request rate limit lifted, so the numbers
+reflect the engine and the simulated model only. --save-baseline stores the
+results as JSON; --compare exits with status 1 when a metric regressed
+beyond the tolerance relative to that baseline. --profile picks the
+generation profile for every call; with --seconds-per-token the simulated
+latency grows with output length, so the profiles' token caps show up in
+the latency numbers. --hedging turns on hedged requests, with the hedge
+delay floored at --hedge-min-delay (also the delay used until enough
+latency samples exist); each row then also reports how many requests sent
+a hedge and how many hedges won.
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Tuple
+
+from backend.ai_engine import AIEngine
+from backend.generation_profiles import list_profiles
+from backend.metrics import percentile
+from backend.model_backends import FakeBackend
+from backend.pipeline import generate_study_materials
+from config import Config
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines", "ai_engine.json")
+
+TOPICS = [
+    "Photosynthesis", "Newton's laws of motion", "The French Revolution", "Supply and demand",
+    "Binary search", "The water cycle", "Plate tectonics", "Cellular respiration",
+    "Pythagorean theorem", "Object-oriented programming", "The immune system", "Climate change",
+    "Probability basics", "DNA replication", "World War I causes", "Electric circuits",
+]
+
+# Backend settings added after baselines were recorded, with the value
+# older baselines implicitly ran with
+SETTING_DEFAULTS = {
+    "hedging": False,
+}
+
+# Metrics where a larger value is a regression; throughput is the reverse
+HIGHER_IS_WORSE = (
+    "p50_seconds",
+    "p95_seconds",
+    "p99_seconds",
+    "calls_per_request",
+    "prompt_chars_per_request",
+    "est_prompt_tokens_per_request",
+    "response_chars_per_request",
+    "json_parse_failure_rate",
+    "truncated_response_rate",
+    "error_rate",
+)
+LOWER_IS_WORSE = ("throughput_per_second",)
+
+# Absolute slack so tiny values (e.g. 2 ms vs 3 ms) don't count as regressions;
+# p99 of a few dozen requests is close to the single slowest one, so it gets more
+ABSOLUTE_SLACK = {
+    "p50_seconds": 0.01,
+    "p95_seconds": 0.01,
+    "p99_seconds": 0.1,
+    "json_parse_failure_rate": 0.05,
+    "truncated_response_rate": 0.05,
+    "error_rate": 0.02,
+}
+
+
+def _explanation(engine, topic: str, level: str, explanation: str) -> Tuple[Dict, Dict]:
+    with engine.track_usage() as usage:
+        engine.generate_explanation(topic, level)
+    return usage, {}
+
+
+def _summary(engine, topic: str, level: str, explanation: str) -> Tuple[Dict, Dict]:
+    with engine.track_usage() as usage:
+        engine.generate_summary(topic, explanation, level)
+    return usage, {}
+
+
+def _quiz(engine, topic: str, level: str, explanation: str) -> Tuple[Dict, Dict]:
+    with engine.track_usage() as usage:
+        engine.generate_quiz(topic, explanation, level)
+    return usage, {}
+
+
+def _pipeline(mode: str, stream: bool = False):
+    def run(engine, topic: str, level: str, explanation: str) -> Tuple[Dict, Dict]:
+        result = generate_study_materials(
+            engine, topic, level, mode=mode,
+            on_explanation_chunk=(lambda text: None) if stream else None
+        )
+        if result['errors']:
+            raise RuntimeError("; ".join(f"{stage}: {msg}" for stage, msg in result['errors'].items()))
+        return result['usage'], result['timings']
+    return run
+
+
+# Scenario name -> function(engine, topic, level, explanation) -> (usage, timings)
+SCENARIOS: Dict[str, Callable] = {
+    "explanation": _explanation,
+    "summary": _summary,
+    "quiz": _quiz,
+    # Same flow as process_topic in the app: streamed explanation, then summary + quiz
+    "process_topic": _pipeline("separate", stream=True),
+    "study_pack": _pipeline("study_pack"),
+    # Summary and quiz as follow-ups in the explanation's conversation
+    "conversation": _pipeline("conversation", stream=True),
+}
+
+
+def make_engine(settings: Dict, latency: Dict = None) -> AIEngine:
+    """
+    Create an isolated engine on a FakeBackend
+
+    A unique API key gives the engine its own circuit breakers and token
+    bucket, so one scenario's failures never leak into the next.
+    """
+    backend = FakeBackend(
+        latency=latency or settings["latency"],
+        error_rate=settings["error_rate"],
+        rate_limit_rate=settings["rate_limit_rate"],
+        malformed_json_rate=settings["malformed_json_rate"],
+        seconds_per_token=settings["seconds_per_token"],
+        seed=settings["seed"],
+    )
+    return AIEngine(
+        api_key=f"benchmark-{uuid.uuid4().hex}", backend=backend, hedging=settings.get("hedging", False)
+    )
+
+
+def run_level(scenario: Callable, settings: Dict, workload: List[Tuple[str, str]],
+              explanations: Dict, concurrency: int) -> Dict:
+    """
+    Run one scenario's workload at one concurrency level
+
+    Returns:
+        Dictionary of latency, throughput, size and failure metrics
+    """
+    engine = make_engine(settings)
+
+    def one(item):
+        topic, level = item
+        start = time.perf_counter()
+        try:
+            usage, timings = scenario(engine, topic, level, explanations[item])
+            error = None
+        except Exception as e:
+            usage, timings, error = {}, {}, str(e)
+        return time.perf_counter() - start, usage, timings, error
+
+    wall_start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        outcomes = list(executor.map(one, workload))
+    wall = time.perf_counter() - wall_start
+
+    ok = [outcome for outcome in outcomes if outcome[3] is None]
+    latencies = [outcome[0] for outcome in ok]
+
+    def total(field: str) -> int:
+        return sum(outcome[1].get(field, 0) for outcome in ok)
+
+    requests = len(outcomes)
+    succeeded = max(1, len(ok))
+
+    metrics = {
+        "concurrency": concurrency,
+        "requests": requests,
+        "errors": requests - len(ok),
+        "error_rate": (requests - len(ok)) / requests,
+        "p50_seconds": percentile(latencies, 50),
+        "p95_seconds": percentile(latencies, 95),
+        "p99_seconds": percentile(latencies, 99),
+        "throughput_per_second": len(ok) / wall,
+        "calls_per_request": total("calls") / succeeded,
+        "prompt_chars_per_request": total("prompt_chars") / succeeded,
+        "response_chars_per_request": total("response_chars") / succeeded,
+        "est_prompt_tokens_per_request": total("prompt_tokens") / succeeded,
+        "context_tokens_saved_per_request": total("context_tokens_saved") / succeeded,
+        "context_tokens_reused_per_request": total("context_tokens_reused") / succeeded,
+        "json_parse_failures": total("json_parse_failures"),
+        "json_parse_failure_rate": total("json_parse_failures") / succeeded,
+        "truncated_response_rate": total("truncated_responses") / max(1, total("calls")),
+        "routes": engine.get_route_stats(),
+        "hedging": engine.get_hedge_stats(),
+    }
+    first_chunks = [outcome[2]["first_chunk"] for outcome in ok if "first_chunk" in outcome[2]]
+    if first_chunks:
+        metrics["first_chunk_p50_seconds"] = percentile(first_chunks, 50)
+        metrics["first_chunk_p95_seconds"] = percentile(first_chunks, 95)
+    if len(ok) < requests:
+        metrics["sample_error"] = next(outcome[3] for outcome in outcomes if outcome[3])
+    return metrics
+
+
+def run_benchmarks(scenarios: List[str], concurrency_levels: List[int], requests: int, settings: Dict) -> Dict:
+    """
+    Run every scenario at every concurrency level
+
+    Returns:
+        Results document: 'meta' (settings and environment) and 'results'
+        (scenario -> concurrency level as a string -> metrics)
+    """
+    workload = [
+        (TOPICS[i % len(TOPICS)], Config.LEARNING_LEVELS[i % len(Config.LEARNING_LEVELS)])
+        for i in range(requests)
+    ]
+    # Explanations fed to the summary and quiz scenarios, from a zero-latency engine
+    setup_engine = make_engine(settings, latency={"distribution": "constant", "seconds": 0.0})
+    explanations = {
+        item: setup_engine.generate_explanation(*item) for item in dict.fromkeys(workload)
+    }
+
+    results = {}
+    for name in scenarios:
+        results[name] = {}
+        for concurrency in concurrency_levels:
+            metrics = run_level(SCENARIOS[name], settings, workload, explanations, concurrency)
+            results[name][str(concurrency)] = metrics
+            print_metrics(name, metrics)
+
+    return {"meta": _meta(settings, requests), "results": results}
+
+
+def _meta(settings: Dict, requests: int) -> Dict:
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, timeout=5
+        ).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        commit = None
+    return {
+        "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "git_commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "requests_per_level": requests,
+        "generation_profile": Config.DEFAULT_GENERATION_PROFILE,
+        "backend": settings,
+    }
+
+
+def print_metrics(name: str, metrics: Dict):
+    """Print one result row"""
+    hedging = metrics["hedging"]
+    print(
+        f"{name:<14} c={metrics['concurrency']:<3} "
+        f"p50={_fmt(metrics['p50_seconds'])} p95={_fmt(metrics['p95_seconds'])} "
+        f"p99={_fmt(metrics['p99_seconds'])} "
+        f"thr={metrics['throughput_per_second']:7.2f}/s "
+        f"calls={metrics['calls_per_request']:.2f} "
+        f"prompt={metrics['prompt_chars_per_request']:8.0f} "
+        f"resp={metrics['response_chars_per_request']:7.0f} "
+        f"json_fail={metrics['json_parse_failure_rate']:.1%} "
+        f"trunc={metrics['truncated_response_rate']:.1%} "
+        f"err={metrics['error_rate']:.1%}"
+        + (f" hedged={hedging['fire_rate']:.1%} hedge_won={hedging['win_rate']:.1%}" if hedging["requests"] else "")
+    )
+
+
+def _fmt(seconds) -> str:
+    return "   n/a" if seconds is None else f"{seconds:6.3f}"
+
+
+def compare(current: Dict, baseline: Dict, tolerance: float) -> List[str]:
+    """
+    Compare a results document against a baseline
+
+    Args:
+        current: Results of this run
+        baseline: Stored baseline results
+        tolerance: Allowed relative change (0.2 = 20%)
+
+    Returns:
+        Human-readable descriptions of the regressions found
+    """
+    regressions = []
+    for name, levels in current["results"].items():
+        for level, metrics in levels.items():
+            base = baseline["results"].get(name, {}).get(level)
+            if base is None:
+                continue
+            for field in HIGHER_IS_WORSE + LOWER_IS_WORSE:
+                value, reference = metrics.get(field), base.get(field)
+                if value is None or reference is None:
+                    continue
+                slack = ABSOLUTE_SLACK.get(field, 0.0)
+                if field in HIGHER_IS_WORSE:
+                    regressed = value > reference * (1 + tolerance) + slack
+                else:
+                    regressed = value < reference * (1 - tolerance) - slack
+                if regressed:
+                    regressions.append(
+                        f"{name} c={level} {field}: {reference:.4g} -> {value:.4g}"
+                    )
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark AIEngine against the simulated model backend")
+    parser.add_argument("--scenarios", nargs="+", default=list(SCENARIOS), choices=list(SCENARIOS))
+    parser.add_argument("--concurrency", nargs="+", type=int, default=[1, 4, 16])
+    parser.add_argument("--requests", type=int, default=48, help="Requests per scenario and concurrency level")
+    parser.add_argument("--latency-median", type=float, default=0.05, help="Median simulated latency (seconds)")
+    parser.add_argument("--latency-sigma", type=float, default=0.5, help="Lognormal spread of simulated latency")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of simulated 503 errors")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="Share of simulated 429 errors")
+    parser.add_argument("--malformed-json-rate", type=float, default=0.05, help="Share of truncated JSON responses")
+    parser.add_argument("--seconds-per-token", type=float, default=0.0,
+                        help="Simulated latency per output token")
+    parser.add_argument("--profile", default=Config.DEFAULT_GENERATION_PROFILE,
+                        choices=list_profiles(), help="Generation profile for every call")
+    parser.add_argument("--hedging", action="store_true", help="Send hedged duplicates for slow calls")
+    parser.add_argument("--hedge-min-delay", type=float, default=Config.HEDGE_MIN_DELAY_SECONDS,
+                        help="Minimum (and initial) hedge delay in seconds with --hedging")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", default=None, help="Write results JSON to this file")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="Baseline file for --save-baseline/--compare")
+    parser.add_argument("--save-baseline", action="store_true", help="Store this run as the baseline")
+    parser.add_argument("--compare", action="store_true", help="Fail if this run regressed against the baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed relative change for --compare")
+    args = parser.parse_args()
+
+    # Measure uncached model calls without the production request rate limit
+    Config.RESPONSE_CACHE_ENABLED = False
+    Config.MODEL_REQUESTS_PER_MINUTE = 10 ** 9
+    Config.MODEL_REQUEST_BURST = 10 ** 6
+    Config.DEFAULT_GENERATION_PROFILE = args.profile
+    Config.HEDGE_MIN_DELAY_SECONDS = args.hedge_min_delay
+    Config.HEDGE_DEFAULT_DELAY_SECONDS = args.hedge_min_delay
+
+    settings = {
+        "latency": {"distribution": "lognormal", "median": args.latency_median, "sigma": args.latency_sigma},
+        "error_rate": args.error_rate,
+        "rate_limit_rate": args.rate_limit_rate,
+        "malformed_json_rate": args.malformed_json_rate,
+        "seconds_per_token": args.seconds_per_token,
+        "seed": args.seed,
+        "hedging": args.hedging,
+    }
+    document = run_benchmarks(args.scenarios, args.concurrency, args.requests, settings)
+
+    if args.output:
+        _write_json(args.output, document)
+        print(f"\n💾 Results written to {args.output}")
+
+    status = 0
+    if args.compare:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        if {**SETTING_DEFAULTS, **baseline["meta"].get("backend", {})} != settings:
+            print("\n⚠️ Baseline was recorded with different backend settings; comparison may be misleading")
+        if baseline["meta"].get("generation_profile", args.profile) != args.profile:
+            print("\n⚠️ Baseline was recorded with a different generation profile")
+        regressions = compare(document, baseline, args.tolerance)
+        if regressions:
+            print(f"\n❌ {len(regressions)} regression(s) against {args.baseline}:")
+            for regression in regressions:
+                print(f"  {regression}")
+            status = 1
+        else:
+            print(f"\n✅ No regressions against {args.baseline} (tolerance {args.tolerance:.0%})")
+
+    if args.save_baseline:
+        _write_json(args.baseline, document)
+        print(f"\n💾 Baseline saved to {args.baseline}")
+
+    return status
+
+
+def _write_json(path: str, document: Dict):
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(document, f, indent=2)
+        f.write("\n")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
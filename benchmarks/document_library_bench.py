@@ -0,0 +1,115 @@
+"""
+Document Library Benchmark
+Measures how the per-user document library scales with its size: time to
+add documents, to load a library from the database in a fresh process,
+and to search it
+
+Usage:
+    python -m benchmarks.document_library_bench
+    python -m benchmarks.document_library_bench --sizes 100 1000 5000 --doc-chars 4000
+
+Documents are synthetic course notes on a handful of subjects. The library
+grows to each size in turn (documents are only ever added, never
+re-indexed); at each size a fresh library loads the stored term counts and
+runs the queries.
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from typing import Dict, List
+
+from backend.database import Database
+from backend.document_library import DocumentLibrary
+from benchmarks.retrieval_bench import FILLER, GLUE, SUBJECTS
+
+QUERIES = list(SUBJECTS) + ["earthquake fault lines", "market equilibrium price", "chlorophyll light"]
+
+
+def make_documents(count: int, chars: int, seed: int = 11) -> List[str]:
+    """Synthetic notes: mostly filler, with a passage on one subject"""
+    rng = random.Random(seed)
+    documents = []
+    vocabularies = list(SUBJECTS.values())
+    for _ in range(count):
+        subject = rng.choice(vocabularies)
+        sentences = []
+        while sum(len(s) + 1 for s in sentences) < chars:
+            vocabulary = subject if rng.random() < 0.3 else FILLER
+            words = [rng.choice(vocabulary) for _ in range(4)]
+            sentences.append(f"The {words[0]} {rng.choice(GLUE)} the {words[1]} and {words[2]} through {words[3]}.")
+        documents.append(" ".join(sentences))
+    return documents
+
+
+def run_benchmarks(sizes: List[int], doc_chars: int, repeats: int) -> Dict:
+    """Grow a library through the sizes; returns timings per size"""
+    directory = tempfile.mkdtemp(prefix="edugenie_library_bench_")
+    db = Database(os.path.join(directory, "library.db"))
+    user_id = db.create_user("bench")
+    library = DocumentLibrary(db)
+    documents = make_documents(max(sizes), doc_chars)
+
+    results, added = {}, 0
+    print(f"\n{'documents':>9} {'chunks':>8} {'add ms/doc':>10} {'load s':>8} {'search p50 ms':>13} {'p95 ms':>8}")
+    for size in sorted(sizes):
+        start = time.perf_counter()
+        for number in range(added, size):
+            library.add_document(user_id, f"notes_{number}.txt", documents[number])
+        add_seconds = time.perf_counter() - start
+        add_ms = add_seconds * 1000 / max(1, size - added)
+        added = size
+
+        # A fresh process: load the stored term counts, no raw text
+        start = time.perf_counter()
+        fresh = DocumentLibrary(db)
+        fresh.search(user_id, QUERIES[0])
+        load_seconds = time.perf_counter() - start
+
+        samples = []
+        for _ in range(repeats):
+            for query in QUERIES:
+                start = time.perf_counter()
+                fresh.search(user_id, query)
+                samples.append((time.perf_counter() - start) * 1000)
+        samples.sort()
+        chunks = len(fresh._users[user_id].chunk_ids)
+        results[str(size)] = {
+            "chunks": chunks,
+            "add_ms_per_document": add_ms,
+            "load_seconds": load_seconds,
+            "search_p50_ms": statistics.median(samples),
+            "search_p95_ms": samples[int(0.95 * (len(samples) - 1))],
+        }
+        row = results[str(size)]
+        print(f"{size:>9} {chunks:>8} {add_ms:>10.2f} {load_seconds:>8.2f} "
+              f"{row['search_p50_ms']:>13.2f} {row['search_p95_ms']:>8.2f}")
+    return {"meta": {"doc_chars": doc_chars, "repeats": repeats, "db": db.db_path}, "results": results}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the document library at growing sizes")
+    parser.add_argument("--sizes", nargs="+", type=int, default=[100, 1000, 3000])
+    parser.add_argument("--doc-chars", type=int, default=3000, help="Characters per document")
+    parser.add_argument("--repeats", type=int, default=5, help="Passes over the query list per size")
+    parser.add_argument("--output", default=None, help="Write results JSON to this file")
+    args = parser.parse_args()
+
+    document = run_benchmarks(args.sizes, args.doc_chars, args.repeats)
+    if args.output:
+        directory = os.path.dirname(args.output)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(document, f, indent=2)
+            f.write("\n")
+        print(f"\n💾 Results written to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
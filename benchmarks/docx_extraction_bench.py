@@ -0,0 +1,121 @@
+"""
+DOCX Extraction Benchmark
+Compares the streaming DOCX reader with the python-docx path on large
+documents: full extraction time, time to fill an early-stop budget, peak
+memory and how much text each path recovers
+
+Usage:
+    python -m benchmarks.docx_extraction_bench
+    python -m benchmarks.docx_extraction_bench --paragraphs 2000 20000 --budget-chars 5000
+
+Documents are generated with python-docx: body paragraphs with a heading
+every 25 paragraphs and a 6x4 table every 20.
+"""
+import argparse
+import io
+import json
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+from typing import Callable, Dict, List
+
+from backend.content_processor import ContentProcessor
+from config import Config
+
+PATHS: Dict[str, Callable] = {
+    "python-docx": ContentProcessor.iter_docx_paragraphs,
+    "stream": ContentProcessor.iter_docx_blocks,
+}
+
+
+def make_sample_docx(paragraphs: int) -> bytes:
+    """Build a DOCX with headings, paragraphs and tables"""
+    from docx import Document
+
+    document = Document()
+    for number in range(paragraphs):
+        if number % 25 == 0:
+            document.add_heading(f"Section {number // 25 + 1}: light and energy", level=2)
+        document.add_paragraph(
+            f"Paragraph {number + 1}. Chloroplasts capture light energy and store it as glucose; "
+            "the light reactions produce ATP and NADPH for the Calvin cycle."
+        )
+        if number % 20 == 19:
+            table = document.add_table(rows=6, cols=4)
+            for row_index, row in enumerate(table.rows):
+                for cell_index, cell in enumerate(row.cells):
+                    cell.text = f"r{row_index} c{cell_index} stage value {number}"
+    buffer = io.BytesIO()
+    document.save(buffer)
+    return buffer.getvalue()
+
+
+def _time(func: Callable, repeats: int) -> float:
+    samples = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+
+def _peak_memory(func: Callable) -> float:
+    tracemalloc.start()
+    try:
+        func()
+        return tracemalloc.get_traced_memory()[1] / (1024 * 1024)
+    finally:
+        tracemalloc.stop()
+
+
+def run_benchmarks(sizes: List[int], budget_chars: int, repeats: int) -> Dict:
+    """Time both paths on each document size; returns results per size and path"""
+    results = {}
+    print(f"\n{'paragraphs':>10} {'path':<12} {'full s':>8} {'budget ms':>10} {'peak MB':>8} {'chars':>9}")
+    for paragraphs in sizes:
+        docx_bytes = make_sample_docx(paragraphs)
+        results[str(paragraphs)] = {}
+        for name, iterate in PATHS.items():
+            def full():
+                return ContentProcessor.collect_text(iterate(docx_bytes))
+
+            def budgeted():
+                return ContentProcessor.collect_text(iterate(docx_bytes), max_chars=budget_chars)
+
+            row = {
+                "full_seconds": _time(full, repeats),
+                "budget_ms": _time(budgeted, repeats) * 1000,
+                "peak_mb": _peak_memory(full),
+                "chars": len(full()),
+            }
+            results[str(paragraphs)][name] = row
+            print(f"{paragraphs:>10} {name:<12} {row['full_seconds']:>8.3f} {row['budget_ms']:>10.1f} "
+                  f"{row['peak_mb']:>8.1f} {row['chars']:>9}")
+    return {"meta": {"budget_chars": budget_chars, "repeats": repeats}, "results": results}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark streaming DOCX extraction against python-docx")
+    parser.add_argument("--paragraphs", nargs="+", type=int, default=[1000, 10000])
+    parser.add_argument("--budget-chars", type=int, default=Config.MAX_UPLOAD_CONTEXT_CHARS // 40,
+                        help="Early-stop budget for the budgeted runs")
+    parser.add_argument("--repeats", type=int, default=3, help="Runs per measurement (median is reported)")
+    parser.add_argument("--output", default=None, help="Write results JSON to this file")
+    args = parser.parse_args()
+
+    document = run_benchmarks(args.paragraphs, args.budget_chars, args.repeats)
+    if args.output:
+        directory = os.path.dirname(args.output)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(document, f, indent=2)
+            f.write("\n")
+        print(f"\n💾 Results written to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
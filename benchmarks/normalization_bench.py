@@ -0,0 +1,119 @@
+"""
+Text Normalization Benchmark
+Measures what normalizing extracted text saves on paged documents with
+running headers and footers, page numbers, boilerplate, hyphenated line
+breaks and whitespace runs, and what it costs on top of extraction
+
+Usage:
+    python -m benchmarks.normalization_bench
+    python -m benchmarks.normalization_bench --pages 100 500 --output normalization.json
+
+The PDFs are generated locally, laid out like a course reader: a running
+header and chapter title, a "Page N of M" footer and a copyright line on
+every page, body lines with words hyphenated at line ends and runs of
+spaces. "normalize ms" is the normalization of already extracted pages.
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import time
+from typing import Callable, Dict, List
+
+from backend.content_processor import ContentProcessor
+from backend.text_normalizer import normalization_report, normalize_pages
+from benchmarks.pdf_extraction_bench import make_pdf
+from benchmarks.retrieval_bench import FILLER, GLUE, SUBJECTS
+
+HEADER = "Biology 101: Photosynthesis and Cellular Energy - Course Reader"
+COPYRIGHT = "(c) 2024 EduGenie Press. All rights reserved."
+# Words split across a line break in the body text
+HYPHENATED = ["photo-synthesis", "chloro-plasts", "respir-ation", "mito-chondria", "carbo-hydrates"]
+
+
+def make_reader_pdf(pages: int, body_lines: int = 36, seed: int = 5) -> bytes:
+    """Build a course-reader PDF with headers, footers and boilerplate on every page"""
+    rng = random.Random(seed)
+    vocabulary = [word for words in SUBJECTS.values() for word in words] + FILLER
+    page_lines = []
+    for number in range(1, pages + 1):
+        lines = [HEADER, f"Chapter {(number - 1) // 50 + 1}: Light and Energy"]
+        for index in range(body_lines):
+            words = [rng.choice(vocabulary) for _ in range(6)]
+            line = f"The {words[0]} {rng.choice(GLUE)} the {words[1]}  and   {words[2]} through {words[3]} {words[4]}"
+            if index % 6 == 5:
+                head, tail = rng.choice(HYPHENATED).split("-")
+                line += f" {head}-"
+                words[5] = tail + " " + words[5]
+                lines.append(line)
+                lines.append(f"{words[5]} was measured again.")
+                continue
+            lines.append(line + ".")
+        lines += [COPYRIGHT, f"Page {number} of {pages}"]
+        page_lines.append(lines)
+    return make_pdf(page_lines)
+
+
+def _time(func: Callable, repeats: int) -> float:
+    samples = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+
+def run_benchmarks(sizes: List[int], repeats: int) -> Dict:
+    """Extract each document with and without normalization; returns results per size"""
+    results = {}
+    print(f"\n{'pages':>6} {'raw s':>7} {'clean s':>8} {'normalize ms':>12} {'chars':>9} {'-chars':>7} "
+          f"{'tokens':>8} {'-tokens':>8} {'hdr/ftr':>8} {'boiler':>7} {'hyphen':>7}")
+    for pages in sizes:
+        pdf = make_reader_pdf(pages)
+        name = f"reader_{pages}.pdf"
+        raw_seconds = _time(lambda: ContentProcessor.process_file(pdf, name, normalize=False), repeats)
+        clean_seconds = _time(lambda: ContentProcessor.process_file(pdf, name, normalize=True, stats={}), repeats)
+
+        extracted = list(ContentProcessor.iter_pdf_pages(pdf))
+        normalize_ms = _time(lambda: "".join(normalize_pages(extracted, {})), repeats) * 1000
+
+        stats = {}
+        text = ContentProcessor.process_file(pdf, name, normalize=True, stats=stats)
+        report = normalization_report(stats)
+        report["headers_left"] = text.count(HEADER)
+        results[str(pages)] = {
+            "raw_seconds": raw_seconds,
+            "clean_seconds": clean_seconds,
+            "normalize_ms": normalize_ms,
+            **report,
+        }
+        print(f"{pages:>6} {raw_seconds:>7.2f} {clean_seconds:>8.2f} {normalize_ms:>12.1f} "
+              f"{report['original_chars']:>9} {report['chars_reduction']:>7.1%} "
+              f"{report['original_tokens']:>8} {report['tokens_reduction']:>8.1%} "
+              f"{report['header_footer_lines']:>8} {report['boilerplate_lines']:>7} {report['hyphenations']:>7}")
+    return {"meta": {"repeats": repeats}, "results": results}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark normalization of extracted document text")
+    parser.add_argument("--pages", nargs="+", type=int, default=[50, 500])
+    parser.add_argument("--repeats", type=int, default=3, help="Runs per measurement (median is reported)")
+    parser.add_argument("--output", default=None, help="Write results JSON to this file")
+    args = parser.parse_args()
+
+    document = run_benchmarks(args.pages, args.repeats)
+    if args.output:
+        directory = os.path.dirname(args.output)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(document, f, indent=2)
+            f.write("\n")
+        print(f"\n💾 Results written to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,162 @@
+"""
+PDF Extraction Benchmark
+Measures full PDF text extraction time against page count and worker count,
+with the speedup over in-process (serial) extraction
+
+Usage:
+    python -m benchmarks.pdf_extraction_bench
+    python -m benchmarks.pdf_extraction_bench --pages 50 200 800 --workers 1 2 4 8
+    python -m benchmarks.pdf_extraction_bench --pages-per-task 32 --output pdf.json
+
+The PDFs are generated locally (plain text pages, Helvetica), so the numbers
+reflect PyPDF2's parsing plus the process pool overhead. Speedup is bounded
+by the CPU count reported in the results.
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+from datetime import datetime, timezone
+from typing import Dict, List
+
+from backend.content_processor import ContentProcessor
+from config import Config
+
+
+def make_pdf(page_lines: List[List[str]]) -> bytes:
+    """
+    Build a PDF with the given lines of plain text on each page
+
+    Args:
+        page_lines: Text lines of each page
+
+    Returns:
+        PDF file content as bytes
+    """
+    pages = len(page_lines)
+    objects = [
+        "<< /Type /Catalog /Pages 2 0 R >>",
+        f"<< /Type /Pages /Count {pages} /Kids [ "
+        + " ".join(f"{4 + 2 * i} 0 R" for i in range(pages)) + " ] >>",
+        "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    for i, lines in enumerate(page_lines):
+        text = " ".join(
+            "(" + line.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)") + ") Tj T*"
+            for line in lines
+        )
+        stream = f"BT /F1 10 Tf 14 TL 50 750 Td {text} ET"
+        objects.append(
+            "<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            f"/Resources << /Font << /F1 3 0 R >> >> /Contents {5 + 2 * i} 0 R >>"
+        )
+        objects.append(f"<< /Length {len(stream)} >>\nstream\n{stream}\nendstream")
+
+    out = "%PDF-1.4\n"
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(out))
+        out += f"{number} 0 obj\n{body}\nendobj\n"
+    xref = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n"
+    out += "".join(f"{offset:010d} 00000 n \n" for offset in offsets)
+    out += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n"
+    return out.encode("latin-1")
+
+
+def make_sample_pdf(pages: int, lines: int = 40) -> bytes:
+    """
+    Build a PDF with a page of plain text per page
+
+    Args:
+        pages: Number of pages
+        lines: Text lines per page
+
+    Returns:
+        PDF file content as bytes
+    """
+    return make_pdf([
+        [f"Page {i + 1}, line {j + 1}: plants turn light energy into chemical energy." for j in range(lines)]
+        for i in range(pages)
+    ])
+
+
+def time_extraction(pdf: bytes, workers: int, pages_per_task: int, repeats: int) -> float:
+    """Median seconds for a full extraction of pdf with the given workers"""
+    samples = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        ContentProcessor.extract_pdf_pages(pdf, workers=workers, pages_per_task=pages_per_task)
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+
+def run_benchmarks(page_counts: List[int], worker_counts: List[int], pages_per_task: int, repeats: int) -> Dict:
+    """
+    Time extraction for every page count and worker count
+
+    Returns:
+        Results document: 'meta' and 'results' (page count -> worker count ->
+        seconds and speedup over 1 worker)
+    """
+    # Benchmark the pool itself, not the small-document shortcut
+    Config.PDF_PARALLEL_MIN_PAGES = 0
+
+    results = {}
+    print(f"\n{'pages':>6} {'workers':>8} {'seconds':>9} {'pages/s':>9} {'speedup':>8}")
+    for pages in page_counts:
+        pdf = make_sample_pdf(pages)
+        results[str(pages)] = {}
+        serial = None
+        for workers in worker_counts:
+            seconds = time_extraction(pdf, workers, pages_per_task, repeats)
+            if workers == 1:
+                serial = seconds
+            speedup = serial / seconds if serial else None
+            results[str(pages)][str(workers)] = {"seconds": seconds, "speedup": speedup}
+            speedup_text = f"{speedup:.2f}x" if speedup else "-"
+            print(f"{pages:>6} {workers:>8} {seconds:>9.3f} {pages / seconds:>9.0f} {speedup_text:>8}")
+
+    return {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "pages_per_task": pages_per_task,
+            "repeats": repeats,
+        },
+        "results": results,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark serial vs parallel PDF text extraction")
+    parser.add_argument("--pages", nargs="+", type=int, default=[25, 100, 400])
+    parser.add_argument("--workers", nargs="+", type=int, default=[1, 2, 4])
+    parser.add_argument("--pages-per-task", type=int, default=Config.PDF_PAGES_PER_TASK)
+    parser.add_argument("--repeats", type=int, default=3, help="Runs per measurement (median is reported)")
+    parser.add_argument("--output", default=None, help="Write results JSON to this file")
+    args = parser.parse_args()
+
+    # Speedups are relative to the 1-worker (in-process) run
+    worker_counts = sorted(set([1] + args.workers))
+    print(f"CPUs: {os.cpu_count()}")
+    document = run_benchmarks(args.pages, worker_counts, args.pages_per_task, args.repeats)
+
+    if args.output:
+        directory = os.path.dirname(args.output)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(document, f, indent=2)
+            f.write("\n")
+        print(f"\n💾 Results written to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,161 @@
+"""
+Retrieval Benchmark
+Compares the ways of fitting an uploaded document into a prompt: the old
+character cut, the context packer alone, and BM25 chunk retrieval followed
+by the packer
+
+Usage:
+    python -m benchmarks.retrieval_bench
+    python -m benchmarks.retrieval_bench --pages 200 --level Advanced
+
+A synthetic course document is generated with one section per topic at
+different depths (the last one around 80% into the document). For each
+topic the benchmark reports the tokens sent, how much of the topic's
+section made it into the prompt (recall) and the share of the sent tokens
+coming from that section (precision).
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from typing import Callable, Dict, List
+
+from backend.content_processor import ContentProcessor
+from backend.context_packer import estimate_tokens, get_context_budget, pack_context
+from config import Config
+
+SUBJECTS = {
+    "Photosynthesis": ["chlorophyll", "photosynthesis", "light", "glucose", "chloroplast", "carbon", "dioxide",
+                       "stomata", "photon", "thylakoid"],
+    "Plate tectonics": ["plate", "tectonics", "mantle", "subduction", "crust", "earthquake", "fault",
+                        "magma", "ridge", "continental"],
+    "Supply and demand": ["supply", "demand", "price", "equilibrium", "market", "consumer", "producer",
+                          "elasticity", "surplus", "shortage"],
+    "Electric circuits": ["circuit", "current", "voltage", "resistance", "ohm", "series", "parallel",
+                          "capacitor", "electron", "battery"],
+}
+FILLER = ["history", "culture", "language", "society", "philosophy", "literature", "geography", "art",
+          "music", "politics", "trade", "religion", "architecture", "ethics", "education", "empire"]
+GLUE = ["describes", "influences", "shapes", "relates to", "depends on", "explains", "changes", "supports"]
+
+
+def _sentence(rng: random.Random, vocabulary: List[str]) -> str:
+    words = [rng.choice(vocabulary) for _ in range(4)]
+    return f"The {words[0]} {rng.choice(GLUE)} the {words[1]} and {words[2]} through {words[3]}."
+
+
+def make_document(pages: int, seed: int = 7) -> Dict:
+    """
+    Build a course document with a section per subject at different depths
+
+    Returns:
+        Dictionary with 'text' and 'sections' (topic -> list of the
+        section's sentences)
+    """
+    rng = random.Random(seed)
+    positions = {topic: int(pages * depth) for topic, depth in
+                 zip(SUBJECTS, (0.1, 0.35, 0.6, 0.8))}
+    page_texts, sections = [], {}
+    for page in range(pages):
+        topic = next((t for t, p in positions.items() if p == page), None)
+        if topic:
+            sentences = [_sentence(rng, SUBJECTS[topic]) for _ in range(24)]
+            sections[topic] = sentences
+            body = f"Chapter {page + 1}: {topic}\n\n" + "\n\n".join(
+                " ".join(sentences[i:i + 4]) for i in range(0, len(sentences), 4)
+            )
+        else:
+            paragraphs = [" ".join(_sentence(rng, FILLER) for _ in range(4)) for _ in range(6)]
+            body = f"Chapter {page + 1}\n\n" + "\n\n".join(paragraphs)
+        page_texts.append(body)
+    return {"text": "\n\n".join(page_texts), "sections": sections}
+
+
+def truncate_strategy(text: str, topic: str, budget: int) -> str:
+    """The original app path: first 5000 characters, then the first 2000"""
+    return ContentProcessor.truncate_text(text, 5000)[:2000]
+
+
+def pack_strategy(text: str, topic: str, budget: int) -> str:
+    return pack_context(text, budget, query=topic)["text"]
+
+
+def retrieve_strategy(text: str, topic: str, budget: int) -> str:
+    selected = ContentProcessor.select_relevant_chunks(text, topic, budget)["text"]
+    return pack_context(selected, budget, query=topic)["text"]
+
+
+STRATEGIES: Dict[str, Callable[[str, str, int], str]] = {
+    "truncate": truncate_strategy,
+    "pack": pack_strategy,
+    "retrieve": retrieve_strategy,
+}
+
+
+def evaluate(context: str, section: List[str]) -> Dict:
+    """Recall and precision of a prompt context against a topic's section"""
+    found = [sentence for sentence in section if sentence in context]
+    tokens = estimate_tokens(context)
+    relevant = sum(estimate_tokens(sentence) for sentence in found)
+    return {
+        "tokens": tokens,
+        "recall": len(found) / len(section),
+        "precision": relevant / tokens if tokens else 0.0,
+    }
+
+
+def run_benchmarks(pages: int, level: str) -> Dict:
+    """Run every strategy for every topic; returns per-strategy averages and per-topic results"""
+    document = make_document(pages)
+    text = document["text"]
+    budget = get_context_budget("explanation", level)
+    print(f"Document: {pages} pages, {len(text)} chars, {estimate_tokens(text)} est. tokens; budget {budget}")
+    print(f"\n{'strategy':<10} {'topic':<20} {'tokens':>7} {'recall':>7} {'precision':>9} {'ms':>8}")
+
+    results = {}
+    for name, strategy in STRATEGIES.items():
+        per_topic = {}
+        for topic, section in document["sections"].items():
+            start = time.perf_counter()
+            context = strategy(text, topic, budget)
+            elapsed = time.perf_counter() - start
+            per_topic[topic] = {**evaluate(context, section), "ms": elapsed * 1000}
+            row = per_topic[topic]
+            print(f"{name:<10} {topic:<20} {row['tokens']:>7} {row['recall']:>7.2f} "
+                  f"{row['precision']:>9.2f} {row['ms']:>8.1f}")
+        results[name] = {
+            field: sum(row[field] for row in per_topic.values()) / len(per_topic)
+            for field in ("tokens", "recall", "precision", "ms")
+        }
+        results[name]["topics"] = per_topic
+
+    print(f"\n{'strategy':<10} {'tokens':>7} {'recall':>7} {'precision':>9} {'ms':>8}")
+    for name, summary in results.items():
+        print(f"{name:<10} {summary['tokens']:>7.0f} {summary['recall']:>7.2f} "
+              f"{summary['precision']:>9.2f} {summary['ms']:>8.1f}")
+    return {"meta": {"pages": pages, "level": level, "budget": budget}, "results": results}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare ways of fitting an upload into the prompt")
+    parser.add_argument("--pages", type=int, default=100)
+    parser.add_argument("--level", default="Intermediate", choices=Config.LEARNING_LEVELS)
+    parser.add_argument("--output", default=None, help="Write results JSON to this file")
+    args = parser.parse_args()
+
+    document = run_benchmarks(args.pages, args.level)
+    if args.output:
+        directory = os.path.dirname(args.output)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(document, f, indent=2)
+            f.write("\n")
+        print(f"\n💾 Results written to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
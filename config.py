@@ -17,11 +17,27 @@ class Config:
     # Database settings
     DATABASE_PATH = "edugenie.db"
     
+    # Model response cache (SQLite file kept next to the main database)
+    RESPONSE_CACHE_ENABLED = True
+    RESPONSE_CACHE_PATH = "edugenie_cache.db"
+    RESPONSE_CACHE_MAX_ENTRIES = 5000
+    RESPONSE_CACHE_TTL_SECONDS = 7 * 24 * 3600
+    # Caching per generation method
+    RESPONSE_CACHE_METHODS = {
+        "explanation": True,
+        "summary": True,
+        "quiz": True,
+        "study_pack": True,
+        "feedback": False,
+    }
+    
     # Learning levels
     LEARNING_LEVELS = ["Beginner", "Intermediate", "Advanced"]
     
-    # File upload settings
+    # File upload settings (keep .streamlit/config.toml maxUploadSize in line)
     MAX_FILE_SIZE_MB = 10
+    # Uploads are copied to a temporary file; this much stays in memory
+    UPLOAD_SPOOL_MEMORY_BYTES = 1024 * 1024
     ALLOWED_EXTENSIONS = [".pdf", ".txt", ".docx"]
     
     # AI Model settings - Using LearnLM for education!
@@ -31,9 +47,240 @@ class Config:
     # "gemini-2.5-pro" - Most powerful (slower but better quality)
     # "gemini-flash-latest" - Always uses newest flash model
     
+    # Model backend: "gemini" (Google Gemini API) or "fake" (deterministic
+    # local stand-in for offline development, load tests and benchmarks)
+    MODEL_BACKEND = os.getenv("EDUGENIE_BACKEND", "gemini")
+    
+    # Fake backend behaviour (see backend/model_backends.py FakeBackend)
+    FAKE_BACKEND_SETTINGS = {
+        "latency": {"distribution": "lognormal", "median": 1.5, "sigma": 0.6},
+        "error_rate": 0.0,
+        "rate_limit_rate": 0.0,
+        "malformed_json_rate": 0.0,
+        "seed": 42,
+    }
+    
+    # Models tried in order when the configured model is unavailable
+    GEMINI_FALLBACK_MODELS = [
+        "learnlm-2.0-flash-experimental",  # Best for education
+        "gemini-2.5-flash",  # Latest stable
+        "gemini-flash-latest",  # Always newest
+        "gemini-2.0-flash",  # Fallback
+    ]
+    
+    # Retries for rate-limit and server errors (exponential backoff with jitter)
+    MODEL_MAX_RETRIES = 3
+    MODEL_BACKOFF_BASE_SECONDS = 1.0
+    MODEL_BACKOFF_MAX_SECONDS = 30.0
+    
+    # Per-model circuit breaker: skip a model after this many consecutive
+    # failures, then allow a trial call after the reset period
+    CIRCUIT_BREAKER_FAILURE_THRESHOLD = 3
+    CIRCUIT_BREAKER_RESET_SECONDS = 60
+    
+    # Process-wide request rate limit per API key (token bucket)
+    MODEL_REQUESTS_PER_MINUTE = 60
+    MODEL_REQUEST_BURST = 10
+    
+    # Hedged requests (opt-in): if a call is slower than the model's
+    # HEDGE_PERCENTILE latency, send a duplicate to the next fallback model
+    # and take whichever answers first. Every fired hedge is an extra call.
+    HEDGING_ENABLED = False
+    HEDGE_PERCENTILE = 95
+    HEDGE_MIN_SAMPLES = 20  # samples needed before the percentile is trusted
+    HEDGE_DEFAULT_DELAY_SECONDS = 10.0
+    HEDGE_MIN_DELAY_SECONDS = 2.0
+    HEDGE_MAX_WORKERS = 16
+    
+    # Model routing per generation method and learning level. The first
+    # rule whose method and level match ("*" matches any) supplies the models
+    # tried first; the regular model list follows as fallback.
+    # strategy "ordered" keeps the listed order, "fastest" puts the model
+    # with the lowest observed median latency first
+    MODEL_ROUTING_ENABLED = True
+    MODEL_ROUTES = [
+        {"method": "summary", "level": "*",
+         "models": ["gemini-2.0-flash", "gemini-2.5-flash"], "strategy": "fastest"},
+        {"method": "quiz", "level": "Beginner",
+         "models": ["gemini-2.0-flash", "gemini-2.5-flash"], "strategy": "fastest"},
+        {"method": "explanation", "level": "Advanced",
+         "models": ["gemini-2.5-pro", "learnlm-2.0-flash-experimental"], "strategy": "ordered"},
+        {"method": "study_pack", "level": "Advanced",
+         "models": ["gemini-2.5-pro", "learnlm-2.0-flash-experimental"], "strategy": "ordered"},
+    ]
+    ROUTER_MIN_SAMPLES = 5  # calls before a model's error rate is trusted
+    ROUTER_EXPLORE_RATE = 0.05  # share of "fastest" requests leading with another model
+    ROUTER_MAX_ERROR_RATE = 0.5  # models failing more often than this are tried last
+    
+    # Estimated price per million tokens (USD) for per-route cost reporting;
+    # check the current Gemini pricing page before relying on these
+    MODEL_PRICING = {
+        "learnlm-2.0-flash-experimental": {"input": 0.0, "output": 0.0},
+        "gemini-2.5-pro": {"input": 1.25, "output": 10.0},
+        "gemini-2.5-flash": {"input": 0.30, "output": 2.50},
+        "gemini-flash-latest": {"input": 0.30, "output": 2.50},
+        "gemini-2.0-flash": {"input": 0.10, "output": 0.40},
+    }
+    
+    # How long a resolved working model is trusted before the preferred
+    # model is tried again (seconds)
+    MODEL_RESOLUTION_TTL_SECONDS = 600
+    
     # Quiz settings
     DEFAULT_QUIZ_QUESTIONS = 5
     
+    # Question bank: generate a larger pool of questions per topic and level
+    # once, then sample each quiz (and every retake) locally from it
+    QUESTION_BANK_ENABLED = False
+    QUESTION_BANK_SIZE = 25
+    
+    # Token budgets for source material packed into each prompt
+    # (uploaded context for explanation/study_pack, the explanation for
+    # summary/quiz), estimated locally by backend/context_packer.py.
+    # Even after the smallest model scale below, explanation/study_pack
+    # budgets hold LIBRARY_CONTEXT_TOKENS (well above the 2000 characters,
+    # ~500 tokens, that used to be sent), and summary/quiz budgets hold a
+    # whole explanation at the largest profile's output cap.
+    CONTEXT_TOKEN_BUDGETS = {
+        "explanation": {"Beginner": 1900, "Intermediate": 2000, "Advanced": 2200},
+        "study_pack": {"Beginner": 1900, "Intermediate": 2000, "Advanced": 2200},
+        "summary": {"Beginner": 2000, "Intermediate": 2600, "Advanced": 3900},
+        "quiz": {"Beginner": 2000, "Intermediate": 2600, "Advanced": 3900},
+    }
+    # Budget multiplier per model (models not listed use 1.0)
+    MODEL_CONTEXT_BUDGET_SCALE = {
+        "gemini-2.5-pro": 1.0,
+        "gemini-2.0-flash": 0.8,
+    }
+    # Hard cap on extracted upload text; extraction stops once it is reached
+    MAX_UPLOAD_CONTEXT_CHARS = 200000
+    # Retrieval stage for long sources: overlapping chunks ranked by BM25
+    # against the topic, best chunks kept within the context budget
+    RETRIEVAL_ENABLED = True
+    RETRIEVAL_MIN_CHARS = 8000  # shorter sources go straight to the packer
+    RETRIEVAL_CHUNK_TOKENS = 96
+    RETRIEVAL_CHUNK_OVERLAP_TOKENS = 24
+    
+    # Document library: signed-in users' uploads are kept (chunked) and
+    # searched with TF-IDF when generating without a new upload
+    DOCUMENT_LIBRARY_ENABLED = True
+    LIBRARY_SEARCH_TOP_K = 20
+    LIBRARY_CONTEXT_TOKENS = 1500  # library passages handed to generation
+    
+    # Parallel PDF extraction (full extraction of large documents): page
+    # ranges are extracted by a process pool
+    PDF_PARALLEL_MIN_PAGES = 40  # smaller PDFs are extracted in-process
+    PDF_PAGES_PER_TASK = 16
+    PDF_EXTRACTION_WORKERS = None  # None - one per CPU
+    PDF_POOL_START_METHOD = None  # multiprocessing start method; None - platform default
+    
+    # Extracted upload text cache (keyed by file hash): an in-memory LRU in
+    # front of a table in the response cache's SQLite file
+    EXTRACTION_CACHE_ENABLED = True
+    EXTRACTION_CACHE_PATH = RESPONSE_CACHE_PATH
+    EXTRACTION_CACHE_MEMORY_ENTRIES = 32
+    EXTRACTION_CACHE_MEMORY_CHARS = 8_000_000
+    EXTRACTION_CACHE_MAX_CHARS = 200_000_000  # total text kept on disk
+    
+    # Normalization of extracted text: running headers/footers, page numbers,
+    # boilerplate, hyphenated line breaks and whitespace runs are removed
+    NORMALIZE_EXTRACTED_TEXT = True
+    NORMALIZE_SAMPLE_PAGES = 12  # first pages used to learn headers/footers
+    NORMALIZE_REPEAT_RATIO = 0.5  # share of sampled pages an edge line must recur on
+    
+    # Topic matching: reuse a past session for a near-identical topic (the
+    # user's own or a public one, generated without an upload or library context)
+    # Jaccard similarity (0-1) of the normalized topics' character trigrams
+    TOPIC_SIMILARITY_THRESHOLD = 0.8
+    # True - reuse the match without asking; False - offer it to the user
+    TOPIC_AUTO_REUSE = False
+    
+    # Generation modes
+    # "separate" - explanation, then summary and quiz as separate calls
+    # "study_pack" - one call returning all three sections as JSON
+    # "conversation" - like "separate", but summary and quiz are follow-ups in
+    #   the explanation's conversation instead of re-sending the explanation
+    GENERATION_MODES = ["separate", "study_pack", "conversation"]
+    DEFAULT_GENERATION_MODE = "separate"
+    
+    # Generation profiles: output token caps, temperature and stop sequences
+    # per method, with caps per learning level. Quiz and study pack caps add
+    # tokens_per_question for every requested question. Methods not listed
+    # (e.g. feedback) use the profile's explanation settings.
+    # The JSON stop sequence ends the output after the closing code fence.
+    # JSON caps are kept loose: a cut-off quiz costs a follow-up call.
+    GENERATION_PROFILES = {
+        "fast": {
+            "explanation": {
+                "temperature": 0.5,
+                "max_output_tokens": {"Beginner": 384, "Intermediate": 512, "Advanced": 640},
+            },
+            "summary": {
+                "temperature": 0.3,
+                "max_output_tokens": {"Beginner": 160, "Intermediate": 192, "Advanced": 224},
+                "stop_sequences": ["\n\n#"],
+            },
+            "quiz": {
+                "temperature": 0.4,
+                "max_output_tokens": {"Beginner": 80, "Intermediate": 80, "Advanced": 80},
+                "tokens_per_question": {"Beginner": 130, "Intermediate": 150, "Advanced": 170},
+                "stop_sequences": ["```\n\n"],
+            },
+            "study_pack": {
+                "temperature": 0.4,
+                "max_output_tokens": {"Beginner": 896, "Intermediate": 1024, "Advanced": 1152},
+                "tokens_per_question": {"Beginner": 130, "Intermediate": 150, "Advanced": 170},
+                "stop_sequences": ["```\n\n"],
+            },
+        },
+        "balanced": {
+            "explanation": {
+                "temperature": 0.7,
+                "max_output_tokens": {"Beginner": 768, "Intermediate": 1024, "Advanced": 1536},
+            },
+            "summary": {
+                "temperature": 0.5,
+                "max_output_tokens": {"Beginner": 256, "Intermediate": 320, "Advanced": 384},
+                "stop_sequences": ["\n\n#"],
+            },
+            "quiz": {
+                "temperature": 0.5,
+                "max_output_tokens": {"Beginner": 100, "Intermediate": 100, "Advanced": 100},
+                "tokens_per_question": {"Beginner": 150, "Intermediate": 170, "Advanced": 200},
+                "stop_sequences": ["```\n\n"],
+            },
+            "study_pack": {
+                "temperature": 0.6,
+                "max_output_tokens": {"Beginner": 1024, "Intermediate": 1280, "Advanced": 1792},
+                "tokens_per_question": {"Beginner": 150, "Intermediate": 170, "Advanced": 200},
+                "stop_sequences": ["```\n\n"],
+            },
+        },
+        "thorough": {
+            "explanation": {
+                "temperature": 0.8,
+                "max_output_tokens": {"Beginner": 1536, "Intermediate": 2048, "Advanced": 3072},
+            },
+            "summary": {
+                "temperature": 0.6,
+                "max_output_tokens": {"Beginner": 384, "Intermediate": 512, "Advanced": 640},
+            },
+            "quiz": {
+                "temperature": 0.6,
+                "max_output_tokens": {"Beginner": 128, "Intermediate": 128, "Advanced": 128},
+                "tokens_per_question": {"Beginner": 200, "Intermediate": 240, "Advanced": 280},
+                "stop_sequences": ["```\n\n"],
+            },
+            "study_pack": {
+                "temperature": 0.7,
+                "max_output_tokens": {"Beginner": 1792, "Intermediate": 2304, "Advanced": 3328},
+                "tokens_per_question": {"Beginner": 200, "Intermediate": 240, "Advanced": 280},
+                "stop_sequences": ["```\n\n"],
+            },
+        },
+    }
+    DEFAULT_GENERATION_PROFILE = os.getenv("EDUGENIE_PROFILE", "balanced")
+
     @staticmethod
     def validate():
         """Validate that required configuration is present"""
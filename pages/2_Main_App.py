@@ -5,9 +5,17 @@ import os
 # Add the root directory to Python path
 sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
 
-from backend.ai_engine import AIEngine
+from backend.ai_engine import get_shared_engine
 from backend.content_processor import ContentProcessor
 from backend.database import Database
+from backend.document_library import get_document_library
+from backend.extraction_cache import get_extraction_cache
+from backend.generation_profiles import list_profiles
+from backend.pipeline import generate_study_materials, generation_modes
+from backend.question_bank import sample_quiz
+from backend.quiz_parser import normalize_question
+from backend.text_normalizer import normalization_report
+from backend.topic_index import get_topic_index
 from config import Config
 
 # Page configuration
@@ -63,54 +71,143 @@ if 'quiz_answers' not in st.session_state:
     st.session_state.quiz_answers = {}
 if 'show_quiz_results' not in st.session_state:
     st.session_state.show_quiz_results = False
+if 'quiz_version' not in st.session_state:
+    st.session_state.quiz_version = 0
+if 'pending_match' not in st.session_state:
+    st.session_state.pending_match = None
 
 def initialize_ai_engine(api_key: str):
-    """Initialize AI Engine with API key"""
+    """Attach the process-wide shared AI Engine for this API key"""
     try:
-        st.session_state.ai_engine = AIEngine(api_key)
+        st.session_state.ai_engine = get_shared_engine(api_key)
         return True
     except Exception as e:
         st.error(f"Error initializing AI Engine: {str(e)}")
         return False
 
-def process_topic(topic: str, learning_level: str, file_content: str = ""):
-    """Process a topic and generate all content"""
+def process_topic(topic: str, learning_level: str, file_content: str = "", mode: str = None,
+                  context_source: str = "none"):
+    """Process a topic and generate all content (context_source: 'none', 'upload' or 'library')"""
+    # Render the explanation progressively while it is being generated
+    stream_area = st.empty()
+    
+    def render_explanation(text_so_far: str):
+        with stream_area.container():
+            st.markdown('<p class="section-header">📖 Detailed Explanation</p>', unsafe_allow_html=True)
+            st.markdown(text_so_far)
+    
     with st.spinner("🧞‍♂️ EduGenie is working its magic..."):
-        # Generate explanation
-        explanation = st.session_state.ai_engine.generate_explanation(
-            topic, learning_level, file_content
+        # Explanation first (streamed), then summary and quiz concurrently
+        # (or a single study-pack call, depending on the mode)
+        result = generate_study_materials(
+            st.session_state.ai_engine, topic, learning_level, file_content, mode,
+            on_explanation_chunk=render_explanation,
+            question_bank=st.session_state.get('question_bank', Config.QUESTION_BANK_ENABLED),
+            profile=st.session_state.get('generation_profile', Config.DEFAULT_GENERATION_PROFILE)
         )
-        
-        # Generate summary
-        summary = st.session_state.ai_engine.generate_summary(
-            topic, explanation, learning_level
+    
+    # The full results are shown in the tabs below
+    stream_area.empty()
+    
+    errors = result['errors']
+    if 'explanation' in errors:
+        st.error(f"Error generating explanation: {errors['explanation']}")
+        return
+    
+    explanation = result['explanation']
+    summary = result['summary']
+    if summary is None:
+        st.warning(f"Summary could not be generated: {errors['summary']}")
+        summary = "_Summary unavailable. Please try generating again._"
+    quiz_data = result['quiz_data']
+    if quiz_data is None:
+        st.warning(f"Quiz could not be generated: {errors['quiz']}")
+        quiz_data = {"questions": [], "error": "Quiz unavailable. Please try generating again."}
+    if result['truncated']:
+        st.info(
+            f"Output hit the length limit of the selected profile ({', '.join(result['truncated'])}); "
+            "choose a longer profile for fuller answers."
         )
-        
-        # Generate quiz
-        quiz_data = st.session_state.ai_engine.generate_quiz(
-            topic, explanation, learning_level
+    
+    timings = result['timings']
+    usage = result['usage']
+    st.caption(
+        " · ".join(f"{stage.title()}: {seconds:.1f}s" for stage, seconds in timings.items())
+        + f" · Mode: {result['mode']} · Model calls: {usage.get('calls', 0)}"
+        + f" · Cache hits: {usage.get('cache_hits', 0)}"
+        + f" · Prompt: {usage.get('prompt_chars', 0):,} chars (~{usage.get('prompt_tokens', 0):,} tokens)"
+        + f" · Context tokens saved: {usage.get('context_tokens_saved', 0):,}"
+        + f" · Reused from conversation: {usage.get('context_tokens_reused', 0):,}"
+        + f" · Response: {usage.get('response_chars', 0):,} chars"
+    )
+    
+    # Save to session state
+    st.session_state.current_session = {
+        'topic': topic,
+        'learning_level': learning_level,
+        'explanation': explanation,
+        'summary': summary,
+        'quiz_data': quiz_data,
+        'context_source': context_source,
+        'question_bank': result.get('question_bank')
+    }
+    
+    # Keep the question bank so retakes are sampled locally. Banks are
+    # shared by topic and level, so one built from an upload or library
+    # document stays with this session only
+    if result.get('question_bank') and not errors and context_source == "none":
+        st.session_state.db.save_question_bank(topic, learning_level, result['question_bank'])
+    
+    # Save to database if user exists (incomplete sessions are not saved,
+    # so they are never reused for later requests)
+    if 'user_id' in st.session_state and not errors:
+        session_id = st.session_state.db.save_session(
+            st.session_state.user_id,
+            topic,
+            learning_level,
+            explanation,
+            summary,
+            quiz_data,
+            context_source=context_source
         )
-        
-        # Save to session state
+        st.session_state.current_session['session_id'] = session_id
+        # Only materials generated from the topic alone are offered for reuse,
+        # and only to their owner
+        if context_source == "none":
+            get_topic_index(st.session_state.db).add(
+                session_id, topic, learning_level, owner=st.session_state.user_id
+            )
+
+def load_saved_session(session_id: int):
+    """Load a saved study session into the current view"""
+    session = st.session_state.db.get_session(session_id)
+    if session:
         st.session_state.current_session = {
-            'topic': topic,
-            'learning_level': learning_level,
-            'explanation': explanation,
-            'summary': summary,
-            'quiz_data': quiz_data
+            'topic': session['topic'],
+            'learning_level': session['learning_level'],
+            'explanation': session['explanation'],
+            'summary': session['summary'],
+            'quiz_data': session['quiz_data'],
+            'context_source': session.get('context_source'),
+            'session_id': session['id']
         }
-        
-        # Save to database if user exists
-        if 'user_id' in st.session_state:
-            session_id = st.session_state.db.save_session(
-                st.session_state.user_id,
-                topic,
-                learning_level,
-                explanation,
-                summary,
-                quiz_data
-            )
-            st.session_state.current_session['session_id'] = session_id
+        st.session_state.show_quiz_results = False
+        st.session_state.quiz_answers = {}
+
+def retake_quiz():
+    """Draw a fresh quiz locally, from the session's or the topic's question bank if there is one"""
+    session = st.session_state.current_session
+    questions = session.get('question_bank')
+    if not questions and session.get('context_source') == "none":
+        # The shared bank only fits sessions generated from the topic alone
+        questions = st.session_state.db.get_question_bank(session['topic'], session['learning_level'])
+    if not questions:
+        # No bank: reshuffle the questions and options of the current quiz
+        questions = [q for q in map(normalize_question, session['quiz_data'].get('questions', [])) if q]
+    session['quiz_data'] = sample_quiz(questions)
+    st.session_state.quiz_version += 1
+    st.session_state.show_quiz_results = False
+    st.session_state.quiz_answers = {}
 
 def display_quiz():
     """Display quiz questions and handle answers"""
@@ -136,7 +233,7 @@ def display_quiz():
         answer = st.radio(
             f"Select your answer for Question {i+1}:",
             q['options'],
-            key=f"q_{i}",
+            key=f"q_{st.session_state.quiz_version}_{i}",
             label_visibility="collapsed"
         )
         
@@ -150,6 +247,10 @@ def display_quiz():
     with col2:
         if st.button("Submit Quiz", type="primary"):
             st.session_state.show_quiz_results = True
+    with col3:
+        if st.button("🔄 New Quiz", help="Draw a fresh quiz without a new model call"):
+            retake_quiz()
+            st.rerun()
     
     # Show results if submitted
     if st.session_state.show_quiz_results:
@@ -197,6 +298,11 @@ with st.sidebar:
         env_api_key = None
     env_api_key = env_api_key or os.getenv("GEMINI_API_KEY")
 
+    # The local fake backend needs no API key
+    if Config.MODEL_BACKEND != "gemini" and not st.session_state.ai_engine:
+        if initialize_ai_engine(env_api_key):
+            st.success(f"✅ AI Engine initialized (backend: {Config.MODEL_BACKEND}).")
+
     # If a key is available from secrets/env, initialize silently (no value shown)
     if env_api_key and not st.session_state.ai_engine:
         if initialize_ai_engine(env_api_key):
@@ -204,7 +310,7 @@ with st.sidebar:
             st.info("API key loaded from environment — not shown or stored in the repo.")
 
     # If no key in environment, ask user to paste one for the current session (masked input)
-    if not env_api_key:
+    if not env_api_key and not st.session_state.ai_engine:
         api_key_input = st.text_input(
             "Gemini API Key (paste for this session only)",
             type="password",
@@ -214,6 +320,31 @@ with st.sidebar:
             if initialize_ai_engine(api_key_input):
                 st.success("✅ AI Engine initialized for this session.")
 
+    # Generation mode, selectable per request to compare latency and cost;
+    # "conversation" is only offered when the backend keeps the context
+    modes = generation_modes(st.session_state.ai_engine.backend if st.session_state.ai_engine else None)
+    st.selectbox(
+        "Generation Mode",
+        modes,
+        index=modes.index(Config.DEFAULT_GENERATION_MODE) if Config.DEFAULT_GENERATION_MODE in modes else 0,
+        key="generation_mode",
+        help="'study_pack' asks for explanation, summary and quiz in a single model call; "
+             "'conversation' asks for summary and quiz as follow-ups without re-sending the explanation"
+    )
+    st.selectbox(
+        "Generation Profile",
+        list_profiles(),
+        index=list_profiles().index(Config.DEFAULT_GENERATION_PROFILE),
+        key="generation_profile",
+        help="Caps response length per section: 'fast' answers are shorter and quicker, 'thorough' more detailed"
+    )
+    st.checkbox(
+        "Generate question bank",
+        value=Config.QUESTION_BANK_ENABLED,
+        key="question_bank",
+        help=f"Generate {Config.QUESTION_BANK_SIZE} questions once (not in 'study_pack' mode) so quiz retakes need no model call"
+    )
+
     st.markdown("---")
 # ...existing code...
 
@@ -258,22 +389,114 @@ uploaded_file = st.file_uploader(
 file_content = ""
 if uploaded_file:
     try:
-        file_bytes = uploaded_file.read()
-        file_content = ContentProcessor.process_file(file_bytes, uploaded_file.name)
-        
-        # Truncate if too long
-        file_content = ContentProcessor.truncate_text(file_content, max_length=5000)
+        # Copied to a spooled temporary file, size limit enforced while reading
+        upload = ContentProcessor.spool_upload(uploaded_file)
+        # Only a safety cap here (extraction stops once it is reached): each
+        # prompt packs the passages most relevant to the topic into its own
+        # token budget. Streamlit reruns this on every interaction; the
+        # extraction cache (keyed by the file hash) skips parsing it again
+        normalization = {}
+        with upload['file'] as spooled:
+            if Config.EXTRACTION_CACHE_ENABLED:
+                file_content = get_extraction_cache().process_file(
+                    spooled, uploaded_file.name, max_chars=Config.MAX_UPLOAD_CONTEXT_CHARS,
+                    content_hash=upload['sha256'], stats=normalization
+                )
+            else:
+                file_content = ContentProcessor.process_file(
+                    spooled, uploaded_file.name, max_chars=Config.MAX_UPLOAD_CONTEXT_CHARS,
+                    stats=normalization
+                )
         
         st.success(f"✅ File uploaded: {uploaded_file.name}")
+        if normalization.get('original_chars'):
+            report = normalization_report(normalization)
+            st.caption(
+                f"🧹 Cleaned text: -{report['chars_reduction']:.0%} characters, "
+                f"-{report['tokens_reduction']:.0%} tokens"
+            )
+        if Config.DOCUMENT_LIBRARY_ENABLED and st.session_state.get('user_id') and file_content:
+            added = get_document_library(st.session_state.db).add_document(
+                st.session_state.user_id, uploaded_file.name, file_content
+            )
+            if added['added']:
+                st.caption(f"📚 Added to your document library ({added['chunks']} passages)")
         with st.expander("Preview extracted text"):
             st.text(file_content[:500] + "..." if len(file_content) > 500 else file_content)
     except Exception as e:
         st.error(f"Error processing file: {str(e)}")
 
+# Without a new upload, signed-in users can draw on their past uploads
+use_library = False
+if Config.DOCUMENT_LIBRARY_ENABLED and st.session_state.get('user_id') and not file_content:
+    library_documents = get_document_library(st.session_state.db).documents(st.session_state.user_id)
+    if library_documents:
+        use_library = st.checkbox(
+            f"📚 Use my document library ({len(library_documents)} documents)",
+            value=True,
+            help="Add the passages of your past uploads that best match the topic"
+        )
+
 # Generate button
 if st.button("✨ Generate Study Materials", type="primary", disabled=not topic):
     if topic:
-        process_topic(topic, learning_level, file_content)
+        context_source = "upload" if file_content else "none"
+        if use_library:
+            file_content = get_document_library(st.session_state.db).context_for(
+                st.session_state.user_id, topic
+            )
+            context_source = "library" if file_content else "none"
+        
+        # Reuse a near-identical past session (the user's own, or a public
+        # one) instead of generating again; skipped when study material is
+        # uploaded, since the context differs
+        match = None
+        if not file_content:
+            match = get_topic_index(st.session_state.db).find(
+                topic, learning_level, st.session_state.get('user_id')
+            )
+        
+        if match and Config.TOPIC_AUTO_REUSE:
+            load_saved_session(match['session_id'])
+            st.info(f"♻️ Reusing saved study materials for **{match['topic']}**")
+        elif match:
+            st.session_state.pending_match = {
+                'match': match,
+                'topic': topic,
+                'learning_level': learning_level,
+                'mode': st.session_state.generation_mode
+            }
+        else:
+            st.session_state.pending_match = None
+            process_topic(
+                topic, learning_level, file_content, st.session_state.generation_mode, context_source
+            )
+            st.session_state.show_quiz_results = False
+            st.session_state.quiz_answers = {}
+
+# Offer saved materials for a near-identical topic
+if st.session_state.get('pending_match'):
+    pending = st.session_state.pending_match
+    offer = st.empty()
+    with offer.container():
+        st.info(
+            f"♻️ Found saved study materials for **{pending['match']['topic']}** "
+            f"({pending['learning_level']}). Use them or generate fresh ones?"
+        )
+        col_reuse, col_fresh = st.columns(2)
+        with col_reuse:
+            use_saved = st.button("Use saved materials")
+        with col_fresh:
+            generate_fresh = st.button("Generate fresh materials")
+    
+    if use_saved:
+        offer.empty()
+        st.session_state.pending_match = None
+        load_saved_session(pending['match']['session_id'])
+    elif generate_fresh:
+        offer.empty()
+        st.session_state.pending_match = None
+        process_topic(pending['topic'], pending['learning_level'], "", pending['mode'])
         st.session_state.show_quiz_results = False
         st.session_state.quiz_answers = {}
 
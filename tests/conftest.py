@@ -0,0 +1,5 @@
+"""Puts the project root on the import path, as the app pages do"""
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
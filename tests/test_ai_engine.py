@@ -0,0 +1,203 @@
+"""Tests for the AI engine on the offline fake backend"""
+import logging
+import time
+import uuid
+
+import pytest
+from google.api_core import exceptions as google_exceptions
+
+import backend.ai_engine as ai_engine_module
+from backend.ai_engine import AIEngine, get_shared_engine
+from backend.model_backends import FakeBackend, GeminiBackend
+from backend.resilience import GenerationError, get_circuit_breaker
+from backend.response_cache import ResponseCache
+from config import Config
+
+EXPLANATION = " ".join(
+    f"Photosynthesis step {i} turns light energy into chemical energy in the chloroplast." for i in range(600)
+)
+
+
+def make_engine(tmp_path, backend: FakeBackend = None, routing: bool = False, hedging: bool = False) -> AIEngine:
+    """Engine with its own API key (so breakers and rate limits are its own) and response cache"""
+    return AIEngine(
+        api_key=f"test-{uuid.uuid4().hex}",
+        backend=backend or FakeBackend(),
+        response_cache=ResponseCache(db_path=str(tmp_path / "responses.db")),
+        routing=routing,
+        hedging=hedging,
+    )
+
+
+def test_shared_engine_is_reused_per_backend_key_and_model():
+    api_key = f"test-{uuid.uuid4().hex}"
+
+    engine = get_shared_engine(api_key, backend_name="fake")
+
+    assert get_shared_engine(api_key, backend_name="fake") is engine
+    assert get_shared_engine(api_key, "gemini-2.0-flash", backend_name="fake") is not engine
+    assert get_shared_engine(f"test-{uuid.uuid4().hex}", backend_name="fake") is not engine
+
+
+def test_gemini_backends_keep_their_own_key():
+    first, second = GeminiBackend("key-one"), GeminiBackend("key-two")
+
+    assert first._client is not second._client
+    assert first._get_model("gemini-2.0-flash")._client is first._client
+    assert second._get_model("gemini-2.0-flash")._client is second._client
+
+
+def test_model_resolution_is_logged_once_not_printed(tmp_path, capsys, caplog):
+    engine = make_engine(tmp_path)
+
+    with caplog.at_level(logging.INFO, logger="backend.ai_engine"):
+        engine.generate_explanation("Photosynthesis", "Beginner")
+        engine.generate_explanation("Cell division", "Beginner")
+
+    assert capsys.readouterr().out == ""
+    assert [record.getMessage() for record in caplog.records] == [
+        f"Using fake model: {engine._resolved_model}"
+    ]
+
+
+def test_streamed_explanation_arrives_in_chunks_and_is_cached_whole(tmp_path):
+    engine = make_engine(tmp_path, backend=FakeBackend(chunk_words=5))
+
+    chunks = list(engine.stream_explanation("Photosynthesis", "Beginner"))
+
+    assert len(chunks) > 1
+    assert list(engine.stream_explanation("Photosynthesis", "Beginner")) == ["".join(chunks)]
+    assert engine.backend.calls == 1
+
+
+def test_stream_opens_do_not_record_latency(tmp_path):
+    engine = make_engine(tmp_path)
+
+    "".join(engine.stream_explanation("Photosynthesis", "Beginner"))
+    assert all(engine.latency_tracker.count(m) == 0 for m in engine._candidate_models())
+
+    engine.generate_summary("Photosynthesis", "Light becomes sugar.", "Beginner")
+    assert sum(engine.latency_tracker.count(m) for m in engine._candidate_models()) == 1
+
+
+def test_transient_errors_are_retried_on_the_same_model(tmp_path, monkeypatch):
+    monkeypatch.setattr(Config, "MODEL_BACKOFF_BASE_SECONDS", 0.0)
+    engine = make_engine(tmp_path)
+    called = []
+
+    def call_model(model_name):
+        called.append(model_name)
+        if len(called) < 3:
+            raise google_exceptions.ServiceUnavailable("busy")
+        return "answer"
+
+    assert engine._call_with_failover(call_model, ["first", "second"]) == ("first", "answer")
+    assert called == ["first", "first", "first"]
+
+
+def test_unavailable_model_is_tripped_and_skipped(tmp_path):
+    engine = make_engine(tmp_path)
+    called = []
+
+    def call_model(model_name):
+        called.append(model_name)
+        if model_name == "retired":
+            raise google_exceptions.NotFound("no such model")
+        return model_name
+
+    assert engine._call_with_failover(call_model, ["retired", "current"]) == ("current", "current")
+    assert engine._call_with_failover(call_model, ["retired", "current"]) == ("current", "current")
+    assert called == ["retired", "current", "current"]
+    assert not get_circuit_breaker(engine.api_key, "retired").allow()
+
+
+def test_failover_raises_generation_error_when_every_model_fails(tmp_path):
+    engine = make_engine(tmp_path)
+
+    def call_model(model_name):
+        raise ValueError(f"{model_name} failed")
+
+    with pytest.raises(GenerationError):
+        engine._call_with_failover(call_model, ["one", "two"])
+
+
+def test_hedge_thread_pool_is_created_only_when_hedging(tmp_path, monkeypatch):
+    monkeypatch.setattr(ai_engine_module, "_HEDGE_EXECUTOR", None)
+
+    make_engine(tmp_path).generate_summary("Photosynthesis", "Light becomes sugar.", "Beginner")
+    assert ai_engine_module._HEDGE_EXECUTOR is None
+
+    make_engine(tmp_path, hedging=True).generate_summary("Osmosis", "Water crosses membranes.", "Beginner")
+    assert ai_engine_module._HEDGE_EXECUTOR is not None
+
+
+def test_hedge_goes_to_a_model_the_primary_does_not_try(tmp_path, monkeypatch):
+    monkeypatch.setattr(Config, "HEDGE_DEFAULT_DELAY_SECONDS", 0.05)
+    engine = make_engine(tmp_path, hedging=True)
+    called = []
+
+    def call_model(model_name):
+        called.append(model_name)
+        if model_name == "slow":
+            time.sleep(0.3)
+        return model_name
+
+    assert engine._call_hedged(call_model, ["slow", "hedge", "spare"]) == ("hedge", "hedge")
+    assert called == ["slow", "hedge"]
+    # A hedge that wins only because the primary was slow is not the new default
+    assert engine._resolved_model != "hedge"
+    stats = engine.get_hedge_stats()
+    assert (stats["hedges_fired"], stats["hedge_wins"]) == (1, 1)
+
+
+def test_hedge_model_is_tried_last_when_the_primary_fails_fast(tmp_path):
+    engine = make_engine(tmp_path, hedging=True)
+    called = []
+
+    def call_model(model_name):
+        called.append(model_name)
+        if model_name != "hedge":
+            raise ValueError("bad request")
+        return model_name
+
+    assert engine._call_hedged(call_model, ["first", "hedge", "spare"]) == ("hedge", "hedge")
+    assert called == ["first", "spare", "hedge"]
+    assert engine.get_hedge_stats()["hedges_fired"] == 0
+
+
+def test_context_is_packed_for_the_model_that_is_called(tmp_path, monkeypatch):
+    # Half of the "fastest" requests explore, so the lead model varies between routings
+    monkeypatch.setattr(Config, "ROUTER_EXPLORE_RATE", 0.5)
+    engine = make_engine(tmp_path, routing=True)
+
+    budget_models, called_models = [], []
+    get_context_budget = ai_engine_module.get_context_budget
+
+    def recording_budget(method, learning_level, model_name=None):
+        budget_models.append(model_name)
+        return get_context_budget(method, learning_level, model_name)
+
+    generate = engine.backend.generate
+
+    def recording_generate(model_name, prompt, generation_config=None):
+        called_models.append(model_name)
+        return generate(model_name, prompt, generation_config)
+
+    monkeypatch.setattr(ai_engine_module, "get_context_budget", recording_budget)
+    monkeypatch.setattr(engine.backend, "generate", recording_generate)
+
+    for i in range(12):
+        engine.generate_summary(f"Photosynthesis {i}", EXPLANATION, "Beginner")
+
+    assert budget_models == called_models
+    assert len(set(called_models)) > 1
+
+
+def test_summary_cache_counts_one_lookup_per_request(tmp_path):
+    engine = make_engine(tmp_path, routing=True)
+
+    engine.generate_summary("Photosynthesis", "Light becomes sugar.", "Beginner")
+    engine.generate_summary("Photosynthesis", "Light becomes sugar.", "Beginner")
+
+    stats = engine.response_cache.get_stats()["methods"]["summary"]
+    assert (stats["hits"], stats["misses"]) == (1, 1)
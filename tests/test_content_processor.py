@@ -0,0 +1,161 @@
+"""Tests for upload text extraction"""
+import hashlib
+import io
+
+import PyPDF2
+import pytest
+
+from backend.content_processor import UPLOAD_BLOCK_BYTES, ContentProcessor
+from backend.context_packer import estimate_tokens
+from benchmarks.pdf_extraction_bench import make_pdf
+from config import Config
+
+
+class Counted:
+    """Iterator over pieces that records how many were pulled"""
+
+    def __init__(self, pieces):
+        self._pieces = iter(pieces)
+        self.pulled = 0
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        piece = next(self._pieces)
+        self.pulled += 1
+        return piece
+
+
+def test_collect_text_stops_at_the_character_budget():
+    pieces = [f"Block {i} of the notes. " for i in range(100)]
+
+    pulled = Counted(pieces)
+    text = ContentProcessor.collect_text(pulled, max_chars=50)
+
+    assert text == "".join(pieces)[:50].strip()
+    assert pulled.pulled == 3
+
+
+def test_collect_text_stops_at_the_token_budget():
+    pieces = [f"Block {i} of the notes. " for i in range(100)]
+
+    pulled = Counted(pieces)
+    text = ContentProcessor.collect_text(pulled, max_tokens=20)
+
+    assert estimate_tokens(text) == 20
+    assert "".join(pieces).startswith(text)
+    assert pulled.pulled < 5
+
+
+def test_collect_text_without_a_budget_keeps_everything():
+    pieces = ["one ", "two ", "three "]
+
+    assert ContentProcessor.collect_text(iter(pieces)) == "one two three"
+
+
+def test_budgeted_pdf_extraction_only_parses_the_pages_it_needs():
+    pdf = make_pdf([[f"Page {i} line {j} about photosynthesis" for j in range(20)] for i in range(30)])
+
+    pages = Counted(ContentProcessor.iter_pdf_pages(pdf))
+    text = ContentProcessor.collect_text(pages, max_chars=1000)
+
+    assert text.startswith("Page 0 line 0")
+    assert len(text) <= 1000
+    assert pages.pulled < 5
+
+
+def numbered_pdf(pages: int) -> bytes:
+    return make_pdf([[f"Page {i} text"] for i in range(pages)])
+
+
+def test_large_pdf_is_extracted_by_a_pool_in_page_order(monkeypatch):
+    monkeypatch.setattr(Config, "PDF_PARALLEL_MIN_PAGES", 10)
+
+    result = ContentProcessor.extract_pdf_pages(numbered_pdf(24), workers=3, pages_per_task=4)
+
+    assert result["workers"] == 3
+    assert [page.strip() for page in result["pages"]] == [f"Page {i} text" for i in range(24)]
+    assert result["errors"] == {}
+
+
+def test_small_pdf_is_extracted_without_a_pool():
+    result = ContentProcessor.extract_pdf_pages(numbered_pdf(5), workers=4)
+
+    assert result["workers"] == 1
+    assert len(result["pages"]) == 5
+
+
+def test_a_failing_page_is_reported_without_failing_the_document(monkeypatch):
+    # Forked workers inherit the patched page class
+    monkeypatch.setattr(Config, "PDF_PARALLEL_MIN_PAGES", 10)
+    monkeypatch.setattr(Config, "PDF_POOL_START_METHOD", "fork")
+    extract_text = PyPDF2.PageObject.extract_text
+
+    def failing_extract_text(page, *args, **kwargs):
+        text = extract_text(page, *args, **kwargs)
+        if text.startswith("Page 7 "):
+            raise ValueError("broken content stream")
+        return text
+
+    monkeypatch.setattr(PyPDF2.PageObject, "extract_text", failing_extract_text)
+
+    for workers in (1, 2):
+        result = ContentProcessor.extract_pdf_pages(numbered_pdf(12), workers=workers, pages_per_task=4)
+
+        assert result["pages"][7] == ""
+        assert result["pages"][8].strip() == "Page 8 text"
+        assert result["errors"] == {7: "ValueError: broken content stream"}
+
+
+class CountingReader(io.BytesIO):
+    """Upload stand-in that records how many bytes were read"""
+
+    def __init__(self, data: bytes):
+        super().__init__(data)
+        self.bytes_read = 0
+
+    def read(self, size=-1):
+        block = super().read(size)
+        self.bytes_read += len(block)
+        return block
+
+
+def test_spooled_upload_reports_size_and_hash_and_stays_in_memory_when_small():
+    data = b"Photosynthesis notes\n" * 100
+
+    upload = ContentProcessor.spool_upload(io.BytesIO(data), max_bytes=10_000, memory_bytes=4096)
+
+    assert (upload["size"], upload["sha256"]) == (len(data), hashlib.sha256(data).hexdigest())
+    assert not upload["file"]._rolled
+    assert upload["file"].read() == data
+    upload["file"].close()
+
+
+def test_large_upload_is_spooled_to_disk():
+    data = b"x" * (3 * UPLOAD_BLOCK_BYTES)
+
+    upload = ContentProcessor.spool_upload(io.BytesIO(data), max_bytes=len(data), memory_bytes=1024)
+
+    assert upload["file"]._rolled
+    assert upload["file"].read() == data
+    upload["file"].close()
+
+
+def test_oversize_upload_is_rejected_without_reading_it_all():
+    source = CountingReader(b"x" * (10 * UPLOAD_BLOCK_BYTES))
+
+    with pytest.raises(ValueError, match="limit"):
+        ContentProcessor.spool_upload(source, max_bytes=UPLOAD_BLOCK_BYTES + 1)
+
+    assert source.bytes_read == 2 * UPLOAD_BLOCK_BYTES
+
+
+def test_spooled_upload_can_be_extracted():
+    data = b"Photosynthesis converts light energy into chemical energy.\n" * 50
+    upload = ContentProcessor.spool_upload(io.BytesIO(data))
+
+    text = ContentProcessor.process_file(upload["file"], "notes.txt", normalize=False)
+
+    assert text == data.decode("utf-8").strip()
+    upload["file"].close()
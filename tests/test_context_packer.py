@@ -0,0 +1,47 @@
+"""Tests for the context budgets and packer"""
+from backend.context_packer import estimate_tokens, get_context_budget, pack_context
+from config import Config
+
+LEVELS = ["Beginner", "Intermediate", "Advanced"]
+
+
+def smallest_budget(method: str, learning_level: str) -> int:
+    models = [None, *Config.MODEL_CONTEXT_BUDGET_SCALE]
+    return min(get_context_budget(method, learning_level, model) for model in models)
+
+
+def test_upload_budgets_hold_library_context_on_every_model():
+    for method in ("explanation", "study_pack"):
+        for level in LEVELS:
+            # 2000 characters (~500 tokens) was the context sent before budgets
+            assert smallest_budget(method, level) >= max(500, Config.LIBRARY_CONTEXT_TOKENS)
+
+
+def test_summary_and_quiz_budgets_hold_a_whole_explanation():
+    for level in LEVELS:
+        longest = max(
+            profile["explanation"]["max_output_tokens"][level]
+            for profile in Config.GENERATION_PROFILES.values()
+        )
+        assert smallest_budget("summary", level) >= longest
+        assert smallest_budget("quiz", level) >= longest
+
+
+def test_budget_is_scaled_per_model():
+    base = get_context_budget("explanation", "Beginner")
+    assert get_context_budget("explanation", "Beginner", "gemini-2.0-flash") == int(
+        base * Config.MODEL_CONTEXT_BUDGET_SCALE["gemini-2.0-flash"]
+    )
+    assert get_context_budget("feedback", "Expert") == base
+
+
+def test_packed_context_fits_the_budget_and_keeps_the_topic():
+    filler = "The committee approved the annual budget after a long meeting. " * 60
+    relevant = "Photosynthesis turns light energy into chemical energy in the chloroplast."
+    text = f"{filler}\n\n{relevant}\n\n{filler}"
+
+    packed = pack_context(text, 100, query="photosynthesis")
+
+    assert estimate_tokens(packed["text"]) <= 100
+    assert relevant in packed["text"]
+    assert packed["saved_tokens"] > 0
@@ -0,0 +1,58 @@
+"""Tests for the per-user document library"""
+from backend.context_packer import estimate_tokens
+from backend.database import Database
+from backend.document_library import DocumentLibrary
+
+BIOLOGY = "Photosynthesis in the chloroplast turns light energy into glucose and oxygen. " * 20
+HISTORY = "The French Revolution began in 1789 and ended the absolute monarchy in France. " * 20
+
+
+def make_library(tmp_path):
+    db = Database(str(tmp_path / "edugenie.db"))
+    return DocumentLibrary(db), db.create_user("ada"), db.create_user("grace")
+
+
+def test_search_ranks_the_matching_document_and_stays_within_the_owner(tmp_path):
+    library, ada, grace = make_library(tmp_path)
+    library.add_document(ada, "biology.txt", BIOLOGY)
+    library.add_document(ada, "history.txt", HISTORY)
+    library.add_document(grace, "grace.txt", BIOLOGY + " Chlorophyll absorbs red light.")
+
+    results = library.search(ada, "photosynthesis in chloroplasts")
+
+    assert results
+    assert {chunk["file_name"] for chunk in results} == {"biology.txt"}
+    assert results == sorted(results, key=lambda chunk: -chunk["score"])
+    assert library.search(ada, "quantum chromodynamics") == []
+
+
+def test_a_document_is_added_once_per_user(tmp_path):
+    library, ada, grace = make_library(tmp_path)
+
+    assert library.add_document(ada, "biology.txt", BIOLOGY)["added"]
+    assert not library.add_document(ada, "copy.txt", BIOLOGY)["added"]
+    assert library.add_document(grace, "biology.txt", BIOLOGY)["added"]
+    assert [document["file_name"] for document in library.documents(ada)] == ["biology.txt"]
+
+
+def test_index_is_rebuilt_from_the_database(tmp_path):
+    library, ada, _ = make_library(tmp_path)
+    library.add_document(ada, "biology.txt", BIOLOGY)
+    library.add_document(ada, "history.txt", HISTORY)
+
+    reloaded = DocumentLibrary(library.db)
+
+    assert reloaded.search(ada, "French Revolution") == library.search(ada, "French Revolution")
+    assert not reloaded.add_document(ada, "biology.txt", BIOLOGY)["added"]
+
+
+def test_context_keeps_the_best_passages_within_the_budget(tmp_path):
+    library, ada, _ = make_library(tmp_path)
+    library.add_document(ada, "biology.txt", BIOLOGY)
+    library.add_document(ada, "history.txt", HISTORY)
+
+    context = library.context_for(ada, "photosynthesis", budget=200)
+
+    assert "Photosynthesis" in context
+    assert "Revolution" not in context
+    assert estimate_tokens(context) <= 200
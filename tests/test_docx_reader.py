@@ -0,0 +1,96 @@
+"""Tests for the streaming DOCX reader"""
+import io
+import zipfile
+
+import docx
+
+from backend.docx_reader import iter_docx_text
+
+NAMESPACE = 'xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main"'
+
+
+def paragraph(text: str, style: str = None, footnote: str = None) -> str:
+    properties = f'<w:pPr><w:pStyle w:val="{style}"/></w:pPr>' if style else ""
+    reference = f'<w:r><w:footnoteReference w:id="{footnote}"/></w:r>' if footnote else ""
+    return f"<w:p>{properties}<w:r><w:t>{text}</w:t></w:r>{reference}</w:p>"
+
+
+def table(rows) -> str:
+    cells = "".join(
+        "<w:tr>" + "".join(f"<w:tc>{paragraph(cell)}</w:tc>" for cell in row) + "</w:tr>" for row in rows
+    )
+    return f"<w:tbl>{cells}</w:tbl>"
+
+
+def make_docx(body: str, footnotes: str = "", headers=(), footers=()) -> io.BytesIO:
+    data = io.BytesIO()
+    with zipfile.ZipFile(data, "w") as archive:
+        archive.writestr("word/document.xml", f"<w:document {NAMESPACE}><w:body>{body}</w:body></w:document>")
+        if footnotes:
+            archive.writestr("word/footnotes.xml", f"<w:footnotes {NAMESPACE}>{footnotes}</w:footnotes>")
+        for kind, parts in (("header", headers), ("footer", footers)):
+            for number, text in enumerate(parts, 1):
+                archive.writestr(f"word/{kind}{number}.xml", f"<w:{kind[:3]} {NAMESPACE}>{paragraph(text)}</w:{kind[:3]}>")
+    data.seek(0)
+    return data
+
+
+def test_blocks_keep_headings_lists_and_table_rows():
+    body = (
+        paragraph("Photosynthesis", style="Heading2")
+        + paragraph("Plants make sugar.")
+        + paragraph("Light reactions", style="ListParagraph")
+        + table([["Stage", "Place"], ["Calvin cycle", "Stroma"]])
+    )
+
+    pieces = list(iter_docx_text(make_docx(body)))
+
+    assert pieces == [
+        "## Photosynthesis\n",
+        "Plants make sugar.\n",
+        "- Light reactions\n",
+        "Stage | Place\nCalvin cycle | Stroma\n",
+    ]
+
+
+def test_footnotes_follow_the_block_that_cites_them():
+    body = paragraph("Chlorophyll is green.", footnote="2") + paragraph("Next paragraph.")
+    footnotes = (
+        '<w:footnote w:type="separator" w:id="0"><w:p><w:r><w:t>---</w:t></w:r></w:p></w:footnote>'
+        '<w:footnote w:id="2">' + paragraph("It reflects green light.") + "</w:footnote>"
+    )
+
+    pieces = list(iter_docx_text(make_docx(body, footnotes)))
+
+    assert pieces == ["Chlorophyll is green.[2]\n", "[2] It reflects green light.\n", "Next paragraph.\n"]
+
+
+def test_headers_come_first_and_footers_last_each_line_once():
+    docx = make_docx(
+        paragraph("Body text."),
+        headers=["Biology notes", "Biology notes", "Chapter 4"],
+        footers=["Page footer", "12"],
+    )
+
+    pieces = list(iter_docx_text(docx))
+
+    assert pieces == ["Biology notes\n", "Chapter 4\n", "Body text.\n", "Page footer\n"]
+
+
+def test_reading_can_stop_after_the_first_block():
+    docx = make_docx("".join(paragraph(f"Paragraph {i}.") for i in range(1000)))
+
+    assert next(iter_docx_text(docx)) == "Paragraph 0.\n"
+
+
+def test_reads_documents_written_by_python_docx():
+    document = docx.Document()
+    document.sections[0].header.paragraphs[0].text = "Biology notes"
+    document.add_heading("Photosynthesis", level=1)
+    cells = document.add_table(rows=1, cols=2).rows[0].cells
+    cells[0].text, cells[1].text = "Stage", "Place"
+    data = io.BytesIO()
+    document.save(data)
+    data.seek(0)
+
+    assert list(iter_docx_text(data)) == ["Biology notes\n", "# Photosynthesis\n", "Stage | Place\n"]
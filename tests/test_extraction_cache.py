@@ -0,0 +1,92 @@
+"""Tests for the two-tier extraction cache"""
+import sqlite3
+
+import backend.extraction_cache as extraction_cache_module
+from backend.content_processor import ContentProcessor
+from backend.extraction_cache import ExtractionCache
+
+NOTES = ("Photosynthesis converts light energy into chemical energy.\n" * 200).encode("utf-8")
+
+
+def test_repeated_extraction_is_served_from_memory_then_disk(tmp_path, monkeypatch):
+    db_path = str(tmp_path / "extraction.db")
+    extractions = []
+    process_file = ContentProcessor.process_file
+
+    def counting_process_file(*args, **kwargs):
+        extractions.append(args[1])
+        return process_file(*args, **kwargs)
+
+    monkeypatch.setattr(ContentProcessor, "process_file", counting_process_file)
+
+    cache = ExtractionCache(db_path=db_path)
+    first = cache.process_file(NOTES, "notes.txt")
+    assert cache.process_file(NOTES, "renamed.TXT") == first
+
+    restarted = ExtractionCache(db_path=db_path)
+    assert restarted.process_file(NOTES, "notes.txt") == first
+
+    assert extractions == ["notes.txt"]
+    assert cache.get_stats()["memory_hits"] == 1
+    assert restarted.get_stats()["disk_hits"] == 1
+
+
+def test_key_depends_on_content_type_and_settings():
+    key = ExtractionCache.make_key(NOTES, "notes.txt", {"normalize": True})
+
+    assert ExtractionCache.make_key(NOTES, "other.txt", {"normalize": True}) == key
+    assert ExtractionCache.make_key(NOTES, "notes.pdf", {"normalize": True}) != key
+    assert ExtractionCache.make_key(NOTES, "notes.txt", {"normalize": False}) != key
+    assert ExtractionCache.make_key(NOTES + b"!", "notes.txt", {"normalize": True}) != key
+
+
+def test_memory_tier_evicts_the_least_recently_used_entry():
+    cache = ExtractionCache(db_path=None, memory_max_entries=2)
+
+    cache.put("a", "a.txt", "a" * 10)
+    cache.put("b", "b.txt", "b" * 10)
+    assert cache.get("a") == "a" * 10
+    cache.put("c", "c.txt", "c" * 10)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == "a" * 10
+    assert cache.get("c") == "c" * 10
+
+
+def test_disk_tier_is_kept_within_its_character_limit(tmp_path, monkeypatch):
+    ticks = iter(range(1, 100))
+    monkeypatch.setattr(extraction_cache_module.time, "time", lambda: next(ticks))
+    cache = ExtractionCache(db_path=str(tmp_path / "extraction.db"), max_chars=25)
+
+    cache.put("a", "a.txt", "a" * 10)
+    cache.put("b", "b.txt", "b" * 10)
+    assert ExtractionCache(db_path=cache.db_path).get("a") == "a" * 10
+    cache.put("c", "c.txt", "c" * 10)
+
+    restarted = ExtractionCache(db_path=cache.db_path)
+    assert restarted.get("b") is None
+    assert restarted.get("a") == "a" * 10
+    assert restarted.get("c") == "c" * 10
+
+
+def test_normalization_stats_are_returned_on_hits(tmp_path):
+    cache = ExtractionCache(db_path=str(tmp_path / "extraction.db"))
+    miss_stats, hit_stats, disk_stats = {}, {}, {}
+
+    cache.process_file(NOTES, "notes.txt", normalize=True, stats=miss_stats)
+    cache.process_file(NOTES, "notes.txt", normalize=True, stats=hit_stats)
+    ExtractionCache(db_path=cache.db_path).process_file(NOTES, "notes.txt", normalize=True, stats=disk_stats)
+
+    assert miss_stats
+    assert hit_stats == miss_stats
+    assert disk_stats == miss_stats
+
+
+def test_new_database_has_the_stats_column(tmp_path):
+    db_path = str(tmp_path / "extraction.db")
+    ExtractionCache(db_path=db_path)
+
+    conn = sqlite3.connect(db_path)
+    columns = [row[1] for row in conn.execute("PRAGMA table_info(extraction_cache)")]
+    conn.close()
+    assert "stats" in columns
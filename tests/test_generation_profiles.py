@@ -0,0 +1,57 @@
+"""Tests for generation profiles and output caps"""
+import uuid
+
+import pytest
+
+from backend.ai_engine import AIEngine
+from backend.context_packer import estimate_tokens
+from backend.generation_profiles import get_generation_config, list_profiles
+from backend.model_backends import FakeBackend
+from backend.response_cache import ResponseCache
+from config import Config
+
+
+def test_profiles_are_listed_in_config_order():
+    assert list_profiles() == list(Config.GENERATION_PROFILES)
+    assert Config.DEFAULT_GENERATION_PROFILE in list_profiles()
+
+
+def test_caps_depend_on_method_and_level():
+    beginner = get_generation_config("balanced", "explanation", "Beginner")
+    advanced = get_generation_config("balanced", "explanation", "Advanced")
+
+    assert beginner == {"max_output_tokens": 768, "temperature": 0.7}
+    assert advanced["max_output_tokens"] == 1536
+    assert get_generation_config("balanced", "summary", "Beginner")["stop_sequences"] == ["\n\n#"]
+    # Methods without settings of their own use the explanation's
+    assert get_generation_config("balanced", "feedback", "Expert") == beginner
+
+
+def test_quiz_caps_grow_with_the_question_count():
+    five = get_generation_config("fast", "quiz", "Intermediate", num_questions=5)
+    ten = get_generation_config("fast", "quiz", "Intermediate", num_questions=10)
+
+    assert five["max_output_tokens"] == 80 + 5 * 150
+    assert ten["max_output_tokens"] - five["max_output_tokens"] == 5 * 150
+    assert get_generation_config("fast", "quiz", "Intermediate") == five
+
+
+def test_unknown_profile_is_rejected():
+    with pytest.raises(ValueError):
+        get_generation_config("reckless", "explanation", "Beginner")
+
+
+def test_capped_explanation_is_counted_as_truncated(tmp_path):
+    engine = AIEngine(
+        api_key=f"test-{uuid.uuid4().hex}",
+        backend=FakeBackend(),
+        response_cache=ResponseCache(db_path=str(tmp_path / "responses.db")),
+    )
+    cap = get_generation_config("fast", "explanation", "Beginner")["max_output_tokens"]
+
+    with engine.track_usage() as usage:
+        short = engine.generate_explanation("Photosynthesis", "Beginner", profile="fast")
+        full = engine.generate_explanation("Photosynthesis", "Beginner", profile="thorough")
+
+    assert estimate_tokens(short) == cap < estimate_tokens(full)
+    assert usage["truncated_responses"] == 1
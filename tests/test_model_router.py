@@ -0,0 +1,48 @@
+"""Tests for rule-based model routing"""
+from backend.metrics import LatencyTracker, OutcomeTracker
+from backend.model_router import DEFAULT_ROUTE, ModelRouter
+from config import Config
+
+ROUTES = [
+    {"method": "summary", "level": "*", "models": ["slow", "quick"], "strategy": "fastest"},
+    {"method": "explanation", "level": "Advanced", "models": ["pro", "flash"], "strategy": "ordered"},
+]
+
+
+def make_router() -> ModelRouter:
+    return ModelRouter(LatencyTracker(), OutcomeTracker(), routes=ROUTES, seed=1)
+
+
+def record(router: ModelRouter, model_name: str, seconds: float, success: bool = True, times: int = 1):
+    for _ in range(times):
+        router.outcome_tracker.record(model_name, success)
+        if success:
+            router.latency_tracker.record(model_name, seconds)
+
+
+def test_rules_match_by_method_and_level():
+    router = make_router()
+
+    assert router.route("explanation", "Advanced") == ("explanation/Advanced", ["pro", "flash"])
+    assert router.route("explanation", "Beginner") == (DEFAULT_ROUTE, [])
+    assert router.route("summary", "Beginner")[0] == "summary/*"
+
+
+def test_fastest_route_measures_untried_models_then_leads_with_the_quickest(monkeypatch):
+    monkeypatch.setattr(Config, "ROUTER_EXPLORE_RATE", 0.0)
+    router = make_router()
+
+    record(router, "slow", 2.0)
+    assert router.route("summary")[1] == ["quick", "slow"]
+
+    record(router, "quick", 0.5)
+    record(router, "slow", 2.0)
+    assert router.route("summary")[1] == ["quick", "slow"]
+
+
+def test_failing_models_are_moved_to_the_back():
+    router = make_router()
+
+    record(router, "pro", 1.0, success=False, times=Config.ROUTER_MIN_SAMPLES)
+
+    assert router.route("explanation", "Advanced")[1] == ["flash", "pro"]
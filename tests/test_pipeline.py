@@ -0,0 +1,43 @@
+"""Tests for the study materials pipeline"""
+import uuid
+
+from backend.ai_engine import AIEngine
+from backend.model_backends import FakeBackend, GeminiBackend
+from backend.pipeline import generate_study_materials, generation_modes
+from backend.response_cache import ResponseCache
+from config import Config
+
+
+def make_engine(tmp_path, backend: FakeBackend = None) -> AIEngine:
+    return AIEngine(
+        api_key=f"test-{uuid.uuid4().hex}",
+        backend=backend or FakeBackend(),
+        response_cache=ResponseCache(db_path=str(tmp_path / "responses.db")),
+    )
+
+
+def test_conversation_mode_is_only_offered_for_backends_keeping_context():
+    assert generation_modes(FakeBackend()) == Config.GENERATION_MODES
+    assert "conversation" not in generation_modes(GeminiBackend("key"))
+    assert "conversation" not in generation_modes(None)
+
+
+def test_conversation_mode_refers_to_the_explanation_instead_of_resending_it(tmp_path):
+    result = generate_study_materials(make_engine(tmp_path), "Photosynthesis", "Beginner", mode="conversation")
+
+    assert result["mode"] == "conversation"
+    assert result["errors"] == {}
+    assert result["summary"] and result["quiz_data"]["questions"]
+    assert result["usage"]["context_tokens_reused"] > 0
+
+
+def test_conversation_mode_falls_back_to_separate_without_kept_context(tmp_path):
+    backend = FakeBackend()
+    backend.keeps_conversation_context = False
+
+    result = generate_study_materials(make_engine(tmp_path, backend), "Photosynthesis", "Beginner", mode="conversation")
+
+    assert result["mode"] == "separate"
+    assert result["errors"] == {}
+    assert result["usage"]["context_tokens_reused"] == 0
+    assert result["usage"]["calls"] == 3
@@ -0,0 +1,120 @@
+"""Tests for quiz parsing and local quiz sampling from a question bank"""
+import json
+import random
+import uuid
+
+from backend.ai_engine import AIEngine
+from backend.database import Database
+from backend.model_backends import FakeBackend
+from backend.question_bank import sample_quiz
+from backend.quiz_parser import QuizStreamParser, normalize_question, option_text, parse_quiz_questions
+from backend.response_cache import ResponseCache
+
+
+def make_question(n: int) -> dict:
+    return {
+        "question": f"Question {n}?",
+        "options": [f"A) right {n}", f"B) wrong {n}a", f"C) wrong {n}b", f"D) wrong {n}c"],
+        "correct_answer": "A",
+        "explanation": f"Because {n}.",
+    }
+
+
+def test_normalize_question_labels_options_and_reduces_the_answer():
+    for answer in ("b", "B) Blue", "Blue", 1):
+        question = normalize_question({"question": " Sky colour? ", "options": ["Red", "Blue"], "answer": answer})
+        assert question == {
+            "question": "Sky colour?",
+            "options": ["A) Red", "B) Blue"],
+            "correct_answer": "B",
+            "explanation": "",
+        }
+
+
+def test_normalize_question_rejects_unusable_values():
+    assert normalize_question("not a question") is None
+    assert normalize_question({"question": "Q?", "options": ["only one"], "correct_answer": "A"}) is None
+    assert normalize_question({"question": "Q?", "options": ["A", "B"], "correct_answer": "E"}) is None
+
+
+def test_parser_recovers_questions_from_truncated_fenced_output():
+    text = "```json\n" + json.dumps({"questions": [make_question(1), make_question(2)]}, indent=2)
+    truncated = text[:text.rindex("Because 2")]
+
+    questions = parse_quiz_questions(truncated)
+
+    assert [q["question"] for q in questions] == ["Question 1?"]
+
+
+def test_stream_parser_emits_each_question_once_when_it_completes():
+    text = json.dumps({"questions": [make_question(1), make_question(1), make_question(2)]})
+    parser = QuizStreamParser()
+
+    emitted = [[q["question"] for q in parser.feed(text[i:i + 7])] for i in range(0, len(text), 7)]
+
+    assert [question for batch in emitted for question in batch] == ["Question 1?", "Question 2?"]
+    assert len(parser.questions) == 2
+
+
+def test_stream_parser_ignores_braces_and_quotes_inside_strings():
+    question = make_question(1)
+    question["explanation"] = 'A "quoted" {brace} and a \\ backslash.'
+    text = json.dumps({"questions": [question]})
+    parser = QuizStreamParser()
+
+    for char in text:
+        parser.feed(char)
+
+    assert parser.questions == [normalize_question(question)]
+
+
+def test_stream_parser_only_holds_the_question_being_streamed():
+    text = json.dumps({"questions": [make_question(n) for n in range(300)]})
+    longest_question = max(len(json.dumps(make_question(n))) for n in range(300))
+    parser = QuizStreamParser()
+
+    held = []
+    for i in range(0, len(text), 5):
+        parser.feed(text[i:i + 5])
+        held.append(sum(len(chunk) for chunk in parser._chunks))
+
+    assert len(parser.questions) == 300
+    assert max(held) <= longest_question + 5
+
+
+def test_sample_quiz_shuffles_options_and_remaps_the_answer():
+    bank = [normalize_question(make_question(n)) for n in range(10)]
+
+    quiz = sample_quiz(bank, num_questions=5, rng=random.Random(3))
+
+    assert len(quiz["questions"]) == 5
+    assert len({q["question"] for q in quiz["questions"]}) == 5
+    for question in quiz["questions"]:
+        correct = question["options"][ord(question["correct_answer"]) - ord("A")]
+        assert option_text(correct).startswith("right")
+        assert [option[:3] for option in question["options"]] == ["A) ", "B) ", "C) ", "D) "]
+    assert any(q["correct_answer"] != "A" for q in quiz["questions"])
+
+
+def test_sample_quiz_is_capped_at_the_bank_size():
+    bank = [normalize_question(make_question(n)) for n in range(3)]
+
+    assert len(sample_quiz(bank, num_questions=10)["questions"]) == 3
+
+
+def test_question_bank_is_generated_once_and_stored_per_topic_and_level(tmp_path):
+    engine = AIEngine(
+        api_key=f"test-{uuid.uuid4().hex}",
+        backend=FakeBackend(),
+        response_cache=ResponseCache(db_path=str(tmp_path / "responses.db")),
+    )
+    db = Database(str(tmp_path / "edugenie.db"))
+
+    bank = engine.generate_question_bank("Photosynthesis", "Light becomes sugar.", "Beginner", size=12)
+    db.save_question_bank("Photosynthesis", "Beginner", bank)
+    db.save_question_bank("Photosynthesis", "Beginner", bank[:6])
+
+    assert len(bank) == 12
+    assert db.get_question_bank("Photosynthesis", "Beginner") == bank[:6]
+    assert db.get_question_bank("Photosynthesis", "Advanced") is None
+    assert engine.backend.calls == 1
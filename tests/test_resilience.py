@@ -0,0 +1,99 @@
+"""Tests for retries, circuit breakers and the request rate limit"""
+from google.api_core import exceptions as google_exceptions
+
+import backend.resilience as resilience
+from backend.resilience import CircuitBreaker, TokenBucket, backoff_delay, is_transient_error
+from config import Config
+
+
+class Clock:
+    """Stands in for time.monotonic() and time.sleep(); moved forward by hand or by sleeping"""
+
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float):
+        self.now += seconds
+
+
+def use_clock(monkeypatch) -> Clock:
+    clock = Clock()
+    monkeypatch.setattr(resilience.time, "monotonic", clock)
+    monkeypatch.setattr(resilience.time, "sleep", clock.sleep)
+    return clock
+
+
+def test_breaker_opens_after_consecutive_failures(monkeypatch):
+    use_clock(monkeypatch)
+    breaker = CircuitBreaker(failure_threshold=3, reset_seconds=30)
+
+    breaker.record_failure()
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+    breaker.record_failure()
+    assert breaker.allow()
+
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow()
+
+
+def test_half_open_breaker_lets_one_trial_through(monkeypatch):
+    clock = use_clock(monkeypatch)
+    breaker = CircuitBreaker(failure_threshold=1, reset_seconds=30)
+    breaker.record_failure()
+
+    clock.now += 30
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert breaker.allow()
+    assert not breaker.allow()
+
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.allow()
+
+
+def test_failed_trial_reopens_the_breaker(monkeypatch):
+    clock = use_clock(monkeypatch)
+    breaker = CircuitBreaker(failure_threshold=5, reset_seconds=30)
+    breaker.trip()
+    assert not breaker.allow()
+
+    clock.now += 30
+    assert breaker.allow()
+    breaker.record_failure()
+
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow()
+
+
+def test_token_bucket_allows_a_burst_then_the_rate(monkeypatch):
+    clock = use_clock(monkeypatch)
+    bucket = TokenBucket(rate_per_second=2.0, capacity=3)
+
+    assert all(bucket.acquire(timeout=0) for _ in range(3))
+    assert not bucket.acquire(timeout=0)
+
+    start = clock.now
+    assert bucket.acquire()
+    assert clock.now - start == 0.5
+
+
+def test_only_server_side_errors_are_retried():
+    assert is_transient_error(google_exceptions.ServiceUnavailable("busy"))
+    assert is_transient_error(google_exceptions.ResourceExhausted("quota"))
+    assert not is_transient_error(google_exceptions.InvalidArgument("bad prompt"))
+    assert not is_transient_error(ValueError("bad"))
+
+
+def test_backoff_honours_the_suggested_retry_delay(monkeypatch):
+    monkeypatch.setattr(Config, "MODEL_BACKOFF_MAX_SECONDS", 30.0)
+
+    delay = backoff_delay(0, google_exceptions.ResourceExhausted("Quota exceeded, retry in 12s"))
+
+    assert delay >= 12.0
+    assert 0 <= backoff_delay(10) <= 30.0
@@ -0,0 +1,88 @@
+"""Tests for the persistent model response cache"""
+import backend.response_cache as response_cache_module
+from backend.response_cache import ResponseCache
+
+
+class Clock:
+    """Stands in for time.time(); moved forward by hand"""
+
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def make_cache(tmp_path, monkeypatch, **options):
+    """Cache under tmp_path reading the returned clock"""
+    clock = Clock()
+    monkeypatch.setattr(response_cache_module.time, "time", clock)
+    return ResponseCache(db_path=str(tmp_path / "responses.db"), **options), clock
+
+
+def test_key_covers_model_prompt_and_settings():
+    key = ResponseCache.make_key("model-a", "prompt", {"temperature": 0.3})
+
+    assert ResponseCache.make_key("model-a", "prompt", {"temperature": 0.3}) == key
+    assert ResponseCache.make_key("model-b", "prompt", {"temperature": 0.3}) != key
+    assert ResponseCache.make_key("model-a", "prompt!", {"temperature": 0.3}) != key
+    assert ResponseCache.make_key("model-a", "prompt", {"temperature": 0.9}) != key
+
+
+def test_hit_after_put_and_per_method_counters(tmp_path, monkeypatch):
+    cache, _ = make_cache(tmp_path, monkeypatch)
+
+    assert cache.get("summary", "model-a", "prompt") is None
+    cache.put("summary", "model-a", "prompt", "cached summary")
+
+    assert cache.get("summary", "model-a", "prompt") == "cached summary"
+    assert cache.get("summary", "model-b", "prompt") is None
+    summary = cache.get_stats()["methods"]["summary"]
+    assert (summary["hits"], summary["misses"]) == (1, 2)
+
+
+def test_entries_expire_after_the_ttl(tmp_path, monkeypatch):
+    cache, clock = make_cache(tmp_path, monkeypatch, ttl_seconds=3)
+    cache.put("summary", "model-a", "prompt", "cached summary")
+
+    clock.now += 3
+    assert cache.get("summary", "model-a", "prompt") == "cached summary"
+    clock.now += 1
+    assert cache.get("summary", "model-a", "prompt") is None
+    assert cache.get_stats()["entries"] == 0
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path, monkeypatch):
+    cache, clock = make_cache(tmp_path, monkeypatch, max_entries=2)
+    cache.put("summary", "model-a", "first", "1")
+    clock.now += 1
+    cache.put("summary", "model-a", "second", "2")
+    clock.now += 1
+    cache.get("summary", "model-a", "first")
+    clock.now += 1
+
+    cache.put("summary", "model-a", "third", "3")
+
+    assert cache.get("summary", "model-a", "first") == "1"
+    assert cache.get("summary", "model-a", "second") is None
+    assert cache.get("summary", "model-a", "third") == "3"
+
+
+def test_lookup_across_models_counts_once_and_prefers_the_first(tmp_path, monkeypatch):
+    cache, _ = make_cache(tmp_path, monkeypatch)
+    cache.put("quiz", "model-b", "prompt", "from b")
+    cache.put("quiz", "model-c", "prompt", "from c")
+
+    assert cache.get_any("quiz", ["model-a", "model-b", "model-c"], "prompt") == "from b"
+    assert cache.get_any("quiz", ["model-a", "model-d"], "prompt") is None
+    quiz = cache.get_stats()["methods"]["quiz"]
+    assert (quiz["hits"], quiz["misses"]) == (1, 1)
+
+
+def test_disabled_methods_are_neither_stored_nor_counted(tmp_path, monkeypatch):
+    cache, _ = make_cache(tmp_path, monkeypatch, enabled_methods={"summary": False})
+
+    cache.put("summary", "model-a", "prompt", "cached summary")
+
+    assert cache.get("summary", "model-a", "prompt") is None
+    assert cache.get_stats()["methods"].get("summary", {}).get("misses", 0) == 0
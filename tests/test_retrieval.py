@@ -0,0 +1,53 @@
+"""Tests for BM25 chunk selection"""
+from backend.context_packer import estimate_tokens
+from backend.retrieval import BM25Index, chunk_text, select_chunks, tokenize
+
+FILLER = "The committee reviewed the quarterly budget and approved the travel plans. " * 40
+RELEVANT = "Photosynthesis in the chloroplast converts light energy into glucose and oxygen. " * 5
+
+
+def test_text_within_budget_is_kept_whole():
+    result = select_chunks(RELEVANT, "photosynthesis", budget=10_000)
+
+    assert result["text"] == RELEVANT
+    assert result["tokens"] == result["original_tokens"]
+
+
+def test_selection_keeps_the_relevant_passage_within_budget():
+    text = FILLER + RELEVANT + FILLER
+
+    result = select_chunks(text, "photosynthesis chloroplast", budget=120, chunk_tokens=40, overlap_tokens=8)
+
+    assert "Photosynthesis in the chloroplast" in result["text"]
+    assert result["tokens"] <= 120
+    assert estimate_tokens(result["text"]) < estimate_tokens(text)
+    assert result["chunks"] == sorted(result["chunks"])
+
+
+def test_text_without_matches_keeps_its_beginning():
+    result = select_chunks(FILLER * 3, "photosynthesis", budget=60, chunk_tokens=30, overlap_tokens=0)
+
+    assert (FILLER * 3).startswith(result["text"].split("\n\n")[0])
+    assert result["chunks"][0] == 0
+
+
+def test_bm25_scores_only_documents_containing_the_query_terms():
+    index = BM25Index([FILLER, RELEVANT, FILLER])
+
+    scores = index.scores("Photosynthesis glucose")
+
+    assert scores[1] > 0
+    assert scores[0] == scores[2] == 0
+
+
+def test_chunks_overlap_and_stay_within_their_size():
+    chunks = chunk_text(FILLER, chunk_tokens=40, overlap_tokens=8)
+
+    assert len(chunks) > 1
+    assert all(chunk["tokens"] <= 40 for chunk in chunks)
+    for previous, chunk in zip(chunks, chunks[1:]):
+        assert previous["start"] < chunk["start"] < previous["end"]
+
+
+def test_plural_query_terms_match_singular_text():
+    assert tokenize("Circuits and theories") == tokenize("circuit theory")
@@ -0,0 +1,62 @@
+"""Tests for the extracted text normalizer"""
+from backend.text_normalizer import normalization_report, normalize_blocks, normalize_pages
+
+
+def make_page(number: int, body: str) -> str:
+    return f"Biology 101 | Chapter {number // 10 + 1}\n{body}\n\n- {number} -\n"
+
+
+def test_running_headers_and_page_numbers_are_removed():
+    topics = ["cells", "mitosis", "enzymes", "osmosis", "proteins", "membranes", "genes", "tissues"]
+    pages = [make_page(i, f"This page is about {topic}.") for i, topic in enumerate(topics, 1)]
+    stats = {}
+
+    text = "".join(normalize_pages(pages, stats))
+
+    assert "Biology 101" not in text
+    assert "- 3 -" not in text
+    assert "This page is about enzymes." in text
+    # Numbered footers repeat too (digits are ignored on short lines)
+    assert stats["header_footer_lines"] == 16
+
+
+def test_page_numbers_are_dropped_without_repetition():
+    stats = {}
+
+    text = "".join(normalize_pages(["Light becomes sugar.\nPage 3 of 40\n", "Oxygen is released.\n4\n"], stats))
+
+    assert text == "Light becomes sugar.\n\nOxygen is released.\n"
+    assert stats["boilerplate_lines"] == 2
+
+
+def test_short_documents_keep_repeated_lines():
+    pages = ["Photosynthesis\nLight becomes sugar.\n", "Photosynthesis\nOxygen is released.\n"]
+
+    assert "".join(normalize_pages(pages)).count("Photosynthesis") == 2
+
+
+def test_hyphenated_words_are_joined_across_lines_and_pages():
+    stats = {}
+
+    text = "".join(normalize_pages(["The chloro-\nplast holds chloro-\n", "phyll. Self-\nMade stays.\n"], stats))
+
+    assert text == "The chloroplast holds chlorophyll. Self-\nMade stays.\n"
+    assert stats["hyphenations"] == 2
+
+
+def test_blocks_lose_boilerplate_and_whitespace_runs():
+    blocks = ["Cells  divide\t by   mitosis.\n", "© 2024 Example Press. All rights reserved.\n", "Next   block.\n"]
+
+    assert list(normalize_blocks(blocks)) == ["Cells divide by mitosis.\n", "Next block.\n"]
+
+
+def test_report_shows_the_reduction():
+    stats = {}
+    list(normalize_blocks(["Cells    divide    by    mitosis.\n"], stats))
+
+    report = normalization_report(stats)
+
+    assert report["chars_saved"] == stats["original_chars"] - stats["chars"] > 0
+    assert 0 < report["chars_reduction"] < 1
+    assert report["tokens_saved"] == 0
+    assert normalization_report({**stats, "original_chars": 0})["chars_reduction"] == 0.0
@@ -0,0 +1,64 @@
+"""Tests for near-duplicate topic matching"""
+from backend.database import Database
+from backend.topic_index import TopicIndex, get_topic_index, normalize_topic
+
+
+def test_trivial_wordings_normalize_to_the_same_topic():
+    assert normalize_topic("What is Photosynthesis?") == "photosynthesis"
+    assert normalize_topic("Explain the Water Cycle") == "water cycle"
+    assert normalize_topic("what is the") == "what is the"
+
+
+def test_near_duplicate_topic_matches_at_the_same_level():
+    index = TopicIndex()
+    index.add(1, "The French Revolution causes", "Beginner", owner=7)
+
+    match = index.find("French Revolution cause", "Beginner", user_id=7)
+
+    assert match["session_id"] == 1
+    assert 0.8 <= match["similarity"] < 1.0
+    assert index.find("French Revolution cause", "Advanced", user_id=7) is None
+
+
+def test_topics_just_below_the_threshold_do_not_match():
+    index = TopicIndex()
+    index.add(1, "World War I", "Beginner", owner=7)
+
+    assert index.find("World War II", "Beginner", user_id=7) is None
+    assert index.find("World War II", "Beginner", user_id=7, threshold=0.75)["session_id"] == 1
+
+
+def test_sessions_are_reused_only_by_their_owner_unless_public():
+    index = TopicIndex()
+    index.add(1, "Photosynthesis", "Beginner", owner=7)
+    index.add(2, "Cell division", "Beginner", public=True)
+    index.add(3, "Plate tectonics", "Beginner")
+
+    assert index.find("What is photosynthesis", "Beginner", user_id=7)["session_id"] == 1
+    assert index.find("What is photosynthesis", "Beginner", user_id=8) is None
+    assert index.find("Cell division", "Beginner", user_id=8)["session_id"] == 2
+    assert index.find("Cell division", "Beginner")["session_id"] == 2
+    assert index.find("Plate tectonics", "Beginner", user_id=7) is None
+
+
+def test_newest_session_wins_for_the_same_topic():
+    index = TopicIndex()
+    index.add(1, "Photosynthesis", "Beginner", owner=7)
+    index.add(2, "photosynthesis?", "Beginner", owner=7)
+
+    assert index.find("Photosynthesis", "Beginner", user_id=7)["session_id"] == 2
+    assert len(index) == 1
+
+
+def test_index_built_from_the_database_skips_context_sessions(tmp_path):
+    db = Database(str(tmp_path / "edugenie.db"))
+    quiz = {"questions": []}
+    topic_only = db.save_session(7, "Photosynthesis", "Beginner", "e", "s", quiz, context_source="none")
+    db.save_session(7, "Cell division", "Beginner", "e", "s", quiz, context_source="upload")
+    db.save_session(7, "Plate tectonics", "Beginner", "e", "s", quiz)
+
+    index = get_topic_index(db)
+
+    assert index.find("Photosynthesis", "Beginner", user_id=7)["session_id"] == topic_only
+    assert index.find("Cell division", "Beginner", user_id=7) is None
+    assert index.find("Plate tectonics", "Beginner", user_id=7) is None